@@ -0,0 +1,164 @@
+from asyncio import sleep as async_sleep
+from math import log
+from random import Random
+from threading import Lock
+from time import sleep
+from typing import Callable, Iterator
+
+from packit.types import MemoryType
+
+LatencyDistribution = Callable[[Random], float]
+
+DEFAULT_STOP = {"done": True, "finish_reason": "stop"}
+
+
+class InjectedError(Exception):
+    """
+    Error raised by the mock LLM to simulate a failed request. It looks like a 503 response, so the retrying model
+    wrappers will treat it as retryable.
+    """
+
+    status_code = 503
+
+
+class MockResponse:
+    content: str
+    response_metadata: dict[str, bool | str]
+
+    def __init__(self, content: str, response_metadata: dict[str, bool | str]):
+        self.content = content
+        self.response_metadata = response_metadata
+
+
+def constant_latency(seconds: float) -> LatencyDistribution:
+    def _constant_latency(rng: Random) -> float:
+        return seconds
+
+    return _constant_latency
+
+
+def uniform_latency(low: float, high: float) -> LatencyDistribution:
+    def _uniform_latency(rng: Random) -> float:
+        return rng.uniform(low, high)
+
+    return _uniform_latency
+
+
+def lognormal_latency(median: float, sigma: float = 0.5) -> LatencyDistribution:
+    """
+    Long-tailed latency, which is closer to a real model server under load.
+    """
+
+    def _lognormal_latency(rng: Random) -> float:
+        return rng.lognormvariate(log(median), sigma)
+
+    return _lognormal_latency
+
+
+class LatencyLLM:
+    """
+    Mock LLM that replies from a list of canned responses, with simulated latency, token generation rate, and
+    failures. Replies are picked in order and the same seed will produce the same latencies and failures.
+    """
+
+    calls: int
+    failures: int
+    index: int
+    replies: list[str]
+
+    def __init__(
+        self,
+        replies: list[str],
+        latency: LatencyDistribution = constant_latency(0.0),
+        tokens_per_second: float | None = None,
+        failure_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.calls = 0
+        self.failure_rate = failure_rate
+        self.failures = 0
+        self.index = 0
+        self.latency = latency
+        self.lock = Lock()
+        self.replies = replies
+        self.rng = Random(seed)
+        self.tokens_per_second = tokens_per_second
+
+    def next_reply(self) -> tuple[str, float, bool]:
+        """
+        Pick the next reply, along with the time to the first token and whether the request should fail.
+        """
+
+        with self.lock:
+            self.calls += 1
+            reply = self.replies[self.index]
+            self.index = (self.index + 1) % len(self.replies)
+
+            delay = self.latency(self.rng)
+            failed = self.rng.random() < self.failure_rate
+            if failed:
+                self.failures += 1
+
+        return reply, delay, failed
+
+    def generation_time(self, content: str) -> float:
+        if self.tokens_per_second is None:
+            return 0.0
+
+        # roughly four characters per token
+        return (len(content) / 4) / self.tokens_per_second
+
+    def invoke(self, messages: list[MemoryType], config=None, **kwargs) -> MockResponse:
+        reply, delay, failed = self.next_reply()
+        sleep(delay)
+        if failed:
+            raise InjectedError("injected failure")
+
+        sleep(self.generation_time(reply))
+        return MockResponse(reply, DEFAULT_STOP)
+
+    async def ainvoke(
+        self, messages: list[MemoryType], config=None, **kwargs
+    ) -> MockResponse:
+        reply, delay, failed = self.next_reply()
+        await async_sleep(delay)
+        if failed:
+            raise InjectedError("injected failure")
+
+        await async_sleep(self.generation_time(reply))
+        return MockResponse(reply, DEFAULT_STOP)
+
+    def batch(
+        self, inputs: list[list[MemoryType]], config=None, **kwargs
+    ) -> list[MockResponse]:
+        """
+        Simulate a server that processes the batch in parallel, so the whole batch takes as long as the slowest reply.
+        """
+
+        picks = [self.next_reply() for _ in inputs]
+        sleep(
+            max(
+                (delay + self.generation_time(reply) for reply, delay, _ in picks),
+                default=0,
+            )
+        )
+
+        if any(failed for _reply, _delay, failed in picks):
+            raise InjectedError("injected failure")
+
+        return [MockResponse(reply, DEFAULT_STOP) for reply, _delay, _failed in picks]
+
+    def stream(
+        self, messages: list[MemoryType], config=None, **kwargs
+    ) -> Iterator[MockResponse]:
+        reply, delay, failed = self.next_reply()
+        sleep(delay)
+        if failed:
+            raise InjectedError("injected failure")
+
+        chunk_size = 4
+        for i in range(0, len(reply), chunk_size):
+            chunk = reply[i : i + chunk_size]
+            sleep(self.generation_time(chunk))
+            metadata = DEFAULT_STOP if i + chunk_size >= len(reply) else {}
+            yield MockResponse(chunk, metadata)
@@ -0,0 +1,321 @@
+from argparse import ArgumentParser
+from json import dump, dumps
+from logging import WARNING, getLogger
+from platform import python_version
+from statistics import mean, median
+from sys import stdout
+from time import perf_counter, time
+from typing import Callable
+
+from packit.abac import SubsetABAC
+from packit.agent import Agent
+from packit.groups import Panel, group_router
+from packit.loops import loop_map, loop_reduce, loop_retry, loop_team, loop_tool
+from packit.profiling import profiling
+from packit.results import bool_result, json_fixups, markdown_result
+from packit.results.function import multi_function_result
+from packit.toolbox import RestrictedToolbox, Toolbox
+from packit.types import RuleState
+
+from .mocks import (
+    LatencyDistribution,
+    LatencyLLM,
+    constant_latency,
+    lognormal_latency,
+    uniform_latency,
+)
+
+logger = getLogger(__name__)
+
+DEFAULT_SCALES = [1, 10, 100]
+
+# a setup function takes the scale and a factory for mock LLMs, and returns the function to be timed
+BenchmarkSetup = Callable[
+    [int, Callable[[list[str]], LatencyLLM]], Callable[[], object]
+]
+
+benchmarks: dict[str, BenchmarkSetup] = {}
+
+
+def benchmark(name: str):
+    def register(setup: BenchmarkSetup) -> BenchmarkSetup:
+        benchmarks[name] = setup
+        return setup
+
+    return register
+
+
+def make_agents(
+    count: int, make_llm: Callable[[list[str]], LatencyLLM], replies: list[str]
+) -> list[Agent]:
+    llm = make_llm(replies)
+    return [
+        Agent(f"agent_{i}", "You are a benchmark agent.", {}, llm) for i in range(count)
+    ]
+
+
+def make_tool(index: int) -> Callable:
+    def tool(value: str) -> str:
+        """
+        Echo the value back.
+
+        Args:
+            value: the value to echo
+        """
+
+        return value
+
+    tool.__name__ = f"tool_{index}"
+    return tool
+
+
+# region loops
+
+
+@benchmark("loop_map")
+def setup_loop_map(scale: int, make_llm):
+    agents = make_agents(scale, make_llm, ["mapped"])
+    return lambda: loop_map(
+        agents, "benchmark", stop_condition=lambda current=0, **kwargs: current >= scale
+    )
+
+
+@benchmark("loop_reduce")
+def setup_loop_reduce(scale: int, make_llm):
+    agents = make_agents(scale, make_llm, ["reduced"])
+    return lambda: loop_reduce(
+        agents, "benchmark", stop_condition=lambda current=0, **kwargs: current >= scale
+    )
+
+
+@benchmark("loop_retry")
+def setup_loop_retry(scale: int, make_llm):
+    # every prompt fails to parse once before succeeding
+    agents = make_agents(1, make_llm, ["maybe", "yes"])
+
+    def run():
+        return [
+            loop_retry(agents, "benchmark", result_parser=bool_result)
+            for _ in range(scale)
+        ]
+
+    return run
+
+
+@benchmark("loop_tool")
+def setup_loop_tool(scale: int, make_llm):
+    toolbox = Toolbox([make_tool(0)])
+    agents = make_agents(
+        1,
+        make_llm,
+        ['{"function": "tool_0", "parameters": {"value": "done"}}'],
+    )
+
+    def run():
+        return [loop_tool(agents, "benchmark", toolbox=toolbox) for _ in range(scale)]
+
+    return run
+
+
+@benchmark("loop_team")
+def setup_loop_team(scale: int, make_llm):
+    manager, *workers = make_agents(scale + 1, make_llm, ["done"])
+    return lambda: loop_team(manager, workers, "benchmark", "continue")
+
+
+# endregion
+# region groups
+
+
+@benchmark("panel_invoke")
+def setup_panel_invoke(scale: int, make_llm):
+    panel = Panel(make_agents(scale, make_llm, ["yes", "no", "yes"]))
+    return lambda: panel.invoke("benchmark", {})
+
+
+@benchmark("group_router")
+def setup_group_router(scale: int, make_llm):
+    experts = make_agents(scale, make_llm, ["routed"])
+    routes = {f"route_{i}": expert for i, expert in enumerate(experts)}
+    decider = make_agents(1, make_llm, [f"route_{scale - 1}"])[0]
+    return lambda: group_router(decider, "benchmark", routes)
+
+
+# endregion
+# region parsers
+
+
+@benchmark("multi_function_result")
+def setup_multi_function_result(scale: int, make_llm):
+    toolbox = Toolbox([make_tool(0)])
+    agent = make_agents(1, make_llm, ["unused"])[0]
+    value = dumps(
+        [
+            {"function": "tool_0", "parameters": {"value": f"value_{i}"}}
+            for i in range(scale)
+        ]
+    )
+    return lambda: multi_function_result(value, agent=agent, toolbox=toolbox)
+
+
+@benchmark("json_fixups")
+def setup_json_fixups(scale: int, make_llm):
+    # a fenced, line-broken list of objects, which is what most models produce
+    objects = ",\n".join(f'{{"key_{i}": "value_{i}"}}' for i in range(scale))
+    value = f"```json\n[{objects}]\n```"
+    return lambda: json_fixups(value, list_result=True)
+
+
+@benchmark("markdown_result")
+def setup_markdown_result(scale: int, make_llm):
+    blocks = "\n\n".join(
+        f"Step {i}:\n\n```python\nprint({i})\n```" for i in range(scale)
+    )
+    return lambda: markdown_result(blocks)
+
+
+# endregion
+# region toolbox
+
+
+@benchmark("restricted_toolbox_list_definitions")
+def setup_restricted_toolbox(scale: int, make_llm):
+    tools = [make_tool(i) for i in range(scale)]
+    abac = SubsetABAC(
+        [
+            ({"subject": "agent_0", "resource": f"tool_{i}"}, RuleState.ALLOW)
+            for i in range(0, scale, 2)
+        ]
+    )
+    toolbox = RestrictedToolbox(tools, abac)
+    return lambda: toolbox.list_definitions({"subject": "agent_0", "action": "call"})
+
+
+# endregion
+
+
+def parse_latency(spec: str) -> LatencyDistribution:
+    """
+    Parse a latency distribution, like `constant:0.01`, `uniform:0.01:0.05`, or `lognormal:0.02:0.5`.
+    """
+
+    kind, *args = spec.split(":")
+    values = [float(arg) for arg in args]
+
+    if kind == "constant":
+        return constant_latency(*values)
+    elif kind == "uniform":
+        return uniform_latency(*values)
+    elif kind == "lognormal":
+        return lognormal_latency(*values)
+
+    raise ValueError(f"Unknown latency distribution: {kind}")
+
+
+def percentile(samples: list[float], percent: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(percent * len(ordered)))
+    return ordered[index]
+
+
+def run_benchmark(
+    name: str,
+    scale: int,
+    make_llm: Callable[[list[str]], LatencyLLM],
+    repeat: int,
+) -> dict:
+    """
+    Time a benchmark, then run it once more with the profiler enabled to split the time between packit and the LLM.
+    """
+
+    run = benchmarks[name](scale, make_llm)
+
+    errors = 0
+    samples = []
+    for _ in range(repeat):
+        start = perf_counter()
+        try:
+            run()
+        except Exception:
+            errors += 1
+
+        samples.append(perf_counter() - start)
+
+    with profiling() as profiler:
+        try:
+            run()
+        except Exception:
+            errors += 1
+
+    phases = {
+        phase: round(row["total"], 6) for phase, row in profiler.summary().items()
+    }
+    total = sum(samples)
+
+    return {
+        "name": name,
+        "scale": scale,
+        "repeat": repeat,
+        "errors": errors,
+        "mean": mean(samples),
+        "median": median(samples),
+        "min": min(samples),
+        "max": max(samples),
+        "p95": percentile(samples, 0.95),
+        "throughput": scale * repeat / total if total > 0 else None,
+        "framework_time": profiler.framework_time(),
+        "llm_time": profiler.totals.get("llm", 0.0),
+        "phases": phases,
+    }
+
+
+def main(args=None) -> dict:
+    parser = ArgumentParser(description="Run the packit benchmarks.")
+    parser.add_argument("--benchmark", action="append", choices=sorted(benchmarks))
+    parser.add_argument("--scale", action="append", type=int)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--latency", default="constant:0.001")
+    parser.add_argument("--tokens-per-second", type=float, default=None)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None)
+    options = parser.parse_args(args)
+
+    # the loops log every parse error at warning level or above
+    getLogger("packit").setLevel(WARNING + 10)
+
+    latency = parse_latency(options.latency)
+
+    def make_llm(replies: list[str]) -> LatencyLLM:
+        return LatencyLLM(
+            replies,
+            latency=latency,
+            tokens_per_second=options.tokens_per_second,
+            failure_rate=options.failure_rate,
+            seed=options.seed,
+        )
+
+    results = []
+    for name in options.benchmark or sorted(benchmarks):
+        for scale in options.scale or DEFAULT_SCALES:
+            logger.info("running %s at scale %s", name, scale)
+            results.append(run_benchmark(name, scale, make_llm, options.repeat))
+
+    report = {
+        "timestamp": time(),
+        "python": python_version(),
+        "options": vars(options),
+        "results": results,
+    }
+
+    if options.output:
+        with open(options.output, "w") as f:
+            dump(report, f, indent=2)
+    else:
+        dump(report, stdout, indent=2)
+
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
 from packit.abac import *  # noqa
 from packit.agent import *  # noqa
+from packit.cache import *  # noqa
+from packit.checkpoint import *  # noqa
+from packit.clients import *  # noqa
 from packit.conditions import *  # noqa
 from packit.context import *  # noqa
 from packit.errors import *  # noqa
@@ -8,6 +11,8 @@ from packit.formats import *  # noqa
 from packit.groups import *  # noqa
 from packit.loops import *  # noqa
 from packit.memory import *  # noqa
+from packit.models import *  # noqa
+from packit.profiling import *  # noqa
 from packit.prompts import *  # noqa
 from packit.results import *  # noqa
 from packit.selectors import *  # noqa
@@ -12,6 +12,7 @@ REQUIRED_ATTRIBUTES = ["subject", "resource", "action"]
 class SubsetABAC(ABACAdapter):
     default_state: RuleState
     rules: list[SubsetRule]
+    version: int
 
     def __init__(
         self,
@@ -20,6 +21,23 @@ class SubsetABAC(ABACAdapter):
     ):
         self.rules = rules
         self.default_state = default_state
+        self.version = 0
+
+    def add_rule(self, rule: SubsetRule) -> None:
+        """
+        Add a rule and update the version, so cached checks can be invalidated.
+        """
+
+        self.rules.append(rule)
+        self.version += 1
+
+    def remove_rule(self, rule: SubsetRule) -> None:
+        """
+        Remove a rule and update the version, so cached checks can be invalidated.
+        """
+
+        self.rules.remove(rule)
+        self.version += 1
 
     def check_rule(
         self,
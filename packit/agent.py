@@ -1,12 +1,30 @@
+from concurrent.futures import ThreadPoolExecutor
 from logging import getLogger
 from os import environ
-from typing import Any, List, MutableSequence, Protocol, Sequence
+from typing import (
+    Any,
+    AsyncIterator,
+    Iterator,
+    List,
+    MutableSequence,
+    Protocol,
+    Sequence,
+)
 
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
 from langchain_core.prompt_values import PromptValue
 
-from packit.formats import format_str_or_json
+from packit.cache import ResponseCache, cache_key
+from packit.clients import (
+    DEFAULT_OLLAMA_API,
+    ClientRegistry,
+    accepts_timeout,
+    client_registry,
+    create_client,
+)
+from packit.formats import compile_template
 from packit.memory import make_limited_memory, memory_order_width
+from packit.profiling import profile_phase
 from packit.prompts import DEFAULT_PROMPTS, PromptLibrary, get_random_prompt
 from packit.toolbox import Toolbox
 from packit.tracing import SpanKind, set_tracer, trace
@@ -17,10 +35,14 @@ from packit.types import (
     MemoryType,
     PromptTemplate,
     PromptType,
+    StreamCutoff,
 )
 
 logger = getLogger(__name__)
 
+# metadata for responses that were cut off by a stream matcher, which should be treated as complete
+CUTOFF_STOP = {"done": True, "finish_reason": "stop"}
+
 
 class AgentModel(Protocol):
     def invoke(
@@ -33,15 +55,48 @@ class AgentModel(Protocol):
     ) -> Any:
         pass  # pragma: no cover
 
+    async def ainvoke(
+        self,
+        input: PromptValue | PromptType | Sequence[BaseMessage | tuple | str | dict],
+        config: Any | None = None,
+        *,
+        stop: List[str] | None = None,
+        **kwargs,
+    ) -> Any:
+        pass  # pragma: no cover
+
+    def stream(
+        self,
+        input: PromptValue | PromptType | Sequence[BaseMessage | tuple | str | dict],
+        config: Any | None = None,
+        *,
+        stop: List[str] | None = None,
+        **kwargs,
+    ) -> Iterator[Any]:
+        pass  # pragma: no cover
+
+    def astream(
+        self,
+        input: PromptValue | PromptType | Sequence[BaseMessage | tuple | str | dict],
+        config: Any | None = None,
+        *,
+        stop: List[str] | None = None,
+        **kwargs,
+    ) -> AsyncIterator[Any]:
+        pass  # pragma: no cover
+
 
 class Agent:
     backstory: str
+    cache: ResponseCache | None
     context: AgentContext
     llm: AgentModel
+    max_continue: int
     max_retry: int
     memory: MutableSequence[MemoryType] | None
     memory_maker: MemoryMaker | None
     name: str
+    streaming: bool
     toolbox: Toolbox | None
 
     def __init__(
@@ -54,13 +109,19 @@ class Agent:
         memory_factory: MemoryFactory | None = make_limited_memory,
         memory_maker: MemoryMaker | None = memory_order_width,
         toolbox: Toolbox | None = None,
+        cache: ResponseCache | None = None,
+        streaming: bool = False,
+        max_continue: int = 0,
     ):
         self.backstory = backstory
+        self.cache = cache
         self.context = context
         self.llm = llm
+        self.max_continue = max_continue
         self.max_retry = max_retry
         self.memory_maker = memory_maker
         self.name = name
+        self.streaming = streaming
         self.toolbox = toolbox
 
         if memory_factory:
@@ -80,112 +141,515 @@ class Agent:
         prompt_library: PromptLibrary = DEFAULT_PROMPTS,
         prompt_template: PromptTemplate = get_random_prompt,
         toolbox: Toolbox | None = None,
+        stream_cutoff: StreamCutoff | None = None,
     ) -> str:
-        from packit.errors import PromptError
+        """
+        Invoke the agent with a prompt and context.
+
+        If a `stream_cutoff` factory is given, the response will be streamed and each chunk fed to a new matcher. As
+        soon as the matcher returns a value, the stream is closed and that value is used as the response.
+        """
 
         with trace(self.name, SpanKind.AGENT) as (report_args, report_output):
             report_args(prompt, context, prompt_template)
 
-            args = {}
-            args.update(self.context)
-            args.update(context)
-            args = {k: format_str_or_json(v) for k, v in args.items()}
+            with profile_phase("format"):
+                messages = self.format_messages(
+                    prompt,
+                    context,
+                    prompt_library=prompt_library,
+                    prompt_template=prompt_template,
+                    toolbox=toolbox,
+                )
+            result = self.invoke_retry(
+                messages, prompt_library=prompt_library, stream_cutoff=stream_cutoff
+            )
+            reply = self.process_reply(messages[-1], result)
 
-            toolbox = toolbox or self.toolbox
-            if toolbox:
-                prompt = prompt + " " + prompt_template("function")
-                if "examples" not in args:
-                    args["example"] = format_str_or_json(
-                        prompt_library.function_example
-                    )
-                if "tools" not in args:
-                    args["tools"] = format_str_or_json(
-                        toolbox.list_definitions(
-                            {
-                                "subject": self.name,
-                                "action": "call",
-                            }
-                        )
-                    )
+            report_output(reply)
+            return reply
+
+    def batch(
+        self,
+        prompts: list[str],
+        contexts: list[AgentContext] | None = None,
+        prompt_library: PromptLibrary = DEFAULT_PROMPTS,
+        prompt_template: PromptTemplate = get_random_prompt,
+        toolbox: Toolbox | None = None,
+        max_concurrency: int | None = None,
+    ) -> list[str]:
+        """
+        Invoke the agent with several prompts at once. All of the prompts see the same memory, the exchanges are
+        added to memory in order once the batch has finished.
+        """
+
+        return batch_agents(
+            [self] * len(prompts),
+            prompts,
+            contexts,
+            prompt_library=prompt_library,
+            prompt_template=prompt_template,
+            toolbox=toolbox,
+            max_concurrency=max_concurrency,
+        )
 
-            try:
-                formatted_prompt = prompt.format(**args)
-                formatted_backstory = self.backstory.format(**args)
-            except Exception as e:
-                logger.exception("Error formatting prompt: %s", prompt)
-                raise PromptError(
-                    f"{type(e).__name__} while formatting prompt: {str(e)}",
-                    self,
+    async def ainvoke(
+        self,
+        prompt: str,
+        context: AgentContext,
+        prompt_library: PromptLibrary = DEFAULT_PROMPTS,
+        prompt_template: PromptTemplate = get_random_prompt,
+        toolbox: Toolbox | None = None,
+        stream_cutoff: StreamCutoff | None = None,
+    ) -> str:
+        """
+        Invoke the agent without blocking the event loop. The LLM must implement `ainvoke`, or `astream` when using
+        a `stream_cutoff`.
+        """
+
+        with trace(self.name, SpanKind.AGENT) as (report_args, report_output):
+            report_args(prompt, context, prompt_template)
+
+            with profile_phase("format"):
+                messages = self.format_messages(
                     prompt,
+                    context,
+                    prompt_library=prompt_library,
+                    prompt_template=prompt_template,
+                    toolbox=toolbox,
                 )
-
-            # log the formatted prompts and construct langchain messages
-            logger.debug("Agent: %s", self.name)
-            logger.debug("System: %s", formatted_backstory)
-            logger.debug("Prompt: %s", formatted_prompt)
-
-            system = SystemMessage(content=formatted_backstory)
-            human = HumanMessage(content=formatted_prompt)
-
-            # add the memory to the messages if there are any memories to add
-            if self.memory:
-                messages = [
-                    system,
-                    *self.memory,
-                    human,
-                ]
-            else:
-                messages = [
-                    system,
-                    human,
-                ]
-
-            result = self.invoke_retry(messages, prompt_library=prompt_library)
-
-            if not self.response_complete(result):
-                logger.warning("LLM did not finish: %s", result)
-
-            reply = result.content
-            reply = reply.replace("<|im_end|>", "").strip()
-            logger.debug("Response: %s", reply)
-
-            # these need explicit not-None checks because memory can be an empty list
-            if self.memory is not None and self.memory_maker is not None:
-                self.memory_maker(self.memory, human)
-                self.memory_maker(self.memory, AIMessage(content=reply))
+            result = await self.ainvoke_retry(
+                messages, prompt_library=prompt_library, stream_cutoff=stream_cutoff
+            )
+            reply = self.process_reply(messages[-1], result)
 
             report_output(reply)
             return reply
 
+    def format_messages(
+        self,
+        prompt: str,
+        context: AgentContext,
+        prompt_library: PromptLibrary = DEFAULT_PROMPTS,
+        prompt_template: PromptTemplate = get_random_prompt,
+        toolbox: Toolbox | None = None,
+    ) -> list[MemoryType]:
+        """
+        Format the backstory and prompt, then combine them with the agent's memory into a list of messages.
+        """
+        from packit.errors import PromptError
+
+        args = {}
+        args.update(self.context)
+        args.update(context)
+
+        toolbox = toolbox or self.toolbox
+        if toolbox:
+            prompt = prompt + " " + prompt_template("function")
+
+        try:
+            prompt_format = compile_template(prompt)
+            backstory_format = compile_template(self.backstory)
+
+            # only build the tool arguments if one of the templates uses them
+            fields = prompt_format.fields | backstory_format.fields
+            if toolbox:
+                if "examples" not in args and "example" in fields:
+                    args["example"] = prompt_library.function_example
+                if "tools" not in args and "tools" in fields:
+                    args["tools"] = toolbox.render_definitions(
+                        {
+                            "subject": self.name,
+                            "action": "call",
+                        }
+                    )
+
+            values: dict[str, Any] = {}
+            formatted_prompt = prompt_format.format(args, values)
+            formatted_backstory = backstory_format.format(args, values)
+        except Exception as e:
+            logger.exception("Error formatting prompt: %s", prompt)
+            raise PromptError(
+                f"{type(e).__name__} while formatting prompt: {str(e)}",
+                self,
+                prompt,
+            )
+
+        # log the formatted prompts and construct langchain messages
+        logger.debug("Agent: %s", self.name)
+        logger.debug("System: %s", formatted_backstory)
+        logger.debug("Prompt: %s", formatted_prompt)
+
+        system = SystemMessage(content=formatted_backstory)
+        human = HumanMessage(content=formatted_prompt)
+
+        # add the memory to the messages if there are any memories to add
+        if self.memory:
+            return [
+                system,
+                *self.memory,
+                human,
+            ]
+        else:
+            return [
+                system,
+                human,
+            ]
+
+    def process_reply(self, human: MemoryType, result: Any) -> str:
+        """
+        Clean up the LLM response and record the exchange in the agent's memory.
+        """
+
+        if not self.response_complete(result):
+            logger.warning("LLM did not finish: %s", result)
+
+        reply = result.content
+        reply = reply.replace("<|im_end|>", "").strip()
+        logger.debug("Response: %s", reply)
+
+        # these need explicit not-None checks because memory can be an empty list
+        if self.memory is not None and self.memory_maker is not None:
+            self.memory_maker(self.memory, human)
+            self.memory_maker(self.memory, AIMessage(content=reply))
+
+        return reply
+
     def invoke_retry(
         self,
         messages: list[MemoryType],
         prompt_library: PromptLibrary = DEFAULT_PROMPTS,
+        stream_cutoff: StreamCutoff | None = None,
     ):
+        """
+        Invoke the LLM, retrying responses that contain a skip token. If none of the responses are valid, the last
+        one is returned. Streamed responses are cancelled as soon as a skip token arrives, so if every attempt was
+        cancelled, the last SkipTokenError will be raised.
+        """
+        from packit.errors import PromptError, SkipTokenError
+
+        # responses that were cut off should not be returned for calls without a cutoff
+        key = self.get_cache_key(messages) if stream_cutoff is None else None
+        cached = self.cache_load(key)
+        if cached is not None:
+            return cached
+
+        result = None
+        skipped = None
+
         retry = 0
         while retry < self.max_retry:
             retry += 1
-            result = self.llm.invoke(messages)
-            if not self.response_complete(result):
-                logger.warning("LLM did not finish: %s", result)
-                # TODO: get the rest of the response
-
-            do_skip = False
-            for skip_token in prompt_library.skip:
-                if skip_token in result.content:
-                    logger.warning(
-                        "found skip token %s, skipping response: %s", skip_token, result
-                    )
-                    do_skip = True
+            llm_kwargs = deadline_kwargs(self.llm)
+            with profile_phase("llm"):
+                if self.streaming or stream_cutoff is not None:
+                    try:
+                        result = self.stream_response(
+                            messages, prompt_library, stream_cutoff=stream_cutoff
+                        )
+                    except SkipTokenError as e:
+                        skipped = e
+                        continue
+                else:
+                    result = self.llm.invoke(messages, **llm_kwargs)
+
+            result = self.continue_response(messages, result)
+            if self.check_response(result, prompt_library):
+                self.cache_save(key, result)
+                return result
+
+        logger.warning("failed to get a valid response from agent")
+        if result is None:
+            # every streamed attempt was cancelled, so there is no response to return
+            raise skipped or PromptError(
+                "Agent did not make any attempts", self, messages[-1]
+            )
+
+        return result
+
+    async def ainvoke_retry(
+        self,
+        messages: list[MemoryType],
+        prompt_library: PromptLibrary = DEFAULT_PROMPTS,
+        stream_cutoff: StreamCutoff | None = None,
+    ):
+        """
+        Async version of `invoke_retry`.
+        """
+        from packit.errors import PromptError, SkipTokenError
+
+        key = self.get_cache_key(messages) if stream_cutoff is None else None
+        cached = self.cache_load(key)
+        if cached is not None:
+            return cached
+
+        result = None
+        skipped = None
 
-            if do_skip:
-                continue
+        retry = 0
+        while retry < self.max_retry:
+            retry += 1
+            llm_kwargs = deadline_kwargs(self.llm)
+            with profile_phase("llm"):
+                if self.streaming or stream_cutoff is not None:
+                    try:
+                        result = await self.astream_response(
+                            messages, prompt_library, stream_cutoff=stream_cutoff
+                        )
+                    except SkipTokenError as e:
+                        skipped = e
+                        continue
+                else:
+                    result = await self.llm.ainvoke(messages, **llm_kwargs)
 
-            return result
+            result = await self.acontinue_response(messages, result)
+            if self.check_response(result, prompt_library):
+                self.cache_save(key, result)
+                return result
 
         logger.warning("failed to get a valid response from agent")
+        if result is None:
+            # every streamed attempt was cancelled, so there is no response to return
+            raise skipped or PromptError(
+                "Agent did not make any attempts", self, messages[-1]
+            )
+
+        return result
+
+    def stream(
+        self,
+        messages: list[MemoryType],
+        prompt_library: PromptLibrary = DEFAULT_PROMPTS,
+    ) -> Iterator[Any]:
+        """
+        Stream chunks from the LLM, checking for skip tokens as they arrive. If a skip token is found, the request
+        will be cancelled and a SkipTokenError raised, and any chunks that have already been yielded should be
+        discarded. The loop deadline is checked between chunks.
+        """
+        from packit.context import get_deadline
+        from packit.errors import SkipTokenError
+
+        deadline = get_deadline()
+        matcher = prompt_library.skip_matcher()
+        chunks = self.llm.stream(messages, **deadline_kwargs(self.llm))
+        try:
+            for chunk in chunks:
+                if deadline is not None:
+                    deadline.check()
+
+                token = matcher.feed(chunk.content)
+                if token is not None:
+                    logger.warning("found skip token %s, cancelling response", token)
+                    raise SkipTokenError(
+                        f"Found skip token {token} in response",
+                        self,
+                        messages[-1],
+                        token,
+                    )
+
+                yield chunk
+        finally:
+            close = getattr(chunks, "close", None)
+            if callable(close):
+                close()
+
+    async def astream(
+        self,
+        messages: list[MemoryType],
+        prompt_library: PromptLibrary = DEFAULT_PROMPTS,
+    ) -> AsyncIterator[Any]:
+        """
+        Async version of `stream`.
+        """
+        from packit.context import get_deadline
+        from packit.errors import SkipTokenError
+
+        deadline = get_deadline()
+        matcher = prompt_library.skip_matcher()
+        chunks = self.llm.astream(messages, **deadline_kwargs(self.llm))
+        try:
+            async for chunk in chunks:
+                if deadline is not None:
+                    deadline.check()
+
+                token = matcher.feed(chunk.content)
+                if token is not None:
+                    logger.warning("found skip token %s, cancelling response", token)
+                    raise SkipTokenError(
+                        f"Found skip token {token} in response",
+                        self,
+                        messages[-1],
+                        token,
+                    )
+
+                yield chunk
+        finally:
+            close = getattr(chunks, "aclose", None)
+            if callable(close):
+                await close()
+
+    def stream_response(
+        self,
+        messages: list[MemoryType],
+        prompt_library: PromptLibrary = DEFAULT_PROMPTS,
+        stream_cutoff: StreamCutoff | None = None,
+    ) -> AIMessage:
+        """
+        Stream a complete response, raising a SkipTokenError if it was cancelled because of a skip token. If the
+        cutoff matcher finds a match, the stream is closed early and the match is returned as a complete response.
+        """
+        matcher = stream_cutoff() if stream_cutoff is not None else None
+        chunks = []
+        stream = self.stream(messages, prompt_library)
+        try:
+            for chunk in stream:
+                if matcher is not None:
+                    match = matcher.feed(chunk.content)
+                    if match is not None:
+                        logger.debug("cutting off response stream after a match")
+                        return AIMessage(content=match, response_metadata=CUTOFF_STOP)
+
+                chunks.append(chunk)
+
+            return merge_chunks(chunks)
+        finally:
+            stream.close()
+
+    async def astream_response(
+        self,
+        messages: list[MemoryType],
+        prompt_library: PromptLibrary = DEFAULT_PROMPTS,
+        stream_cutoff: StreamCutoff | None = None,
+    ) -> AIMessage:
+        """
+        Async version of `stream_response`.
+        """
+
+        matcher = stream_cutoff() if stream_cutoff is not None else None
+        chunks = []
+        stream = self.astream(messages, prompt_library)
+        try:
+            async for chunk in stream:
+                if matcher is not None:
+                    match = matcher.feed(chunk.content)
+                    if match is not None:
+                        logger.debug("cutting off response stream after a match")
+                        return AIMessage(content=match, response_metadata=CUTOFF_STOP)
+
+                chunks.append(chunk)
+
+            return merge_chunks(chunks)
+        finally:
+            await stream.aclose()
+
+    def continue_response(self, messages: list[MemoryType], result: Any) -> Any:
+        """
+        Continue a truncated response, up to `max_continue` rounds.
+        """
+
+        rounds = 0
+        while not self.response_complete(result) and rounds < self.max_continue:
+            rounds += 1
+            logger.debug("continuing truncated response, round %s", rounds)
+            llm_kwargs = deadline_kwargs(self.llm)
+            with profile_phase("llm"):
+                continuation = self.llm.invoke(
+                    [*messages, AIMessage(content=result.content)], **llm_kwargs
+                )
+
+            result = self.merge_continuation(result, continuation)
+
         return result
 
+    async def acontinue_response(self, messages: list[MemoryType], result: Any) -> Any:
+        """
+        Async version of `continue_response`.
+        """
+
+        rounds = 0
+        while not self.response_complete(result) and rounds < self.max_continue:
+            rounds += 1
+            logger.debug("continuing truncated response, round %s", rounds)
+            llm_kwargs = deadline_kwargs(self.llm)
+            with profile_phase("llm"):
+                continuation = await self.llm.ainvoke(
+                    [*messages, AIMessage(content=result.content)], **llm_kwargs
+                )
+
+            result = self.merge_continuation(result, continuation)
+
+        return result
+
+    def merge_continuation(self, partial: Any, continuation: Any) -> AIMessage:
+        """
+        Append a continuation to a partial response, keeping the metadata from the continuation so the finish
+        reason reflects the last round.
+        """
+
+        return AIMessage(
+            content=partial.content + continuation.content,
+            response_metadata=continuation.response_metadata,
+        )
+
+    def get_cache_key(self, messages: list[MemoryType]) -> str | None:
+        """
+        Get the cache key for a list of messages, or None if the response should not be cached.
+        """
+
+        if self.cache is None:
+            return None
+
+        temperature = getattr(self.llm, "temperature", None)
+        if not self.cache.accepts(temperature):
+            return None
+
+        model = getattr(self.llm, "model_name", None) or getattr(
+            self.llm, "model", None
+        )
+        return cache_key(messages, model=model, temperature=temperature)
+
+    def cache_load(self, key: str | None) -> AIMessage | None:
+        if key is None or self.cache is None:
+            return None
+
+        cached = self.cache.get(key)
+        if cached is None:
+            return None
+
+        logger.debug("using cached response for agent %s", self.name)
+        return AIMessage(**cached)
+
+    def cache_save(self, key: str | None, result: Any) -> None:
+        if key is None or self.cache is None:
+            return
+
+        self.cache.set(
+            key,
+            {
+                "content": result.content,
+                "response_metadata": result.response_metadata,
+            },
+        )
+
+    def check_response(
+        self, result: Any, prompt_library: PromptLibrary = DEFAULT_PROMPTS
+    ) -> bool:
+        """
+        Check a response for skip tokens. Returns False if the response should be retried.
+        """
+
+        if not self.response_complete(result):
+            logger.warning("LLM did not finish: %s", result)
+
+        skip_token = prompt_library.skip_matcher().feed(result.content)
+        if skip_token is not None:
+            logger.warning(
+                "found skip token %s, skipping response: %s", skip_token, result
+            )
+            return False
+
+        return True
+
     def response_complete(self, result: Any) -> bool:
         if "done" in result.response_metadata:
             return result.response_metadata["done"]
@@ -196,15 +660,161 @@ class Agent:
         return False
 
 
+def batch_agents(
+    agents: list[Agent],
+    prompts: list[str],
+    contexts: list[AgentContext] | None = None,
+    prompt_library: PromptLibrary = DEFAULT_PROMPTS,
+    prompt_template: PromptTemplate = get_random_prompt,
+    toolbox: Toolbox | None = None,
+    max_concurrency: int | None = None,
+) -> list[str]:
+    """
+    Invoke a list of agents with a list of prompts. The messages for every agent are formatted up front and the
+    requests for each LLM are sent as a single batch. Responses are returned in the same order as the agents.
+    """
+
+    if len(agents) != len(prompts):
+        raise ValueError("The number of agents and prompts must match.")
+
+    contexts = contexts or [{} for _ in prompts]
+    if len(contexts) != len(prompts):
+        raise ValueError("The number of contexts and prompts must match.")
+
+    with trace("batch", SpanKind.AGENT) as (report_args, report_output):
+        report_args(agents, prompts, contexts)
+
+        with profile_phase("format"):
+            messages = [
+                agent.format_messages(
+                    prompt,
+                    context,
+                    prompt_library=prompt_library,
+                    prompt_template=prompt_template,
+                    toolbox=toolbox,
+                )
+                for agent, prompt, context in zip(agents, prompts, contexts)
+            ]
+
+        # check the cache and group the remaining requests by LLM
+        keys = [
+            agent.get_cache_key(message) for agent, message in zip(agents, messages)
+        ]
+        results: list[Any] = [agent.cache_load(key) for agent, key in zip(agents, keys)]
+        cached = [result is not None for result in results]
+
+        groups: dict[int, list[int]] = {}
+        for i, agent in enumerate(agents):
+            if results[i] is None:
+                groups.setdefault(id(agent.llm), []).append(i)
+
+        def invoke_group(indices: list[int]) -> None:
+            llm = agents[indices[0]].llm
+            responses = batch_llm(
+                llm, [messages[i] for i in indices], max_concurrency=max_concurrency
+            )
+            for i, response in zip(indices, responses):
+                results[i] = response
+
+        if len(groups) > 1:
+            with ThreadPoolExecutor(
+                max_workers=max_concurrency or len(groups)
+            ) as executor:
+                # list() to surface any errors from the workers
+                list(executor.map(invoke_group, groups.values()))
+        else:
+            for indices in groups.values():
+                invoke_group(indices)
+
+        replies = []
+        for i, agent in enumerate(agents):
+            result = results[i]
+            if not cached[i]:
+                result = agent.continue_response(messages[i], result)
+                if agent.check_response(result, prompt_library):
+                    agent.cache_save(keys[i], result)
+                else:
+                    # fall back to retrying this request on its own
+                    result = agent.invoke_retry(
+                        messages[i], prompt_library=prompt_library
+                    )
+
+            replies.append(agent.process_reply(messages[i][-1], result))
+
+        report_output(replies)
+        return replies
+
+
+def batch_llm(
+    llm: AgentModel,
+    inputs: list[list[MemoryType]],
+    max_concurrency: int | None = None,
+) -> list[Any]:
+    """
+    Send a batch of requests to an LLM, falling back to sequential calls if the model does not support batching.
+    """
+
+    llm_kwargs = deadline_kwargs(llm)
+    with profile_phase("llm"):
+        batch = getattr(llm, "batch", None)
+        if callable(batch):
+            return batch(
+                inputs, config={"max_concurrency": max_concurrency}, **llm_kwargs
+            )
+
+        return [llm.invoke(messages, **llm_kwargs) for messages in inputs]
+
+
+def deadline_kwargs(llm: Any) -> dict[str, Any]:
+    """
+    Check the deadline for the current loop context and get the keyword arguments for the next LLM request.
+
+    The deadline is always checked before each request and between streamed chunks. The remaining time is only
+    passed as a `timeout` to models that use it as the request timeout, see `accepts_timeout`. Requests to other
+    models, like Ollama, are not interrupted once they have been sent, so a non-streaming request may finish after
+    the deadline has passed.
+    """
+    from packit.context import get_deadline
+
+    deadline = get_deadline()
+    if deadline is None:
+        return {}
+
+    deadline.check()
+    remaining = deadline.remaining()
+    if remaining is None or not accepts_timeout(llm):
+        return {}
+
+    return {"timeout": remaining}
+
+
+def merge_chunks(chunks: list[Any]) -> AIMessage:
+    """
+    Combine streamed chunks into a single message. Metadata from later chunks takes precedence.
+    """
+
+    response_metadata: dict[str, Any] = {}
+    for chunk in chunks:
+        response_metadata.update(getattr(chunk, "response_metadata", None) or {})
+
+    return AIMessage(
+        content="".join(chunk.content for chunk in chunks),
+        response_metadata=response_metadata,
+    )
+
+
 def agent_easy_connect(
     driver: str = "openai",
     model: str = "gpt-4",
     override_model: bool = False,
     temperature: float = 0.0,
+    registry: ClientRegistry | None = client_registry,
 ) -> AgentModel:
     """
     Quick connect to one of a few pre-defined LLMs using common environment variables.
 
+    Clients are shared through the registry, pass `registry=None` to create a new client.
+
     This has very limited features and is mostly for testing and the examples.
     """
     driver = environ.get("PACKIT_DRIVER", driver)
@@ -216,25 +826,34 @@ def agent_easy_connect(
         set_tracer(environ["PACKIT_TRACER"])
 
     if driver == "openai":
-        from langchain_openai import ChatOpenAI
-
-        return ChatOpenAI(model=model, temperature=temperature)
+        base_url = None
+        num_ctx = None
+        num_gpu = None
     elif driver == "ollama":
-        from langchain_community.chat_models import ChatOllama
-
-        ollama_api = environ.get("OLLAMA_API", "http://localhost:11434")
+        base_url = environ.get("OLLAMA_API", DEFAULT_OLLAMA_API)
         num_ctx = environ.get("OLLAMA_NUM_CTX", 2048)
         num_gpu = environ.get("OLLAMA_NUM_GPU", 20)
+    else:
+        raise ValueError(f"Unknown driver: {driver}")
 
-        return ChatOllama(
-            model=model,
+    if registry is None:
+        return create_client(
+            driver,
+            model,
+            base_url=base_url,
             temperature=temperature,
-            base_url=ollama_api,
             num_ctx=num_ctx,
             num_gpu=num_gpu,
         )
-    else:
-        raise ValueError(f"Unknown driver: {driver}")
+
+    return registry.get(
+        driver,
+        model,
+        base_url=base_url,
+        temperature=temperature,
+        num_ctx=num_ctx,
+        num_gpu=num_gpu,
+    )
 
 
 def invoke_agent(
@@ -242,6 +861,7 @@ def invoke_agent(
     prompt: str,
     context: AgentContext,
     toolbox: Toolbox | None = None,
+    stream_cutoff: StreamCutoff | None = None,
     **kwargs,
 ) -> str:
     """
@@ -255,4 +875,39 @@ def invoke_agent(
             **kwargs,
         },
         toolbox=toolbox,
+        stream_cutoff=stream_cutoff,
+    )
+
+
+async def ainvoke_agent(
+    agent: Agent,
+    prompt: str,
+    context: AgentContext,
+    toolbox: Toolbox | None = None,
+    stream_cutoff: StreamCutoff | None = None,
+    **kwargs,
+) -> str:
+    """
+    Invoke an agent asynchronously with a prompt and context.
+    This is the async counterpart to `invoke_agent`.
+    """
+    return await agent.ainvoke(
+        prompt,
+        context={
+            **context,
+            **kwargs,
+        },
+        toolbox=toolbox,
+        stream_cutoff=stream_cutoff,
     )
+
+
+def async_invoker(agent_invoker: Any) -> Any:
+    """
+    Swap the default sync invoker for its async counterpart. Other invokers are returned unchanged and may be either
+    sync or async.
+    """
+    if agent_invoker is invoke_agent:
+        return ainvoke_agent
+
+    return agent_invoker
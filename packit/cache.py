@@ -0,0 +1,214 @@
+from collections import OrderedDict
+from json import dumps, loads
+from logging import getLogger
+from sqlite3 import connect
+from threading import Lock
+from time import monotonic, time
+from typing import Any, Protocol, Sequence
+
+from packit.types import MemoryType
+from packit.utils import hash_dict
+
+logger = getLogger(__name__)
+
+
+class CacheBackend(Protocol):
+    """
+    Storage for cached responses. Values must be JSON-serializable for the on-disk backends.
+    """
+
+    def load(self, key: str) -> Any | None:
+        pass  # pragma: no cover
+
+    def save(self, key: str, value: Any) -> None:
+        pass  # pragma: no cover
+
+
+class ResponseCache(CacheBackend):
+    """
+    Mixin for cache backends that counts hits and misses, and decides which calls should use the cache.
+    """
+
+    hits: int
+    misses: int
+    skip_sampled: bool
+
+    def __init__(self, skip_sampled: bool = True):
+        """
+        If `skip_sampled` is set, calls with a temperature above zero will not be cached.
+        """
+
+        self.hits = 0
+        self.misses = 0
+        self.skip_sampled = skip_sampled
+
+    def accepts(self, temperature: float | None) -> bool:
+        """
+        Check if a call with the given temperature should use the cache.
+        """
+
+        if self.skip_sampled and temperature is not None and temperature > 0:
+            return False
+
+        return True
+
+    def get(self, key: str) -> Any | None:
+        """
+        Get a value from the cache, counting the hit or miss.
+        """
+
+        value = self.load(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Save a value to the cache.
+        """
+
+        self.save(key, value)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class MemoryCache(ResponseCache):
+    """
+    In-memory LRU cache with an optional TTL.
+    """
+
+    entries: OrderedDict[str, tuple[float, Any]]
+    lock: Lock
+    max_size: int
+    ttl: float | None
+
+    def __init__(
+        self,
+        max_size: int = 1000,
+        ttl: float | None = None,
+        skip_sampled: bool = True,
+        timer=monotonic,
+    ):
+        super().__init__(skip_sampled=skip_sampled)
+        self.entries = OrderedDict()
+        self.lock = Lock()
+        self.max_size = max_size
+        self.timer = timer
+        self.ttl = ttl
+
+    def load(self, key: str) -> Any | None:
+        with self.lock:
+            if key not in self.entries:
+                return None
+
+            created, value = self.entries[key]
+            if self.ttl is not None and self.timer() - created > self.ttl:
+                del self.entries[key]
+                return None
+
+            self.entries.move_to_end(key)
+            return value
+
+    def save(self, key: str, value: Any) -> None:
+        with self.lock:
+            self.entries[key] = (self.timer(), value)
+            self.entries.move_to_end(key)
+
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class SQLiteCache(ResponseCache):
+    """
+    On-disk cache backed by SQLite, which can be shared between worker processes.
+    """
+
+    lock: Lock
+    path: str
+    ttl: float | None
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float | None = None,
+        skip_sampled: bool = True,
+        timer=time,
+    ):
+        super().__init__(skip_sampled=skip_sampled)
+        self.lock = Lock()
+        self.path = path
+        self.timer = timer
+        self.ttl = ttl
+
+        self.connection = connect(path, check_same_thread=False, timeout=30)
+        with self.lock, self.connection:
+            if path != ":memory:":
+                self.connection.execute("PRAGMA journal_mode=WAL")
+
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, created REAL, value TEXT)"
+            )
+
+    def load(self, key: str) -> Any | None:
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT created, value FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            created, value = row
+            if self.ttl is not None and self.timer() - created > self.ttl:
+                with self.connection:
+                    self.connection.execute(
+                        "DELETE FROM responses WHERE key = ?", (key,)
+                    )
+                return None
+
+            return loads(value)
+
+    def save(self, key: str, value: Any) -> None:
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses (key, created, value) VALUES (?, ?, ?)",
+                (key, self.timer(), dumps(value, default=str)),
+            )
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+def cache_key(
+    messages: Sequence[MemoryType],
+    model: str | None = None,
+    temperature: float | None = None,
+) -> str:
+    """
+    Hash a list of messages along with the model and temperature.
+    """
+
+    return hash_dict(
+        {
+            "messages": [
+                (
+                    {"type": "str", "content": message}
+                    if isinstance(message, str)
+                    else {"type": message.type, "content": message.content}
+                )
+                for message in messages
+            ],
+            "model": model,
+            "temperature": temperature,
+        }
+    )
@@ -0,0 +1,385 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from itertools import count
+from json import dumps, loads
+from logging import getLogger
+from os import makedirs, path, remove, replace
+from sqlite3 import connect
+from tempfile import NamedTemporaryFile
+from threading import Lock
+from time import time
+from typing import Any, Iterator, MutableSequence, Protocol
+
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+
+logger = getLogger(__name__)
+
+Checkpoint = dict[str, Any]
+
+
+class CheckpointStore(Protocol):
+    """
+    Storage for checkpoints. Checkpoints are grouped by run ID and must be JSON-serializable.
+    """
+
+    def load(self, run_id: str, key: str) -> Checkpoint | None:
+        pass  # pragma: no cover
+
+    def save(self, run_id: str, key: str, value: Checkpoint) -> None:
+        pass  # pragma: no cover
+
+    def clear(self, run_id: str) -> None:
+        """
+        Remove every checkpoint for a run, once it has finished.
+        """
+
+        pass  # pragma: no cover
+
+
+class MemoryCheckpointStore(CheckpointStore):
+    """
+    In-memory checkpoint store, mostly for testing. Checkpoints are copied through JSON like the on-disk stores.
+    """
+
+    entries: dict[str, dict[str, str]]
+    lock: Lock
+
+    def __init__(self):
+        self.entries = {}
+        self.lock = Lock()
+
+    def load(self, run_id: str, key: str) -> Checkpoint | None:
+        with self.lock:
+            value = self.entries.get(run_id, {}).get(key)
+
+        if value is None:
+            return None
+
+        return loads(value)
+
+    def save(self, run_id: str, key: str, value: Checkpoint) -> None:
+        with self.lock:
+            self.entries.setdefault(run_id, {})[key] = dumps(value, default=str)
+
+    def clear(self, run_id: str) -> None:
+        with self.lock:
+            self.entries.pop(run_id, None)
+
+
+class FileCheckpointStore(CheckpointStore):
+    """
+    Checkpoint store with one JSON file per run. The file is replaced atomically on each save, so a crash while
+    saving will leave the previous checkpoint intact.
+    """
+
+    directory: str
+    lock: Lock
+    runs: dict[str, dict[str, Checkpoint]]
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.lock = Lock()
+        self.runs = {}
+
+        makedirs(directory, exist_ok=True)
+
+    def run_path(self, run_id: str) -> str:
+        if path.basename(run_id) != run_id or run_id in ("", ".", ".."):
+            raise ValueError(f"Invalid run ID: {run_id}")
+
+        return path.join(self.directory, f"{run_id}.json")
+
+    def load_run(self, run_id: str) -> dict[str, Checkpoint]:
+        """
+        Load all of the checkpoints for a run. The caller must hold the lock.
+        """
+
+        if run_id not in self.runs:
+            run_path = self.run_path(run_id)
+            if path.exists(run_path):
+                with open(run_path, "r") as f:
+                    self.runs[run_id] = loads(f.read())
+            else:
+                self.runs[run_id] = {}
+
+        return self.runs[run_id]
+
+    def load(self, run_id: str, key: str) -> Checkpoint | None:
+        with self.lock:
+            return self.load_run(run_id).get(key)
+
+    def save(self, run_id: str, key: str, value: Checkpoint) -> None:
+        with self.lock:
+            run = self.load_run(run_id)
+            run[key] = loads(dumps(value, default=str))
+
+            with NamedTemporaryFile(
+                "w", dir=self.directory, suffix=".tmp", delete=False
+            ) as f:
+                f.write(dumps(run))
+
+            replace(f.name, self.run_path(run_id))
+
+    def clear(self, run_id: str) -> None:
+        with self.lock:
+            self.runs.pop(run_id, None)
+            run_path = self.run_path(run_id)
+            if path.exists(run_path):
+                remove(run_path)
+
+
+class SQLiteCheckpointStore(CheckpointStore):
+    """
+    Checkpoint store backed by SQLite, which can be shared between worker processes.
+    """
+
+    lock: Lock
+    path: str
+
+    def __init__(self, path: str):
+        self.lock = Lock()
+        self.path = path
+
+        self.connection = connect(path, check_same_thread=False, timeout=30)
+        with self.lock, self.connection:
+            if path != ":memory:":
+                self.connection.execute("PRAGMA journal_mode=WAL")
+
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS checkpoints "
+                "(run_id TEXT, key TEXT, updated REAL, value TEXT, PRIMARY KEY (run_id, key))"
+            )
+
+    def load(self, run_id: str, key: str) -> Checkpoint | None:
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT value FROM checkpoints WHERE run_id = ? AND key = ?",
+                (run_id, key),
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        return loads(row[0])
+
+    def save(self, run_id: str, key: str, value: Checkpoint) -> None:
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO checkpoints (run_id, key, updated, value) VALUES (?, ?, ?, ?)",
+                (run_id, key, time(), dumps(value, default=str)),
+            )
+
+    def clear(self, run_id: str) -> None:
+        with self.lock, self.connection:
+            self.connection.execute(
+                "DELETE FROM checkpoints WHERE run_id = ?", (run_id,)
+            )
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+# region serialization
+
+
+def dump_memory(memory: MutableSequence[Any] | None) -> list[dict[str, Any]] | None:
+    """
+    Convert a memory or history sequence into JSON-serializable items. Messages are converted with langchain's
+    `message_to_dict`, other values are kept as they are.
+    """
+
+    if memory is None:
+        return None
+
+    return [
+        (
+            {"message": message_to_dict(item)}
+            if isinstance(item, BaseMessage)
+            else {"value": item}
+        )
+        for item in memory
+    ]
+
+
+def restore_memory(
+    memory: MutableSequence[Any] | None, items: list[dict[str, Any]] | None
+) -> None:
+    """
+    Replace the contents of a memory or history sequence with items from `dump_memory`, in place, so the memory keeps
+    its own limits.
+    """
+
+    if memory is None or items is None:
+        return
+
+    memory.clear()
+    for item in items:
+        if "message" in item:
+            memory.append(messages_from_dict([item["message"]])[0])
+        else:
+            memory.append(item["value"])
+
+
+# endregion
+# region scopes
+
+
+class CheckpointScope:
+    """
+    A level in the checkpoint key hierarchy. Loops that start within a scope are numbered in the order they start,
+    so the same sequence of calls produces the same keys when the run is restarted.
+    """
+
+    __slots__ = ("store", "run_id", "key", "counter")
+
+    def __init__(self, store: CheckpointStore, run_id: str, key: str):
+        self.store = store
+        self.run_id = run_id
+        self.key = key
+        self.counter = count()
+
+    def child_key(self, name: str) -> str:
+        index = next(self.counter)
+        if self.key:
+            return f"{self.key}/{name}.{index}"
+
+        return f"{name}.{index}"
+
+
+checkpoint_scope: ContextVar[CheckpointScope | None] = ContextVar(
+    "packit_checkpoint_scope", default=None
+)
+
+
+@contextmanager
+def use_checkpoint_scope(scope: CheckpointScope) -> Iterator[CheckpointScope]:
+    token = checkpoint_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        checkpoint_scope.reset(token)
+
+
+class LoopCheckpoint(CheckpointScope):
+    """
+    Checkpoint for a single loop call. Loops that are started within one of its steps are keyed by that step, so
+    they keep the same keys when earlier steps are skipped during a resume.
+    """
+
+    __slots__ = ()
+
+    def load(self) -> Checkpoint | None:
+        checkpoint = self.store.load(self.run_id, self.key)
+        if checkpoint is not None:
+            logger.debug("loaded checkpoint %s for run %s", self.key, self.run_id)
+
+        return checkpoint
+
+    def save(
+        self,
+        step: int,
+        result: Any,
+        done: bool = False,
+        history: MutableSequence[Any] | None = None,
+        agents: list | None = None,
+    ) -> None:
+        self.store.save(
+            self.run_id,
+            self.key,
+            {
+                "step": step,
+                "result": result,
+                "done": done,
+                "history": dump_memory(history),
+                "memory": {
+                    agent.name: dump_memory(agent.memory)
+                    for agent in agents or []
+                    if agent.memory is not None
+                },
+            },
+        )
+
+    def restore(
+        self,
+        checkpoint: Checkpoint,
+        history: MutableSequence[Any] | None = None,
+        agents: list | None = None,
+    ) -> None:
+        """
+        Restore the history and agent memory from a checkpoint.
+        """
+
+        restore_memory(history, checkpoint.get("history"))
+
+        memory = checkpoint.get("memory") or {}
+        for agent in agents or []:
+            restore_memory(agent.memory, memory.get(agent.name))
+
+    def step(self, step: int):
+        return use_checkpoint_scope(
+            CheckpointScope(self.store, self.run_id, f"{self.key}/{step}")
+        )
+
+    def scope(self):
+        return use_checkpoint_scope(self)
+
+
+class NullCheckpoint:
+    """
+    Placeholder for loops that run without checkpointing.
+    """
+
+    __slots__ = ()
+
+    def load(self) -> Checkpoint | None:
+        return None
+
+    def save(self, *args, **kwargs) -> None:
+        pass
+
+    def restore(self, *args, **kwargs) -> None:
+        pass
+
+    def step(self, step: int) -> "NullCheckpoint":
+        return self
+
+    def scope(self) -> "NullCheckpoint":
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        pass
+
+
+NULL_CHECKPOINT = NullCheckpoint()
+
+
+def loop_checkpoint(name: str) -> LoopCheckpoint | NullCheckpoint:
+    """
+    Get the checkpoint for a loop that is starting now, if checkpointing is enabled.
+    """
+
+    parent = checkpoint_scope.get()
+    if parent is None:
+        return NULL_CHECKPOINT
+
+    return LoopCheckpoint(parent.store, parent.run_id, parent.child_key(name))
+
+
+@contextmanager
+def checkpointing(store: CheckpointStore, run_id: str) -> Iterator[CheckpointStore]:
+    """
+    Save checkpoints for the loops started within this context. Running the same loops again with the same run ID
+    will resume from the last completed step of each loop, without invoking the agents for the steps that finished.
+
+    Loops must be started in the same order for the keys to match. Async loops are not checkpointed, and loops
+    nested within a parallel map may start in a different order on each run, so they should not be checkpointed.
+    """
+
+    with use_checkpoint_scope(CheckpointScope(store, run_id, "")):
+        yield store
+
+
+# endregion
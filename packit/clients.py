@@ -0,0 +1,228 @@
+from asyncio import get_running_loop, run
+from logging import getLogger
+from threading import Lock
+from typing import Any, Tuple
+
+logger = getLogger(__name__)
+
+ClientKey = Tuple[str, str, str | None, float, int | None, int | None]
+
+DEFAULT_OLLAMA_API = "http://localhost:11434"
+
+# models whose invoke and stream methods turn a `timeout` keyword argument into a request timeout
+TIMEOUT_MODELS = {"AzureChatOpenAI", "ChatOpenAI"}
+
+
+def accepts_timeout(llm: Any) -> bool:
+    """
+    Check whether a model will use a `timeout` keyword argument as the timeout for its request. Other models may
+    send unknown keyword arguments to the server, like the Ollama client does with its options. Wrappers and custom
+    models can set an `accepts_timeout` attribute to opt in or out.
+    """
+
+    explicit = getattr(llm, "accepts_timeout", None)
+    if explicit is not None:
+        return bool(explicit)
+
+    return any(cls.__name__ in TIMEOUT_MODELS for cls in type(llm).__mro__)
+
+
+def create_client(
+    driver: str,
+    model: str,
+    base_url: str | None = None,
+    temperature: float = 0.0,
+    num_ctx: int | None = None,
+    num_gpu: int | None = None,
+    http_client: Any | None = None,
+    http_async_client: Any | None = None,
+) -> Any:
+    """
+    Create a new LLM client for one of the supported drivers.
+    """
+
+    if driver == "openai":
+        from langchain_openai import ChatOpenAI
+
+        openai_args: dict[str, Any] = {}
+        if base_url is not None:
+            openai_args["base_url"] = base_url
+        if http_client is not None:
+            openai_args["http_client"] = http_client
+        if http_async_client is not None:
+            openai_args["http_async_client"] = http_async_client
+
+        return ChatOpenAI(model=model, temperature=temperature, **openai_args)
+    elif driver == "ollama":
+        from langchain_community.chat_models import ChatOllama
+
+        return ChatOllama(
+            model=model,
+            temperature=temperature,
+            base_url=base_url or DEFAULT_OLLAMA_API,
+            num_ctx=num_ctx,
+            num_gpu=num_gpu,
+        )
+    else:
+        raise ValueError(f"Unknown driver: {driver}")
+
+
+class ClientRegistry:
+    """
+    Process-wide registry of LLM clients, so that agents using the same model share a client and its connections.
+
+    OpenAI clients for the same base URL also share a pooled HTTP client, sized by `max_connections` and
+    `max_keepalive_connections`. The Ollama client in langchain_community does not accept an HTTP client, so those
+    are shared per key but cannot be pooled.
+    """
+
+    clients: dict[ClientKey, Any]
+    http_clients: dict[str | None, Tuple[Any, Any]]
+    lock: Lock
+    max_connections: int
+    max_keepalive_connections: int
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+    ):
+        self.clients = {}
+        self.http_clients = {}
+        self.keepalive_expiry = keepalive_expiry
+        self.lock = Lock()
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+
+    def get(
+        self,
+        driver: str,
+        model: str,
+        base_url: str | None = None,
+        temperature: float = 0.0,
+        num_ctx: int | None = None,
+        num_gpu: int | None = None,
+    ) -> Any:
+        """
+        Get a shared client, creating it on the first call.
+        """
+
+        key: ClientKey = (driver, model, base_url, temperature, num_ctx, num_gpu)
+
+        with self.lock:
+            if key in self.clients:
+                return self.clients[key]
+
+            if driver == "openai":
+                http_client, http_async_client = self.get_http_clients(base_url)
+            else:
+                http_client, http_async_client = None, None
+
+            client = create_client(
+                driver,
+                model,
+                base_url=base_url,
+                temperature=temperature,
+                num_ctx=num_ctx,
+                num_gpu=num_gpu,
+                http_client=http_client,
+                http_async_client=http_async_client,
+            )
+
+            logger.debug("created shared client for %s", key)
+            self.clients[key] = client
+            return client
+
+    def get_http_clients(self, base_url: str | None) -> Tuple[Any, Any]:
+        """
+        Get the pooled HTTP clients for a base URL. The caller must hold the lock.
+        """
+
+        if base_url not in self.http_clients:
+            from httpx import AsyncClient, Client, Limits
+
+            limits = Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry,
+            )
+            self.http_clients[base_url] = (
+                Client(limits=limits),
+                AsyncClient(limits=limits),
+            )
+
+        return self.http_clients[base_url]
+
+    def warm_up(self) -> None:
+        """
+        Open connections and load models for every registered client. Errors are logged rather than raised.
+        """
+
+        with self.lock:
+            clients = list(self.clients.items())
+
+        for key, client in clients:
+            driver, model, base_url, _temperature, _num_ctx, _num_gpu = key
+            try:
+                if driver == "ollama":
+                    # an empty generate request loads the model without producing any tokens
+                    from requests import post
+
+                    post(
+                        f"{base_url or DEFAULT_OLLAMA_API}/api/generate",
+                        json={"model": model},
+                    ).raise_for_status()
+                elif driver == "openai":
+                    root_client = getattr(client.client, "_client", None)
+                    if root_client is not None:
+                        root_client.models.list()
+            except Exception:
+                logger.warning("error warming up client %s", key, exc_info=True)
+
+    def close(self) -> None:
+        """
+        Close the pooled HTTP clients and forget every registered client.
+        """
+
+        with self.lock:
+            http_clients = list(self.http_clients.values())
+            self.clients.clear()
+            self.http_clients.clear()
+
+        for http_client, http_async_client in http_clients:
+            http_client.close()
+
+            try:
+                get_running_loop()
+                logger.warning(
+                    "cannot close async HTTP client from a running event loop, use aclose instead"
+                )
+            except RuntimeError:
+                run(http_async_client.aclose())
+
+    async def aclose(self) -> None:
+        """
+        Close the pooled HTTP clients from within an event loop.
+        """
+
+        with self.lock:
+            http_clients = list(self.http_clients.values())
+            self.clients.clear()
+            self.http_clients.clear()
+
+        for http_client, http_async_client in http_clients:
+            http_client.close()
+            await http_async_client.aclose()
+
+    def __len__(self) -> int:
+        return len(self.clients)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+client_registry = ClientRegistry()
@@ -1,11 +1,57 @@
+from collections import Counter
+from functools import lru_cache
+from inspect import Parameter, signature
 from time import monotonic
-from typing import Any, Callable, Tuple
+from typing import Any, Callable, Sequence, Tuple
 
 from packit.types import StopCondition
 
 DEFAULT_MAX = 10
 
 
+def signature_accepts_results(condition: Callable) -> bool:
+    try:
+        parameters = signature(condition).parameters.values()
+    except (TypeError, ValueError):
+        return False
+
+    return any(
+        parameter.name == "results" or parameter.kind == Parameter.VAR_KEYWORD
+        for parameter in parameters
+    )
+
+
+@lru_cache(maxsize=256)
+def cached_accepts_results(condition: Callable) -> bool:
+    return signature_accepts_results(condition)
+
+
+def accepts_results(condition: Callable) -> bool:
+    """
+    Check whether a stop condition takes the list of results so far, either by name or through `**kwargs`. The
+    answer is cached for each condition, since the loops check their condition on every iteration.
+    """
+
+    try:
+        return cached_accepts_results(condition)
+    except TypeError:
+        # callables that cannot be hashed are inspected every time
+        return signature_accepts_results(condition)
+
+
+def check_condition(
+    condition: Callable, *args, results: Sequence[Any] | None = None, **kwargs
+) -> bool:
+    """
+    Call a stop condition, passing the results so far only if the condition accepts them.
+    """
+
+    if results is not None and accepts_results(condition):
+        return condition(*args, results=results, **kwargs)
+
+    return condition(*args, **kwargs)
+
+
 def condition_keyword(keyword: str, current: str) -> bool:
     """
     Stop when a keyword is found in the current prompt.
@@ -63,13 +109,80 @@ def condition_threshold_mean(max: float = DEFAULT_MAX, *currents: int) -> bool:
     return sum(currents) / len(currents) > max
 
 
+def condition_first_k(
+    k: int,
+    predicate: Callable[[Any], bool] | None = None,
+    max: int = DEFAULT_MAX,
+) -> StopCondition:
+    """
+    Stop once `k` results match the predicate, or when the current threshold is greater than the max threshold.
+
+    By default, any result that is not None matches, which counts the results that parsed when the result parser
+    returns None on failure.
+    """
+
+    def _condition_first_k(
+        max: int = max, current: int = 0, results: Sequence[Any] = ()
+    ) -> bool:
+        matches = predicate or (lambda result: result is not None)
+        return current > max or sum(1 for r in results if matches(r)) >= k
+
+    return _condition_first_k
+
+
+def condition_quorum(
+    count: int,
+    key: Callable[[Any], Any] | None = None,
+    max: int = DEFAULT_MAX,
+) -> StopCondition:
+    """
+    Stop once `count` of the results are the same answer, or when the current threshold is greater than the max
+    threshold. The key is used to normalize each result before they are compared, and must return a hashable value.
+    """
+
+    def _condition_quorum(
+        max: int = max, current: int = 0, results: Sequence[Any] = ()
+    ) -> bool:
+        if current > max:
+            return True
+
+        answers = Counter(key(r) if key else r for r in results if r is not None)
+        return any(votes >= count for votes in answers.values())
+
+    return _condition_quorum
+
+
+def condition_score(
+    threshold: float,
+    scorer: Callable[[Any], float] | None = None,
+    max: int = DEFAULT_MAX,
+) -> StopCondition:
+    """
+    Stop once any result scores above the threshold, or when the current threshold is greater than the max threshold.
+    Without a scorer, the results must be numbers.
+    """
+
+    def _condition_score(
+        max: int = max, current: int = 0, results: Sequence[Any] = ()
+    ) -> bool:
+        if current > max:
+            return True
+
+        scores = (scorer(r) if scorer else r for r in results if r is not None)
+        return any(score > threshold for score in scores)
+
+    return _condition_score
+
+
 def condition_and(*conditions: StopCondition) -> StopCondition:
     """
     Stop when all conditions are met.
     """
 
     def _condition_and(*args, **kwargs) -> bool:
-        return all(condition(*args, **kwargs) for condition in conditions)
+        return all(
+            check_condition(condition, *args, **kwargs) for condition in conditions
+        )
 
     return _condition_and
 
@@ -80,7 +193,9 @@ def condition_or(*conditions: StopCondition) -> StopCondition:
     """
 
     def _condition_or(*args, **kwargs) -> bool:
-        return any(condition(*args, **kwargs) for condition in conditions)
+        return any(
+            check_condition(condition, *args, **kwargs) for condition in conditions
+        )
 
     return _condition_or
 
@@ -91,7 +206,7 @@ def condition_not(condition: StopCondition) -> StopCondition:
     """
 
     def _condition_not(*args, **kwargs) -> bool:
-        return not condition(*args, **kwargs)
+        return not check_condition(condition, *args, **kwargs)
 
     return _condition_not
 
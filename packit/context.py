@@ -1,11 +1,16 @@
+from concurrent.futures import Executor, Future
 from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
 from logging import getLogger
 from random import randint
-from threading import local
-from typing import Optional, TypeVar, Union
+from threading import Event
+from time import monotonic
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple, TypeVar, Union
 
 from packit.agent import invoke_agent
 from packit.conditions import condition_threshold
+from packit.errors import DeadlineError
+from packit.profiling import profile_phase
 from packit.selectors import select_loop
 from packit.toolbox import Toolbox
 from packit.types import (
@@ -21,12 +26,8 @@ from packit.types import (
     ToolFilter,
 )
 
-LOOP_CONTEXT_ATTR = "loop_context"
-
 logger = getLogger(__name__)
 
-thread_context = local()
-
 
 class InheritedValue:
     pass
@@ -42,11 +43,138 @@ RequiredInherited = Union[InheritedType, InheritedValue]
 OptionalInherited = Union[InheritedType, InheritedValue, None]
 
 
+class Deadline:
+    """
+    Cancellation token with an optional time limit, measured with a monotonic clock. A deadline that is linked to
+    parent deadlines expires when any of them does, so linking can only make it tighter.
+    """
+
+    __slots__ = ("expires", "event", "parents", "timer")
+
+    expires: float | None
+    event: Event
+    parents: Tuple["Deadline", ...]
+
+    def __init__(
+        self,
+        timeout: float | None = None,
+        parents: Tuple["Deadline", ...] = (),
+        timer: Callable[[], float] = monotonic,
+    ):
+        self.event = Event()
+        self.expires = timer() + timeout if timeout is not None else None
+        self.parents = parents
+        self.timer = timer
+
+    def link(self, parent: Optional["Deadline"]) -> "Deadline":
+        """
+        Get a deadline that expires when either this one or the parent does. Cancelling the linked deadline does
+        not cancel the parent.
+        """
+
+        if parent is None or parent is self:
+            return self
+
+        return Deadline(parents=(self, parent), timer=self.timer)
+
+    def cancel(self) -> None:
+        self.event.set()
+
+    def cancelled(self) -> bool:
+        return self.event.is_set() or any(parent.cancelled() for parent in self.parents)
+
+    def remaining(self) -> float | None:
+        """
+        Get the number of seconds left, or None if there is no time limit.
+        """
+
+        limits = [parent.remaining() for parent in self.parents]
+        if self.expires is not None:
+            limits.append(self.expires - self.timer())
+
+        limits = [limit for limit in limits if limit is not None]
+        if len(limits) == 0:
+            return None
+
+        return max(0.0, min(limits))
+
+    def expired(self) -> bool:
+        return self.cancelled() or self.remaining() == 0.0
+
+    def check(self) -> None:
+        """
+        Raise a DeadlineError if the deadline has expired or been cancelled.
+        """
+
+        if self.cancelled():
+            raise DeadlineError("Loop was cancelled")
+
+        if self.remaining() == 0.0:
+            raise DeadlineError("Loop deadline exceeded")
+
+
+LOOP_CONTEXT_FIELDS = (
+    "abac_context",
+    "agent_invoker",
+    "agent_selector",
+    "deadline",
+    "memory_factory",
+    "memory_maker",
+    "prompt_filter",
+    "prompt_template",
+    "result_parser",
+    "stop_condition",
+    "toolbox",
+    "tool_filter",
+)
+
+LOOP_CONTEXT_DEFAULTS: dict[str, Any] = {
+    "agent_invoker": invoke_agent,
+    "agent_selector": select_loop,
+    "stop_condition": condition_threshold,
+}
+
+
+def inherited_field(name: str) -> property:
+    """
+    Create a property that reads a field from the nearest context in the parent chain that has set it.
+    """
+
+    slot = f"_{name}"
+    default = LOOP_CONTEXT_DEFAULTS.get(name)
+
+    def get_field(self: "LoopContext") -> Any:
+        node: LoopContext | None = self
+        while node is not None:
+            value = getattr(node, slot)
+            if value is not INHERIT:
+                return value
+
+            node = node.parent
+
+        return default
+
+    return property(get_field)
+
+
 class LoopContext:
+    """
+    Immutable loop context. Fields that are not set on this context are resolved through the parent chain, so pushing
+    a new context does not copy the parent's fields.
+    """
+
+    __slots__ = (
+        "depth",
+        "parent",
+        "tag",
+        *(f"_{name}" for name in LOOP_CONTEXT_FIELDS),
+    )
+
     # context
     abac_context: ABACAttributes | None
     agent_invoker: AgentInvoker
     agent_selector: AgentSelector
+    deadline: Deadline | None
     memory_factory: MemoryFactory | None
     memory_maker: MemoryMaker | None
     prompt_filter: PromptFilter | None
@@ -58,38 +186,68 @@ class LoopContext:
 
     # other
     depth: int
+    parent: Optional["LoopContext"]
     tag: int
 
     def __init__(
         self,
-        abac_context: ABACAttributes | None = None,
-        agent_invoker: AgentInvoker = invoke_agent,
-        agent_selector: AgentSelector = select_loop,
-        memory_factory: MemoryFactory | None = None,
-        memory_maker: MemoryMaker | None = None,
-        prompt_filter: PromptFilter | None = None,
-        prompt_template: PromptTemplate | None = None,
-        result_parser: ResultParser | None = None,
-        stop_condition: StopCondition = condition_threshold,
-        toolbox: Toolbox | None = None,
-        tool_filter: ToolFilter | None = None,
+        abac_context: OptionalInherited[ABACAttributes] = INHERIT,
+        agent_invoker: RequiredInherited[AgentInvoker] = INHERIT,
+        agent_selector: RequiredInherited[AgentSelector] = INHERIT,
+        deadline: OptionalInherited[Deadline] = INHERIT,
+        memory_factory: OptionalInherited[MemoryFactory] = INHERIT,
+        memory_maker: OptionalInherited[MemoryMaker] = INHERIT,
+        prompt_filter: OptionalInherited[PromptFilter] = INHERIT,
+        prompt_template: OptionalInherited[PromptTemplate] = INHERIT,
+        result_parser: OptionalInherited[ResultParser] = INHERIT,
+        stop_condition: RequiredInherited[StopCondition] = INHERIT,
+        toolbox: OptionalInherited[Toolbox] = INHERIT,
+        tool_filter: OptionalInherited[ToolFilter] = INHERIT,
         context_depth: int = 0,
+        parent: Optional["LoopContext"] = None,
     ):
-        self.abac_context = abac_context
-        self.agent_invoker = agent_invoker
-        self.agent_selector = agent_selector
-        self.memory_factory = memory_factory
-        self.memory_maker = memory_maker
-        self.prompt_filter = prompt_filter
-        self.prompt_template = prompt_template
-        self.result_parser = result_parser
-        self.stop_condition = stop_condition
-        self.toolbox = toolbox
-        self.tool_filter = tool_filter
+        init = object.__setattr__
+        init(self, "_abac_context", abac_context)
+        init(self, "_agent_invoker", agent_invoker)
+        init(self, "_agent_selector", agent_selector)
+        init(self, "_deadline", deadline)
+        init(self, "_memory_factory", memory_factory)
+        init(self, "_memory_maker", memory_maker)
+        init(self, "_prompt_filter", prompt_filter)
+        init(self, "_prompt_template", prompt_template)
+        init(self, "_result_parser", result_parser)
+        init(self, "_stop_condition", stop_condition)
+        init(self, "_toolbox", toolbox)
+        init(self, "_tool_filter", tool_filter)
 
         # other
-        self.depth = context_depth
-        self.tag = randint(0, 1000000)
+        init(self, "depth", context_depth)
+        init(self, "parent", parent)
+        init(self, "tag", randint(0, 1000000))
+
+    def check_deadline(self) -> None:
+        """
+        Raise a DeadlineError if the deadline for this context has expired or been cancelled.
+        """
+
+        deadline = self.deadline
+        if deadline is not None:
+            deadline.check()
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("LoopContext is immutable, push a new context instead")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("LoopContext is immutable, push a new context instead")
+
+
+for field_name in LOOP_CONTEXT_FIELDS:
+    setattr(LoopContext, field_name, inherited_field(field_name))
+
+
+loop_stack: ContextVar[Tuple[LoopContext, ...]] = ContextVar(
+    "packit_loop_stack", default=()
+)
 
 
 def inherit_required_value(
@@ -111,17 +269,13 @@ def inherit_optional_value(
 
 
 def count_loop_contexts() -> int:
-    if hasattr(thread_context, LOOP_CONTEXT_ATTR):
-        return len(getattr(thread_context, LOOP_CONTEXT_ATTR))
-
-    return 0
+    return len(loop_stack.get())
 
 
 def get_loop_context() -> LoopContext | None:
-    if hasattr(thread_context, LOOP_CONTEXT_ATTR):
-        contexts = getattr(thread_context, LOOP_CONTEXT_ATTR)
-        if len(contexts) > 0:
-            return contexts[-1]
+    contexts = loop_stack.get()
+    if len(contexts) > 0:
+        return contexts[-1]
 
     return None
 
@@ -131,6 +285,7 @@ def inherit_loop_context(
     abac_context: OptionalInherited[ABACAttributes] = INHERIT,
     agent_invoker: RequiredInherited[AgentInvoker] = INHERIT,
     agent_selector: RequiredInherited[AgentSelector] = INHERIT,
+    deadline: OptionalInherited[Deadline] = INHERIT,
     memory_factory: OptionalInherited[MemoryFactory] = INHERIT,
     memory_maker: OptionalInherited[MemoryMaker] = INHERIT,
     prompt_filter: OptionalInherited[PromptFilter] = INHERIT,
@@ -141,37 +296,27 @@ def inherit_loop_context(
     tool_filter: OptionalInherited[ToolFilter] = INHERIT,
 ) -> LoopContext:
     if parent_context:
+        # a deadline can be tightened but not removed or loosened
+        if isinstance(deadline, Deadline):
+            deadline = deadline.link(parent_context.deadline)
+        else:
+            deadline = INHERIT
+
         return LoopContext(
-            abac_context=inherit_optional_value(
-                abac_context, parent_context.abac_context
-            ),
-            agent_invoker=inherit_optional_value(
-                agent_invoker, parent_context.agent_invoker
-            ),
-            agent_selector=inherit_optional_value(
-                agent_selector, parent_context.agent_selector
-            ),
-            memory_factory=inherit_optional_value(
-                memory_factory, parent_context.memory_factory
-            ),
-            memory_maker=inherit_optional_value(
-                memory_maker, parent_context.memory_maker
-            ),
-            prompt_filter=inherit_optional_value(
-                prompt_filter, parent_context.prompt_filter
-            ),
-            prompt_template=inherit_optional_value(
-                prompt_template, parent_context.prompt_template
-            ),
-            result_parser=inherit_optional_value(
-                result_parser, parent_context.result_parser
-            ),
-            stop_condition=inherit_optional_value(
-                stop_condition, parent_context.stop_condition
-            ),
-            toolbox=inherit_optional_value(toolbox, parent_context.toolbox),
-            tool_filter=inherit_optional_value(tool_filter, parent_context.tool_filter),
+            abac_context=abac_context,
+            agent_invoker=agent_invoker,
+            agent_selector=agent_selector,
+            deadline=deadline,
+            memory_factory=memory_factory,
+            memory_maker=memory_maker,
+            prompt_filter=prompt_filter,
+            prompt_template=prompt_template,
+            result_parser=result_parser,
+            stop_condition=stop_condition,
+            toolbox=toolbox,
+            tool_filter=tool_filter,
             context_depth=parent_context.depth + 1,
+            parent=parent_context,
         )
     else:
         # TODO: replace these with inherit_required, but that will need to throw?
@@ -191,6 +336,7 @@ def inherit_loop_context(
             abac_context=inherit_optional_value(abac_context, None),
             agent_invoker=agent_invoker,
             agent_selector=agent_selector,
+            deadline=inherit_optional_value(deadline, None),
             memory_factory=inherit_optional_value(memory_factory, None),
             memory_maker=inherit_optional_value(memory_maker, None),
             prompt_filter=inherit_optional_value(prompt_filter, None),
@@ -206,6 +352,7 @@ def push_loop_context(
     abac_context: OptionalInherited[ABACAttributes] = INHERIT,
     agent_invoker: RequiredInherited[AgentInvoker] = INHERIT,
     agent_selector: RequiredInherited[AgentSelector] = INHERIT,
+    deadline: OptionalInherited[Deadline] = INHERIT,
     memory_factory: OptionalInherited[MemoryFactory] = INHERIT,
     memory_maker: OptionalInherited[MemoryMaker] = INHERIT,
     prompt_filter: OptionalInherited[PromptFilter] = INHERIT,
@@ -226,6 +373,7 @@ def push_loop_context(
         abac_context=abac_context,
         agent_invoker=agent_invoker,
         agent_selector=agent_selector,
+        deadline=deadline,
         memory_factory=memory_factory,
         memory_maker=memory_maker,
         prompt_filter=prompt_filter,
@@ -237,9 +385,7 @@ def push_loop_context(
     )
 
     if save_context:
-        loop_contexts = getattr(thread_context, LOOP_CONTEXT_ATTR, [])
-        loop_contexts.append(new_context)
-        setattr(thread_context, LOOP_CONTEXT_ATTR, loop_contexts)
+        loop_stack.set(loop_stack.get() + (new_context,))
 
     return new_context
 
@@ -249,9 +395,10 @@ def pop_loop_context() -> LoopContext | None:
     Pop the current loop context off the stack.
     """
 
-    loop_contexts = getattr(thread_context, LOOP_CONTEXT_ATTR, [])
-    if loop_contexts and len(loop_contexts) > 0:
-        return loop_contexts.pop()
+    loop_contexts = loop_stack.get()
+    if len(loop_contexts) > 0:
+        loop_stack.set(loop_contexts[:-1])
+        return loop_contexts[-1]
 
     raise ValueError("No loop context to pop")
 
@@ -261,6 +408,7 @@ def loopum(
     abac_context: OptionalInherited[ABACAttributes] = INHERIT,
     agent_invoker: RequiredInherited[AgentInvoker] = invoke_agent,
     agent_selector: RequiredInherited[AgentSelector] = select_loop,
+    deadline: OptionalInherited[Deadline] = INHERIT,
     memory_factory: OptionalInherited[MemoryFactory] = INHERIT,
     memory_maker: OptionalInherited[MemoryMaker] = INHERIT,
     prompt_filter: OptionalInherited[PromptFilter] = INHERIT,
@@ -274,20 +422,22 @@ def loopum(
     """
     Context manager for setting loop context at the beginning of a loop and clearing it at the end.
     """
-    context = push_loop_context(
-        abac_context=abac_context,
-        agent_invoker=agent_invoker,
-        agent_selector=agent_selector,
-        memory_factory=memory_factory,
-        memory_maker=memory_maker,
-        prompt_filter=prompt_filter,
-        prompt_template=prompt_template,
-        result_parser=result_parser,
-        stop_condition=stop_condition,
-        toolbox=toolbox,
-        tool_filter=tool_filter,
-        save_context=save_context,
-    )
+    with profile_phase("context"):
+        context = push_loop_context(
+            abac_context=abac_context,
+            agent_invoker=agent_invoker,
+            agent_selector=agent_selector,
+            deadline=deadline,
+            memory_factory=memory_factory,
+            memory_maker=memory_maker,
+            prompt_filter=prompt_filter,
+            prompt_template=prompt_template,
+            result_parser=result_parser,
+            stop_condition=stop_condition,
+            toolbox=toolbox,
+            tool_filter=tool_filter,
+            save_context=save_context,
+        )
     if save_context:
         depth = count_loop_contexts()
         logger.debug(
@@ -306,4 +456,99 @@ def loopum(
                 depth,
                 context.tag,
             )
-            pop_loop_context()
+            with profile_phase("context"):
+                pop_loop_context()
+
+
+def get_deadline() -> Deadline | None:
+    """
+    Get the deadline for the current loop context, if there is one.
+    """
+
+    context = get_loop_context()
+    if context is None:
+        return None
+
+    return context.deadline
+
+
+def check_deadline() -> None:
+    """
+    Raise a DeadlineError if the current loop context has a deadline that has expired or been cancelled.
+    """
+
+    deadline = get_deadline()
+    if deadline is not None:
+        deadline.check()
+
+
+@contextmanager
+def deadline_scope(
+    timeout: float | None = None, deadline: Deadline | None = None
+) -> Iterator[Deadline]:
+    """
+    Run the loops within this context with a deadline, which will be linked to any deadline that is already set.
+    Cancel the yielded deadline to stop the loops from another thread.
+
+    The deadline is checked between loop iterations, before each LLM request, and between streamed chunks. Requests
+    that are already in flight are only bounded for models that accept a timeout, see `deadline_kwargs`.
+    """
+
+    deadline = deadline or Deadline(timeout)
+    stop_condition = INHERIT if get_loop_context() else condition_threshold
+
+    with loopum(deadline=deadline, stop_condition=stop_condition) as context:
+        yield context.deadline
+
+
+@contextmanager
+def use_loop_context(context: LoopContext | None) -> Iterator[LoopContext | None]:
+    """
+    Make an existing loop context current, usually one that was captured before handing work to another thread.
+    """
+
+    if context is None:
+        yield None
+        return
+
+    loop_stack.set(loop_stack.get() + (context,))
+    try:
+        yield context
+    finally:
+        pop_loop_context()
+
+
+ResultType = TypeVar("ResultType")
+
+
+def submit_with_context(
+    executor: Executor, fn: Callable[..., ResultType], *args, **kwargs
+) -> Future[ResultType]:
+    """
+    Submit work to an executor in a copy of the current context, so it sees the same loop context stack.
+
+    Each call needs its own copy, since a context cannot be entered by two threads at once.
+    """
+
+    context = copy_context()
+    return executor.submit(context.run, fn, *args, **kwargs)
+
+
+def map_with_context(
+    executor: Executor, fn: Callable[..., ResultType], *iterables: Iterable[Any]
+) -> Iterator[ResultType]:
+    """
+    Like `Executor.map`, but each call runs in a copy of the current context.
+    """
+
+    futures = [submit_with_context(executor, fn, *args) for args in zip(*iterables)]
+
+    def results() -> Iterator[ResultType]:
+        try:
+            for future in futures:
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    return results()
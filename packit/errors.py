@@ -17,3 +17,15 @@ class ToolError(PromptError):
     def __init__(self, message: str, agent: Agent, prompt: str, tool: str):
         super().__init__(message, agent, prompt)
         self.tool = tool
+
+
+class SkipTokenError(PromptError):
+    token: str
+
+    def __init__(self, message: str, agent: Agent, prompt: str, token: str):
+        super().__init__(message, agent, prompt)
+        self.token = token
+
+
+class DeadlineError(TimeoutError):
+    pass
@@ -1,4 +1,8 @@
+from functools import lru_cache
 from json import dumps
+from re import split
+from string import Formatter
+from typing import Any
 
 
 def format_str_or_json(value: str | dict | list) -> str:
@@ -8,6 +12,72 @@ def format_str_or_json(value: str | dict | list) -> str:
     return value
 
 
+class CompiledTemplate:
+    """
+    A format string that has been parsed once, so it can be formatted many times without parsing it again and only
+    the fields that it uses will be serialized.
+    """
+
+    fields: frozenset[str]
+    parts: list[tuple[str, str | None]] | None
+    template: str
+
+    def __init__(self, template: str):
+        self.template = template
+
+        fields = set()
+        parts: list[tuple[str, str | None]] | None = []
+        for literal, field_name, format_spec, conversion in Formatter().parse(template):
+            if field_name is None:
+                parts.append((literal, None))
+                continue
+
+            if field_name.isidentifier() and not format_spec and conversion is None:
+                fields.add(field_name)
+                if parts is not None:
+                    parts.append((literal, field_name))
+            else:
+                # attribute access, indexing, conversions and format specs are left to str.format
+                fields.add(split(r"[.\[]", field_name, maxsplit=1)[0])
+                parts = None
+
+        self.fields = frozenset(fields)
+        self.parts = parts
+
+    def format(self, args: dict[str, Any], values: dict[str, Any] | None = None) -> str:
+        """
+        Format the template with the given arguments. Serialized values are stored in `values`, which can be shared
+        between templates that are formatted with the same arguments.
+        """
+
+        if values is None:
+            values = {}
+
+        if self.parts is None:
+            for key in args:
+                if key not in values:
+                    values[key] = format_str_or_json(args[key])
+
+            return self.template.format(**values)
+
+        for field in self.fields:
+            if field not in values:
+                values[field] = format_str_or_json(args[field])
+
+        return "".join(
+            literal if field is None else literal + format(values[field])
+            for literal, field in self.parts
+        )
+
+
+@lru_cache(maxsize=256)
+def compile_template(template: str) -> CompiledTemplate:
+    """
+    Compile a format string, reusing the compiled template for strings that have been seen before.
+    """
+    return CompiledTemplate(template)
+
+
 def format_bullet_list(items: list[str], bullet="-") -> str:
     # remove newlines within each item
     items = [str(item).replace("\n", " ").replace("\r", "") for item in items]
@@ -1,9 +1,13 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
 from logging import getLogger
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Set, Tuple
 
 from packit.agent import Agent, AgentContext
 from packit.conditions import condition_threshold_mean
-from packit.loops import loop_retry
+from packit.context import deadline_scope, submit_with_context
+from packit.loops import loop_retry, without_memory
 from packit.results import bool_result
 from packit.tracing import SpanKind, trace
 from packit.types import PromptType, ResultParser
@@ -14,6 +18,45 @@ logger = getLogger(__name__)
 
 PanelResult = Dict[str, PromptType]
 
+# takes the votes so far and the number of votes that are still missing, and returns true once the decision is fixed
+VoteDecider = Callable[[List[Any], int], bool]
+
+
+def projected_decisions(
+    decision_condition: Callable[..., bool],
+    min_threshold: float,
+    vote_range: Tuple[Any, Any],
+    votes: List[Any],
+    remaining: int,
+) -> Set[bool]:
+    """
+    Make the decision with the remaining votes filled in with each end of the vote range.
+    """
+
+    return {
+        decision_condition(min_threshold, *votes, *([extreme] * remaining))
+        for extreme in vote_range
+    }
+
+
+def decision_fixed(
+    decision_condition: Callable[..., bool],
+    min_threshold: float,
+    vote_range: Tuple[Any, Any],
+    votes: List[Any],
+    remaining: int,
+) -> bool:
+    """
+    Check whether the remaining votes can still change the decision, by deciding with all of them at each end of the
+    vote range. This only holds for decision conditions that move in one direction as votes increase, like the sum and
+    mean thresholds.
+    """
+
+    outcomes = projected_decisions(
+        decision_condition, min_threshold, vote_range, votes, remaining
+    )
+    return len(outcomes) == 1
+
 
 class Panel:
     agents: List[Agent]
@@ -45,8 +88,40 @@ class Panel:
         prompt: PromptType,
         context: AgentContext,
         result_parser: ResultParser = bool_result,
+        max_concurrency: int | None = None,
+        decided: VoteDecider | None = None,
     ) -> PanelResult:
-        results = {}
+        """
+        Collect one vote from each agent for each unit of its weight.
+
+        If `max_concurrency` is set, up to that many votes will be collected at once on a thread pool. Each vote then
+        runs on a copy of its agent without memory, since agents with a weight over one vote several times at once.
+        If `decided` is set, it is checked after each vote, and once it returns true, the remaining votes are skipped
+        or cancelled. Results are returned in agent order either way.
+        """
+
+        ballots = [
+            (f"{agent.name}-{i}", agent)
+            for agent, weight in zip(self.agents, self.weights)
+            for i in range(weight)
+        ]
+        votes: Dict[int, Any] = {}
+
+        def vote(agent: Agent) -> Any:
+            return loop_retry(
+                agent,
+                prompt,
+                context=context,
+                result_parser=result_parser,
+            )
+
+        def is_decided() -> bool:
+            remaining = len(ballots) - len(votes)
+            return (
+                decided is not None
+                and remaining > 0
+                and decided(list(votes.values()), remaining)
+            )
 
         with trace(f"panel_{self.name}", SpanKind.GROUP) as (
             report_args,
@@ -54,17 +129,53 @@ class Panel:
         ):
             report_args(prompt, context)
 
-            for agent, weight in zip(self.agents, self.weights):
-                for i in range(weight):
-                    result = loop_retry(
-                        agent,
-                        prompt,
-                        context=context,
-                        result_parser=result_parser,
-                    )
-                    results[f"{agent.name}-{i}"] = result
-
-            report_output(results)
+            early_exit = False
+            if max_concurrency is None:
+                for index, (_key, agent) in enumerate(ballots):
+                    votes[index] = vote(agent)
+                    if is_decided():
+                        early_exit = True
+                        break
+            else:
+                executor = ThreadPoolExecutor(max_workers=max(1, max_concurrency))
+                with deadline_scope() as vote_deadline:
+                    futures = {
+                        submit_with_context(
+                            executor, vote, without_memory(agent)
+                        ): index
+                        for index, (_key, agent) in enumerate(ballots)
+                    }
+
+                    try:
+                        for future in as_completed(futures):
+                            votes[futures[future]] = future.result()
+                            if is_decided():
+                                early_exit = True
+                                break
+                    finally:
+                        # stop the votes that are still running at their next deadline check
+                        vote_deadline.cancel()
+                        executor.shutdown(wait=False, cancel_futures=True)
+
+            results = {ballots[index][0]: votes[index] for index in sorted(votes)}
+
+            if early_exit:
+                logger.debug(
+                    "panel %s decided after %s of %s votes",
+                    self.name,
+                    len(votes),
+                    len(ballots),
+                )
+
+            report_output(
+                {
+                    "results": results,
+                    "votes": dict(Counter(str(value) for value in results.values())),
+                    "sampled": len(results),
+                    "total": len(ballots),
+                    "early_exit": early_exit,
+                }
+            )
 
         return results
 
@@ -75,10 +186,41 @@ class Panel:
         result_parser=bool_result,
         decision_condition=condition_threshold_mean,
         min_threshold: float = 0.5,
+        max_concurrency: int | None = None,
+        vote_range: Tuple[Any, Any] | None = None,
     ) -> tuple[bool, PanelResult]:
-        results = self.sample(prompt, context, result_parser=result_parser)
+        """
+        Sample the panel and make a decision from the votes.
+
+        If a `vote_range` is given, like `(False, True)` for the default parser, sampling stops as soon as the
+        remaining votes cannot change the decision, which is checked by filling them in with both ends of the range.
+        The decision is then the one those remaining votes would have led to. The range must cover every value the
+        result parser can return, and the decision condition must move in one direction as votes increase.
+        """
+
+        decided = None
+        if vote_range is not None:
+            decided = partial(
+                decision_fixed, decision_condition, min_threshold, vote_range
+            )
+
+        results = self.sample(
+            prompt,
+            context,
+            result_parser=result_parser,
+            max_concurrency=max_concurrency,
+            decided=decided,
+        )
         values = list(results.values())
 
+        remaining = sum(self.weights) - len(values)
+        if vote_range is not None and remaining > 0:
+            # sampling stopped early, so the decision is the same for any remaining votes in the range
+            (decision,) = projected_decisions(
+                decision_condition, min_threshold, vote_range, values, remaining
+            )
+            return decision, results
+
         return decision_condition(min_threshold, *values), results
 
     def __call__(self, prompt, **kwargs: Any) -> Any:
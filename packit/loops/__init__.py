@@ -2,4 +2,5 @@ from .base import *  # noqa
 from .builder import *  # noqa
 from .complex import *  # noqa
 from .multi_agent import *  # noqa
+from .pipeline import *  # noqa
 from .single_agent import *  # noqa
@@ -1,9 +1,32 @@
+from asyncio import FIRST_COMPLETED, Semaphore, create_task, wait
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from copy import copy
 from logging import getLogger
-from typing import List, Protocol
-
-from packit.agent import Agent, AgentContext, invoke_agent
-from packit.conditions import condition_threshold
-from packit.context import INHERIT, OptionalInherited, RequiredInherited, loopum
+from typing import Any, Iterator, List, Protocol
+
+from packit.agent import (
+    Agent,
+    AgentContext,
+    async_invoker,
+    batch_agents,
+    invoke_agent,
+)
+from packit.checkpoint import loop_checkpoint
+from packit.conditions import accepts_results, check_condition, condition_threshold
+from packit.context import (
+    INHERIT,
+    LoopContext,
+    OptionalInherited,
+    RequiredInherited,
+    check_deadline,
+    deadline_scope,
+    loopum,
+    push_loop_context,
+    submit_with_context,
+    use_loop_context,
+)
+from packit.profiling import profile_phase
+from packit.prompts import get_random_prompt
 from packit.selectors import select_loop
 from packit.toolbox import Toolbox
 from packit.tracing import SpanKind, trace
@@ -20,7 +43,7 @@ from packit.types import (
     StopCondition,
     ToolFilter,
 )
-from packit.utils import make_list
+from packit.utils import await_value, make_list
 
 logger = getLogger(__name__)
 
@@ -63,9 +86,22 @@ def loop_map(
     toolbox: OptionalInherited[Toolbox] = INHERIT,
     tool_filter: OptionalInherited[ToolFilter] = INHERIT,
     save_context: bool = True,
+    batch: bool = False,
+    max_concurrency: int | None = None,
 ) -> List[PromptType]:
     """
     Loop through a list of agents, passing the same prompt to each agent.
+
+    In batch mode, all of the prompts are prepared up front and sent together using `batch_agents`, which bypasses
+    the agent invoker. Every agent will see the same history and results are returned in selector order.
+
+    If `max_concurrency` is set, up to that many agents will be invoked at once on a thread pool, and their results
+    parsed on the same threads. Every agent will see the same history, which is updated in selector order once all
+    of the agents have finished, and results are returned in selector order.
+
+    If the stop condition takes a `results` argument, it will be passed the parsed results so far, so the loop can
+    stop early once they are good enough, like `condition_quorum`. In parallel mode, the remaining agents are
+    cancelled once the condition is met.
     """
 
     agents = make_list(agents)
@@ -93,10 +129,35 @@ def loop_map(
             else:
                 history = None
 
+            if batch:
+                results = map_batch(
+                    agents, prompt, context, history, loop_context=loop_context
+                )
+                report_output(results)
+                return results
+
+            if max_concurrency is not None:
+                results = map_parallel(
+                    agents,
+                    prompt,
+                    context,
+                    history,
+                    agent_invoker=agent_invoker,
+                    loop_context=loop_context,
+                    max_concurrency=max_concurrency,
+                )
+                report_output(results)
+                return results
+
             current_iteration = 0
             results = []
 
-            while not loop_context.stop_condition(current=current_iteration):
+            while not check_condition(
+                loop_context.stop_condition,
+                current=current_iteration,
+                results=results,
+            ):
+                loop_context.check_deadline()
                 agent = loop_context.agent_selector(agents, current_iteration)
                 agent_prompt = prompt
 
@@ -121,15 +182,16 @@ def loop_map(
                     loop_context.memory_maker(history, result)
 
                 if callable(loop_context.result_parser):
-                    result = loop_context.result_parser(
-                        result,
-                        abac_context={
-                            "subject": agent.name,
-                        },
-                        agent=agent,
-                        toolbox=loop_context.toolbox,
-                        tool_filter=loop_context.tool_filter,
-                    )
+                    with profile_phase("parse"):
+                        result = loop_context.result_parser(
+                            result,
+                            abac_context={
+                                "subject": agent.name,
+                            },
+                            agent=agent,
+                            toolbox=loop_context.toolbox,
+                            tool_filter=loop_context.tool_filter,
+                        )
 
                 results.append(result)
 
@@ -139,6 +201,181 @@ def loop_map(
             return results
 
 
+def map_batch(
+    agents: list[Agent],
+    prompt: PromptType,
+    context: AgentContext,
+    history: list | None,
+    loop_context: LoopContext,
+) -> List[PromptType]:
+    """
+    Run the body of a map loop as a single batch.
+    """
+
+    batch_agents_list, batch_prompts = plan_map(agents, prompt, loop_context)
+
+    replies = batch_agents(
+        batch_agents_list,
+        batch_prompts,
+        [{**context, "history": history} for _ in batch_prompts],
+        prompt_template=loop_context.prompt_template or get_random_prompt,
+        toolbox=loop_context.toolbox,
+    )
+
+    results = []
+    for agent, result in zip(batch_agents_list, replies):
+        if callable(loop_context.memory_maker):
+            loop_context.memory_maker(history, result)
+
+        results.append(parse_map_result(agent, result, loop_context))
+
+    return results
+
+
+def map_parallel(
+    agents: list[Agent],
+    prompt: PromptType,
+    context: AgentContext,
+    history: list | None,
+    agent_invoker: AgentInvoker,
+    loop_context: LoopContext,
+    max_concurrency: int,
+) -> List[PromptType]:
+    """
+    Run the body of a map loop on a thread pool. The workers run in a copy of the current context, so they see the
+    same loop context stack.
+
+    Each branch runs on a copy of its agent without memory, since the same agent may be selected for several
+    branches at once. The branches share their results through the history and memory maker instead.
+
+    If the stop condition takes the results, it is checked as each branch finishes, in completion order. Once it is
+    met, the branches that have not started are cancelled, the running branches are cancelled through their deadline,
+    and the results that finished are returned in selector order.
+    """
+
+    branch_agents, branch_prompts = plan_map(agents, prompt, loop_context)
+    branch_agents = [without_memory(agent) for agent in branch_agents]
+    early_exit = accepts_results(loop_context.stop_condition)
+
+    def run_branch(agent: Agent, agent_prompt: PromptType) -> tuple[Any, Any]:
+        check_deadline()
+        result = agent_invoker(
+            agent,
+            agent_prompt,
+            context={
+                **context,
+                "history": history,
+            },
+            prompt_template=loop_context.prompt_template,
+            toolbox=loop_context.toolbox,
+        )
+
+        return result, parse_map_result(agent, result, loop_context)
+
+    branches: dict[int, tuple[Any, Any]] = {}
+    finished: list[Any] = []
+
+    executor = ThreadPoolExecutor(max_workers=max(1, max_concurrency))
+    with deadline_scope() as branch_deadline:
+        futures = {
+            submit_with_context(executor, run_branch, agent, agent_prompt): index
+            for index, (agent, agent_prompt) in enumerate(
+                zip(branch_agents, branch_prompts)
+            )
+        }
+
+        try:
+            for future in as_completed(futures):
+                branches[futures[future]] = future.result()
+                finished.append(branches[futures[future]][1])
+
+                if early_exit and check_condition(
+                    loop_context.stop_condition,
+                    current=len(finished),
+                    results=finished,
+                ):
+                    logger.debug(
+                        "stopping map after %s of %s branches",
+                        len(finished),
+                        len(futures),
+                    )
+                    break
+        finally:
+            # stop the branches that are still running at their next deadline check
+            branch_deadline.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    results = []
+    for index in sorted(branches):
+        result, parsed = branches[index]
+        if callable(loop_context.memory_maker):
+            loop_context.memory_maker(history, result)
+
+        results.append(parsed)
+
+    return results
+
+
+def without_memory(agent: Agent) -> Agent:
+    """
+    Copy an agent without its memory, so calls through the copy neither see nor add to the original memory.
+    """
+
+    stateless = copy(agent)
+    stateless.memory = None
+    return stateless
+
+
+def plan_map(
+    agents: list[Agent],
+    prompt: PromptType,
+    loop_context: LoopContext,
+) -> tuple[list[Agent], list[PromptType]]:
+    """
+    Select the agent and filter the prompt for every iteration of a map loop up front, for the modes that run all of
+    the iterations at once. The stop condition only sees the iteration count and an empty list of results.
+    """
+
+    plan_agents = []
+    plan_prompts = []
+
+    current_iteration = 0
+    while not check_condition(
+        loop_context.stop_condition, current=current_iteration, results=[]
+    ):
+        agent = loop_context.agent_selector(agents, current_iteration)
+        agent_prompt = prompt
+
+        if callable(loop_context.prompt_filter):
+            agent_prompt = loop_context.prompt_filter(agent_prompt)
+
+        current_iteration += 1
+
+        if agent_prompt is None:
+            continue  # map continues, reduce stops
+
+        plan_agents.append(agent)
+        plan_prompts.append(agent_prompt)
+
+    return plan_agents, plan_prompts
+
+
+def parse_map_result(agent: Agent, result: Any, loop_context: LoopContext) -> Any:
+    if callable(loop_context.result_parser):
+        with profile_phase("parse"):
+            return loop_context.result_parser(
+                result,
+                abac_context={
+                    "subject": agent.name,
+                },
+                agent=agent,
+                toolbox=loop_context.toolbox,
+                tool_filter=loop_context.tool_filter,
+            )
+
+    return result
+
+
 def loop_reduce(
     agents: Agent | list[Agent],
     prompt: PromptType,
@@ -158,10 +395,14 @@ def loop_reduce(
 ) -> PromptType:
     """
     Loop through a list of agents, passing the result of each agent on to the next.
+
+    When checkpointing is enabled, the result, history, and agent memory are saved after each step, and the loop will
+    resume from the last saved step.
     """
 
     agents = make_list(agents)
     context = context or {}
+    checkpoint = loop_checkpoint("reduce")
 
     with loopum(
         abac_context=abac_context,
@@ -188,7 +429,18 @@ def loop_reduce(
             current_iteration = 0
             result = prompt
 
+            saved = checkpoint.load()
+            if saved is not None:
+                checkpoint.restore(saved, history=history, agents=agents)
+                current_iteration = saved["step"]
+                result = saved["result"]
+
+                if saved["done"]:
+                    report_output(result)
+                    return result
+
             while not loop_context.stop_condition(current=current_iteration):
+                loop_context.check_deadline()
                 agent = loop_context.agent_selector(agents, current_iteration)
 
                 if callable(loop_context.prompt_filter):
@@ -197,9 +449,405 @@ def loop_reduce(
                 if result is None:
                     break  # map continues, reduce stops
 
-                result = agent_invoker(
+                with checkpoint.step(current_iteration):
+                    result = agent_invoker(
+                        agent,
+                        result,
+                        context={
+                            **context,
+                            "history": history,
+                        },
+                        prompt_template=loop_context.prompt_template,
+                        toolbox=loop_context.toolbox,
+                    )
+
+                    if callable(loop_context.memory_maker):
+                        loop_context.memory_maker(history, result)
+
+                    if callable(loop_context.result_parser):
+                        with profile_phase("parse"):
+                            result = loop_context.result_parser(
+                                result,
+                                abac_context={
+                                    "subject": agent.name,
+                                },
+                                agent=agent,
+                                toolbox=loop_context.toolbox,
+                                tool_filter=loop_context.tool_filter,
+                            )
+
+                current_iteration += 1
+                checkpoint.save(
+                    current_iteration, result, history=history, agents=agents
+                )
+
+            checkpoint.save(
+                current_iteration, result, done=True, history=history, agents=agents
+            )
+            report_output(result)
+            return result
+
+
+def iter_map(
+    agents: Agent | list[Agent],
+    prompt: PromptType,
+    context: AgentContext | None = None,
+    abac_context: OptionalInherited[ABACAttributes] = INHERIT,
+    agent_invoker: OptionalInherited[AgentInvoker] = invoke_agent,
+    agent_selector: OptionalInherited[AgentSelector] = select_loop,
+    memory_factory: OptionalInherited[MemoryFactory] = INHERIT,
+    memory_maker: OptionalInherited[MemoryMaker] = None,
+    prompt_filter: OptionalInherited[PromptFilter] = INHERIT,
+    prompt_template: OptionalInherited[PromptTemplate] = INHERIT,
+    result_parser: OptionalInherited[ResultParser] = INHERIT,
+    stop_condition: OptionalInherited[StopCondition] = condition_threshold,
+    toolbox: OptionalInherited[Toolbox] = INHERIT,
+    tool_filter: OptionalInherited[ToolFilter] = INHERIT,
+    max_concurrency: int | None = None,
+    ordered: bool = True,
+) -> Iterator[PromptType]:
+    """
+    Generator version of `loop_map`, which yields each parsed result as soon as it is ready.
+
+    If `max_concurrency` is set, the agents will be invoked on a thread pool like `loop_map`. Results are yielded in
+    selector order, or in completion order if `ordered` is false, and the history is updated in the order that
+    results are yielded. Closing the generator cancels any invocations that have not started, as does meeting a stop
+    condition that takes the results.
+
+    The loop context is only made current while the generator is running, so the consumer never sees it.
+    """
+
+    agents = make_list(agents)
+    context = context or {}
+
+    loop_context = push_loop_context(
+        abac_context=abac_context,
+        agent_invoker=agent_invoker,
+        agent_selector=agent_selector,
+        memory_factory=memory_factory,
+        memory_maker=memory_maker,
+        prompt_filter=prompt_filter,
+        prompt_template=prompt_template,
+        result_parser=result_parser,
+        stop_condition=stop_condition,
+        toolbox=toolbox,
+        tool_filter=tool_filter,
+        save_context=False,
+    )
+
+    with use_loop_context(loop_context):
+        if callable(loop_context.memory_factory):
+            history = loop_context.memory_factory()
+        else:
+            history = None
+
+    def invoke_branch(agent: Agent, agent_prompt: PromptType) -> tuple[Any, Any]:
+        loop_context.check_deadline()
+        result = agent_invoker(
+            agent,
+            agent_prompt,
+            context={
+                **context,
+                "history": history,
+            },
+            prompt_template=loop_context.prompt_template,
+            toolbox=loop_context.toolbox,
+        )
+
+        return result, parse_map_result(agent, result, loop_context)
+
+    def remember(result: Any) -> None:
+        if callable(loop_context.memory_maker):
+            loop_context.memory_maker(history, result)
+
+    results: list[Any] = []
+
+    def should_stop(current_iteration: int) -> bool:
+        return check_condition(
+            loop_context.stop_condition, current=current_iteration, results=results
+        )
+
+    if max_concurrency is None:
+        current_iteration = 0
+        while True:
+            with use_loop_context(loop_context):
+                if should_stop(current_iteration):
+                    break
+
+                loop_context.check_deadline()
+
+                agent = loop_context.agent_selector(agents, current_iteration)
+                agent_prompt = prompt
+
+                if callable(loop_context.prompt_filter):
+                    agent_prompt = loop_context.prompt_filter(agent_prompt)
+
+                current_iteration += 1
+
+                if agent_prompt is None:
+                    continue  # map continues, reduce stops
+
+                result, parsed = invoke_branch(agent, agent_prompt)
+                remember(result)
+                results.append(parsed)
+
+            yield parsed
+
+        return
+
+    executor = ThreadPoolExecutor(max_workers=max(1, max_concurrency))
+    futures: list[Future] = []
+    try:
+        with use_loop_context(loop_context):
+            branch_agents, branch_prompts = plan_map(agents, prompt, loop_context)
+            futures = [
+                submit_with_context(executor, invoke_branch, agent, agent_prompt)
+                for agent, agent_prompt in zip(branch_agents, branch_prompts)
+            ]
+
+        early_exit = accepts_results(loop_context.stop_condition)
+        for future in futures if ordered else as_completed(futures):
+            result, parsed = future.result()
+            remember(result)
+            results.append(parsed)
+            yield parsed
+
+            if early_exit and should_stop(len(results)):
+                break
+    finally:
+        for future in futures:
+            future.cancel()
+
+        executor.shutdown(wait=False)
+
+
+def iter_reduce(
+    agents: Agent | list[Agent],
+    prompt: PromptType,
+    context: AgentContext | None = None,
+    abac_context: OptionalInherited[ABACAttributes] = INHERIT,
+    agent_invoker: RequiredInherited[AgentInvoker] = invoke_agent,
+    agent_selector: RequiredInherited[AgentSelector] = select_loop,
+    memory_factory: OptionalInherited[MemoryFactory] = INHERIT,
+    memory_maker: OptionalInherited[MemoryMaker] = INHERIT,
+    prompt_filter: OptionalInherited[PromptFilter] = INHERIT,
+    prompt_template: OptionalInherited[PromptTemplate] = INHERIT,
+    result_parser: OptionalInherited[ResultParser] = INHERIT,
+    stop_condition: RequiredInherited[StopCondition] = condition_threshold,
+    toolbox: OptionalInherited[Toolbox] = INHERIT,
+    tool_filter: OptionalInherited[ToolFilter] = INHERIT,
+) -> Iterator[PromptType]:
+    """
+    Generator version of `loop_reduce`, which yields each intermediate result. The last value is the same result
+    that `loop_reduce` would return. Closing the generator stops the loop before the next agent is invoked.
+    """
+
+    agents = make_list(agents)
+    context = context or {}
+
+    loop_context = push_loop_context(
+        abac_context=abac_context,
+        agent_invoker=agent_invoker,
+        agent_selector=agent_selector,
+        memory_factory=memory_factory,
+        memory_maker=memory_maker,
+        prompt_filter=prompt_filter,
+        prompt_template=prompt_template,
+        result_parser=result_parser,
+        stop_condition=stop_condition,
+        toolbox=toolbox,
+        tool_filter=tool_filter,
+        save_context=False,
+    )
+
+    with use_loop_context(loop_context):
+        if callable(loop_context.memory_factory):
+            history = loop_context.memory_factory()
+        else:
+            history = None
+
+    current_iteration = 0
+    result = prompt
+
+    while True:
+        with use_loop_context(loop_context):
+            if loop_context.stop_condition(current=current_iteration):
+                break
+
+            loop_context.check_deadline()
+
+            agent = loop_context.agent_selector(agents, current_iteration)
+
+            if callable(loop_context.prompt_filter):
+                result = loop_context.prompt_filter(result)
+
+            if result is None:
+                break  # map continues, reduce stops
+
+            result = agent_invoker(
+                agent,
+                result,
+                context={
+                    **context,
+                    "history": history,
+                },
+                prompt_template=loop_context.prompt_template,
+                toolbox=loop_context.toolbox,
+            )
+
+            if callable(loop_context.memory_maker):
+                loop_context.memory_maker(history, result)
+
+            result = parse_map_result(agent, result, loop_context)
+            current_iteration += 1
+
+        yield result
+
+
+async def aloop_map(
+    agents: Agent | list[Agent],
+    prompt: PromptType,
+    context: AgentContext | None = None,
+    abac_context: OptionalInherited[ABACAttributes] = INHERIT,
+    agent_invoker: OptionalInherited[AgentInvoker] = invoke_agent,
+    agent_selector: OptionalInherited[AgentSelector] = select_loop,
+    memory_factory: OptionalInherited[MemoryFactory] = INHERIT,
+    memory_maker: OptionalInherited[MemoryMaker] = None,
+    prompt_filter: OptionalInherited[PromptFilter] = INHERIT,
+    prompt_template: OptionalInherited[PromptTemplate] = INHERIT,
+    result_parser: OptionalInherited[ResultParser] = INHERIT,
+    stop_condition: OptionalInherited[StopCondition] = condition_threshold,
+    toolbox: OptionalInherited[Toolbox] = INHERIT,
+    tool_filter: OptionalInherited[ToolFilter] = INHERIT,
+    save_context: bool = True,
+    max_concurrency: int | None = None,
+) -> List[PromptType]:
+    """
+    Async version of `loop_map`. The agent invoker may be sync or async, the default `invoke_agent` will be replaced
+    with `ainvoke_agent`.
+
+    If `max_concurrency` is set, up to that many agents will be awaited at once, with the same history handling as
+    the threaded version.
+    """
+
+    agents = make_list(agents)
+    context = context or {}
+    invoker = async_invoker(agent_invoker)
+
+    with loopum(
+        abac_context=abac_context,
+        agent_invoker=agent_invoker,
+        agent_selector=agent_selector,
+        memory_factory=memory_factory,
+        memory_maker=memory_maker,
+        prompt_filter=prompt_filter,
+        prompt_template=prompt_template,
+        result_parser=result_parser,
+        stop_condition=stop_condition,
+        toolbox=toolbox,
+        tool_filter=tool_filter,
+        save_context=save_context,
+    ) as loop_context:
+        with trace("map", SpanKind.LOOP) as (report_args, report_output):
+            report_args(agents, prompt, context)
+
+            if callable(loop_context.memory_factory):
+                history = loop_context.memory_factory()
+            else:
+                history = None
+
+            if max_concurrency is not None:
+                results = await amap_parallel(
+                    agents,
+                    prompt,
+                    context,
+                    history,
+                    agent_invoker=invoker,
+                    loop_context=loop_context,
+                    max_concurrency=max_concurrency,
+                )
+                report_output(results)
+                return results
+
+            current_iteration = 0
+            results = []
+
+            while not check_condition(
+                loop_context.stop_condition,
+                current=current_iteration,
+                results=results,
+            ):
+                loop_context.check_deadline()
+                agent = loop_context.agent_selector(agents, current_iteration)
+                agent_prompt = prompt
+
+                if callable(loop_context.prompt_filter):
+                    agent_prompt = loop_context.prompt_filter(agent_prompt)
+
+                if agent_prompt is None:
+                    continue  # map continues, reduce stops
+
+                result = await await_value(
+                    invoker(
+                        agent,
+                        agent_prompt,
+                        context={
+                            **context,
+                            "history": history,
+                        },
+                        prompt_template=loop_context.prompt_template,
+                        toolbox=loop_context.toolbox,
+                    )
+                )
+
+                if callable(loop_context.memory_maker):
+                    loop_context.memory_maker(history, result)
+
+                if callable(loop_context.result_parser):
+                    with profile_phase("parse"):
+                        result = loop_context.result_parser(
+                            result,
+                            abac_context={
+                                "subject": agent.name,
+                            },
+                            agent=agent,
+                            toolbox=loop_context.toolbox,
+                            tool_filter=loop_context.tool_filter,
+                        )
+
+                results.append(result)
+
+                current_iteration += 1
+
+            report_output(results)
+            return results
+
+
+async def amap_parallel(
+    agents: list[Agent],
+    prompt: PromptType,
+    context: AgentContext,
+    history: list | None,
+    agent_invoker: AgentInvoker,
+    loop_context: LoopContext,
+    max_concurrency: int,
+) -> List[PromptType]:
+    """
+    Async version of `map_parallel`. If any branch fails, or the stop condition is met, the others are cancelled.
+    """
+
+    branch_agents, branch_prompts = plan_map(agents, prompt, loop_context)
+    branch_agents = [without_memory(agent) for agent in branch_agents]
+    early_exit = accepts_results(loop_context.stop_condition)
+    semaphore = Semaphore(max(1, max_concurrency))
+
+    async def run_branch(agent: Agent, agent_prompt: PromptType) -> tuple[Any, Any]:
+        async with semaphore:
+            loop_context.check_deadline()
+            result = await await_value(
+                agent_invoker(
                     agent,
-                    result,
+                    agent_prompt,
                     context={
                         **context,
                         "history": history,
@@ -207,20 +855,138 @@ def loop_reduce(
                     prompt_template=loop_context.prompt_template,
                     toolbox=loop_context.toolbox,
                 )
+            )
+
+        return result, parse_map_result(agent, result, loop_context)
+
+    tasks = {
+        create_task(run_branch(agent, agent_prompt)): index
+        for index, (agent, agent_prompt) in enumerate(
+            zip(branch_agents, branch_prompts)
+        )
+    }
+
+    branches: dict[int, tuple[Any, Any]] = {}
+    finished: list[Any] = []
+
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await wait(pending, return_when=FIRST_COMPLETED)
+            for task in sorted(done, key=tasks.__getitem__):
+                branches[tasks[task]] = task.result()
+                finished.append(branches[tasks[task]][1])
+
+            if early_exit and check_condition(
+                loop_context.stop_condition, current=len(finished), results=finished
+            ):
+                logger.debug(
+                    "stopping map after %s of %s branches", len(finished), len(tasks)
+                )
+                break
+    finally:
+        for task in tasks:
+            task.cancel()
 
-                if callable(loop_context.memory_maker):
-                    loop_context.memory_maker(history, result)
+    results = []
+    for index in sorted(branches):
+        result, parsed = branches[index]
+        if callable(loop_context.memory_maker):
+            loop_context.memory_maker(history, result)
 
-                if callable(loop_context.result_parser):
-                    result = loop_context.result_parser(
+        results.append(parsed)
+
+    return results
+
+
+async def aloop_reduce(
+    agents: Agent | list[Agent],
+    prompt: PromptType,
+    context: AgentContext | None = None,
+    abac_context: OptionalInherited[ABACAttributes] = INHERIT,
+    agent_invoker: RequiredInherited[AgentInvoker] = invoke_agent,
+    agent_selector: RequiredInherited[AgentSelector] = select_loop,
+    memory_factory: OptionalInherited[MemoryFactory] = INHERIT,
+    memory_maker: OptionalInherited[MemoryMaker] = INHERIT,
+    prompt_filter: OptionalInherited[PromptFilter] = INHERIT,
+    prompt_template: OptionalInherited[PromptTemplate] = INHERIT,
+    result_parser: OptionalInherited[ResultParser] = INHERIT,
+    stop_condition: RequiredInherited[StopCondition] = condition_threshold,
+    toolbox: OptionalInherited[Toolbox] = INHERIT,
+    tool_filter: OptionalInherited[ToolFilter] = INHERIT,
+    save_context: bool = True,
+) -> PromptType:
+    """
+    Async version of `loop_reduce`. The agent invoker may be sync or async, the default `invoke_agent` will be
+    replaced with `ainvoke_agent`.
+    """
+
+    agents = make_list(agents)
+    context = context or {}
+    invoker = async_invoker(agent_invoker)
+
+    with loopum(
+        abac_context=abac_context,
+        agent_invoker=agent_invoker,
+        agent_selector=agent_selector,
+        memory_factory=memory_factory,
+        memory_maker=memory_maker,
+        prompt_filter=prompt_filter,
+        prompt_template=prompt_template,
+        result_parser=result_parser,
+        stop_condition=stop_condition,
+        toolbox=toolbox,
+        tool_filter=tool_filter,
+        save_context=save_context,
+    ) as loop_context:
+        with trace("reduce", SpanKind.LOOP) as (report_args, report_output):
+            report_args(agents, prompt, context)
+
+            if callable(loop_context.memory_factory):
+                history = loop_context.memory_factory()
+            else:
+                history = None
+
+            current_iteration = 0
+            result = prompt
+
+            while not loop_context.stop_condition(current=current_iteration):
+                loop_context.check_deadline()
+                agent = loop_context.agent_selector(agents, current_iteration)
+
+                if callable(loop_context.prompt_filter):
+                    result = loop_context.prompt_filter(result)
+
+                if result is None:
+                    break  # map continues, reduce stops
+
+                result = await await_value(
+                    invoker(
+                        agent,
                         result,
-                        abac_context={
-                            "subject": agent.name,
+                        context={
+                            **context,
+                            "history": history,
                         },
-                        agent=agent,
+                        prompt_template=loop_context.prompt_template,
                         toolbox=loop_context.toolbox,
-                        tool_filter=loop_context.tool_filter,
                     )
+                )
+
+                if callable(loop_context.memory_maker):
+                    loop_context.memory_maker(history, result)
+
+                if callable(loop_context.result_parser):
+                    with profile_phase("parse"):
+                        result = loop_context.result_parser(
+                            result,
+                            abac_context={
+                                "subject": agent.name,
+                            },
+                            agent=agent,
+                            toolbox=loop_context.toolbox,
+                            tool_filter=loop_context.tool_filter,
+                        )
 
                 current_iteration += 1
 
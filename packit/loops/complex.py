@@ -1,10 +1,15 @@
 """ """
 
+from concurrent.futures import ThreadPoolExecutor
 from logging import getLogger
+from typing import Callable
 
 from packit.agent import Agent, AgentContext, invoke_agent
+from packit.checkpoint import loop_checkpoint
 from packit.conditions import condition_threshold
+from packit.context import INHERIT, OptionalInherited, loopum, map_with_context
 from packit.memory import make_limited_memory, memory_order_width
+from packit.profiling import profile_phase
 from packit.prompts import get_random_prompt
 from packit.results import multi_function_or_str_result
 from packit.selectors import select_loop
@@ -23,8 +28,9 @@ from packit.types import (
     StopCondition,
     ToolFilter,
 )
+from packit.utils import make_list, split_text
 
-from .base import loop_reduce
+from .base import loop_reduce, without_memory
 from .single_agent import loop_retry
 
 logger = getLogger(__name__)
@@ -53,6 +59,8 @@ def loop_team(
     """
 
     context = context or {}
+    checkpoint = loop_checkpoint("team")
+    team = [manager, *workers]
 
     if callable(memory_factory):
         memory = memory_factory()
@@ -79,39 +87,195 @@ def loop_team(
             **context,
         }
 
-        result = loop_retry(
-            manager,
-            prompt + get_random_prompt("coworker"),
-            context=loop_context,
-            abac_context=abac_context,
-            agent_invoker=agent_invoker,
-            agent_selector=agent_selector,
-            memory_factory=get_memory,
-            memory_maker=memory_maker,
-            prompt_filter=prompt_filter,
-            prompt_template=prompt_template,
-            result_parser=result_parser,
-            stop_condition=stop_condition,
-            toolbox=toolbox,
-            tool_filter=tool_filter,
-        )
+        # the workers are only invoked through tools, so their memory is saved along with the manager's
+        step = 0
+        saved = checkpoint.load()
+        if saved is not None:
+            checkpoint.restore(saved, history=memory, agents=team)
+            step = saved["step"]
+            result = saved["result"]
 
-        result = loop_reduce(
-            [manager],
-            result + loop_prompt + get_random_prompt("coworker"),
-            context=loop_context,
-            abac_context=abac_context,
-            agent_invoker=loop_retry,
-            agent_selector=agent_selector,
-            memory_factory=get_memory,
-            memory_maker=memory_maker,
-            prompt_filter=prompt_filter,
-            prompt_template=prompt_template,
-            result_parser=result_parser,
-            stop_condition=stop_condition,
-            toolbox=toolbox,
-            tool_filter=tool_filter,
-        )
+            if saved["done"]:
+                report_output(result)
+                return result
+
+        if step == 0:
+            with checkpoint.step(0):
+                result = loop_retry(
+                    manager,
+                    prompt + get_random_prompt("coworker"),
+                    context=loop_context,
+                    abac_context=abac_context,
+                    agent_invoker=agent_invoker,
+                    agent_selector=agent_selector,
+                    memory_factory=get_memory,
+                    memory_maker=memory_maker,
+                    prompt_filter=prompt_filter,
+                    prompt_template=prompt_template,
+                    result_parser=result_parser,
+                    stop_condition=stop_condition,
+                    toolbox=toolbox,
+                    tool_filter=tool_filter,
+                )
+
+            checkpoint.save(1, result, history=memory, agents=team)
 
+        with checkpoint.step(1):
+            result = loop_reduce(
+                [manager],
+                result + loop_prompt + get_random_prompt("coworker"),
+                context=loop_context,
+                abac_context=abac_context,
+                agent_invoker=loop_retry,
+                agent_selector=agent_selector,
+                memory_factory=get_memory,
+                memory_maker=memory_maker,
+                prompt_filter=prompt_filter,
+                prompt_template=prompt_template,
+                result_parser=result_parser,
+                stop_condition=stop_condition,
+                toolbox=toolbox,
+                tool_filter=tool_filter,
+            )
+
+        checkpoint.save(2, result, done=True, history=memory, agents=team)
         report_output(result)
         return result
+
+
+def loop_tree_reduce(
+    agents: Agent | list[Agent],
+    value: str | list[str],
+    map_prompt: PromptType = "Summarize this section of the document:\n\n{chunk}",
+    combine_prompt: PromptType = "Combine these summaries into a single summary:\n\n{parts}",
+    context: AgentContext | None = None,
+    abac_context: OptionalInherited[ABACAttributes] = INHERIT,
+    agent_invoker: AgentInvoker = invoke_agent,
+    agent_selector: AgentSelector = select_loop,
+    chunker: Callable[[str], list[str]] = split_text,
+    fan_in: int = 2,
+    max_concurrency: int | None = 4,
+    part_separator: str = "\n\n",
+    prompt_template: OptionalInherited[PromptTemplate] = INHERIT,
+    result_parser: OptionalInherited[ResultParser] = INHERIT,
+    toolbox: OptionalInherited[Toolbox] = INHERIT,
+    tool_filter: OptionalInherited[ToolFilter] = INHERIT,
+) -> PromptType:
+    """
+    Split a long input into chunks, map each chunk through an agent, then combine the results `fan_in` at a time in
+    rounds until one result is left. This takes a logarithmic number of rounds and keeps each prompt bounded.
+
+    The map prompt is formatted with `chunk` and `index`, the combine prompt with `parts`, `level`, and `index`.
+    If `max_concurrency` is set, the calls in each round run on a thread pool.
+
+    The agents are invoked without their memory, so each call only sees its own chunk or parts.
+    """
+
+    if fan_in < 2:
+        raise ValueError("fan_in must be at least 2")
+
+    agents = [without_memory(agent) for agent in make_list(agents)]
+    context = context or {}
+    chunks = chunker(value) if isinstance(value, str) else value
+
+    with loopum(
+        abac_context=abac_context,
+        agent_invoker=agent_invoker,
+        agent_selector=agent_selector,
+        prompt_template=prompt_template,
+        result_parser=result_parser,
+        stop_condition=condition_threshold,
+        toolbox=toolbox,
+        tool_filter=tool_filter,
+    ) as loop_context:
+        with trace("tree_reduce", SpanKind.LOOP) as (report_args, report_output):
+            report_args(agents, chunks, context, fan_in=fan_in)
+
+            def run_node(index: int, prompt: PromptType, node_context: dict) -> str:
+                agent = loop_context.agent_selector(agents, index)
+                result = loop_context.agent_invoker(
+                    agent,
+                    prompt,
+                    context={
+                        **context,
+                        **node_context,
+                    },
+                    prompt_template=loop_context.prompt_template,
+                    toolbox=loop_context.toolbox,
+                )
+
+                if callable(loop_context.result_parser):
+                    with profile_phase("parse"):
+                        result = loop_context.result_parser(
+                            result,
+                            abac_context={
+                                "subject": agent.name,
+                            },
+                            agent=agent,
+                            toolbox=loop_context.toolbox,
+                            tool_filter=loop_context.tool_filter,
+                        )
+
+                return str(result)
+
+            def run_level(nodes: list[tuple[PromptType, dict]]) -> list[str]:
+                indices = range(len(nodes))
+                prompts = [prompt for prompt, _ in nodes]
+                node_contexts = [node_context for _, node_context in nodes]
+
+                if max_concurrency is None or len(nodes) < 2:
+                    return list(map(run_node, indices, prompts, node_contexts))
+
+                with ThreadPoolExecutor(
+                    max_workers=min(max_concurrency, len(nodes))
+                ) as executor:
+                    return list(
+                        map_with_context(
+                            executor, run_node, indices, prompts, node_contexts
+                        )
+                    )
+
+            results = run_level(
+                [
+                    (map_prompt, {"chunk": chunk, "index": index})
+                    for index, chunk in enumerate(chunks)
+                ]
+            )
+
+            level = 0
+            while len(results) > 1:
+                level += 1
+                groups = [
+                    results[i : i + fan_in] for i in range(0, len(results), fan_in)
+                ]
+                logger.debug(
+                    "combining %s results in %s groups at level %s",
+                    len(results),
+                    len(groups),
+                    level,
+                )
+
+                # a group with a single result is carried over to the next round without combining it
+                combined = run_level(
+                    [
+                        (
+                            combine_prompt,
+                            {
+                                "parts": part_separator.join(group),
+                                "level": level,
+                                "index": index,
+                            },
+                        )
+                        for index, group in enumerate(groups)
+                        if len(group) > 1
+                    ]
+                )
+                combined_iter = iter(combined)
+                results = [
+                    next(combined_iter) if len(group) > 1 else group[0]
+                    for group in groups
+                ]
+
+            result = results[0] if results else ""
+            report_output(result)
+            return result
@@ -20,6 +20,7 @@ from packit.types import (
     ToolFilter,
 )
 
+from .base import aloop_reduce
 from .builder import loop_prefix
 
 logger = getLogger(__name__)
@@ -140,3 +141,123 @@ def loop_refine(
         )
         report_output(result)
         return result
+
+
+async def aloop_converse(
+    agents: Agent | list[Agent],
+    prompt: str,
+    context: AgentContext | None = None,
+    abac_context: ABACAttributes | None = None,
+    agent_invoker: AgentInvoker = invoke_agent,
+    agent_selector: AgentSelector = select_loop,
+    memory_factory: MemoryFactory | None = make_limited_memory,
+    memory_maker: MemoryMaker | None = memory_order_width,
+    prompt_filter: PromptFilter | None = None,
+    prompt_template: PromptTemplate = get_random_prompt,
+    result_parser: ResultParser | None = None,
+    stop_condition: StopCondition = condition_threshold,
+    toolbox: Toolbox | None = None,
+    tool_filter: ToolFilter | None = None,
+) -> str | list[str]:
+    with trace("converse", SpanKind.LOOP) as (report_args, report_output):
+        report_args(agents, prompt, context)
+        result = await loop_prefix(
+            agents,
+            prompt,
+            "converse",
+            context=context,
+            base_loop=aloop_reduce,
+            abac_context=abac_context,
+            agent_invoker=agent_invoker,
+            agent_selector=agent_selector,
+            memory_factory=memory_factory,
+            memory_maker=memory_maker,
+            prompt_filter=prompt_filter,
+            prompt_template=prompt_template,
+            result_parser=result_parser,
+            stop_condition=stop_condition,
+            toolbox=toolbox,
+            tool_filter=tool_filter,
+        )
+        report_output(result)
+        return result
+
+
+async def aloop_extend(
+    agents: Agent | list[Agent],
+    prompt: str,
+    context: AgentContext | None = None,
+    abac_context: ABACAttributes | None = None,
+    agent_invoker: AgentInvoker = invoke_agent,
+    agent_selector: AgentSelector = select_loop,
+    memory_factory: MemoryFactory | None = make_limited_memory,
+    memory_maker: MemoryMaker | None = memory_order_width,
+    prompt_filter: PromptFilter | None = None,
+    prompt_template: PromptTemplate = get_random_prompt,
+    result_parser: ResultParser | None = None,
+    stop_condition: StopCondition = condition_threshold,
+    toolbox: Toolbox | None = None,
+    tool_filter: ToolFilter | None = None,
+) -> str | list[str]:
+    with trace("extend", SpanKind.LOOP) as (report_args, report_output):
+        report_args(agents, prompt, context)
+        result = await loop_prefix(
+            agents,
+            prompt,
+            "extend",
+            context=context,
+            base_loop=aloop_reduce,
+            abac_context=abac_context,
+            agent_invoker=agent_invoker,
+            agent_selector=agent_selector,
+            memory_factory=memory_factory,
+            memory_maker=memory_maker,
+            prompt_filter=prompt_filter,
+            prompt_template=prompt_template,
+            result_parser=result_parser,
+            stop_condition=stop_condition,
+            toolbox=toolbox,
+            tool_filter=tool_filter,
+        )
+        report_output(result)
+        return result
+
+
+async def aloop_refine(
+    agents: Agent | list[Agent],
+    prompt: str,
+    context: AgentContext | None = None,
+    abac_context: ABACAttributes | None = None,
+    agent_invoker: AgentInvoker = invoke_agent,
+    agent_selector: AgentSelector = select_loop,
+    memory_factory: MemoryFactory | None = make_limited_memory,
+    memory_maker: MemoryMaker | None = memory_order_width,
+    prompt_filter: PromptFilter | None = None,
+    prompt_template: PromptTemplate = get_random_prompt,
+    result_parser: ResultParser | None = None,
+    stop_condition: StopCondition = condition_threshold,
+    toolbox: Toolbox | None = None,
+    tool_filter: ToolFilter | None = None,
+) -> str | list[str]:
+    with trace("refine", SpanKind.LOOP) as (report_args, report_output):
+        report_args(agents, prompt, context)
+        result = await loop_prefix(
+            agents,
+            prompt,
+            "refine",
+            context=context,
+            base_loop=aloop_reduce,
+            abac_context=abac_context,
+            agent_invoker=agent_invoker,
+            agent_selector=agent_selector,
+            memory_factory=memory_factory,
+            memory_maker=memory_maker,
+            prompt_filter=prompt_filter,
+            prompt_template=prompt_template,
+            result_parser=result_parser,
+            stop_condition=stop_condition,
+            toolbox=toolbox,
+            tool_filter=tool_filter,
+        )
+        report_output(result)
+        return result
@@ -0,0 +1,332 @@
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from logging import getLogger
+from time import perf_counter
+from typing import Any, Callable, Mapping
+
+from packit.cache import ResponseCache
+from packit.context import check_deadline, submit_with_context
+from packit.tracing import SpanKind, trace
+from packit.utils import hash_dict, make_list
+
+logger = getLogger(__name__)
+
+# map each keyword argument to the node or pipeline input that provides it, or a list of them
+NodeInputs = Mapping[str, str | list[str]]
+
+
+class PipelineNode:
+    cache: bool
+    fn: Callable[..., Any]
+    inputs: dict[str, str | list[str]]
+    kwargs: dict[str, Any]
+    name: str
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[..., Any],
+        inputs: NodeInputs | None = None,
+        cache: bool = True,
+        kwargs: dict[str, Any] | None = None,
+    ):
+        self.cache = cache
+        self.fn = fn
+        self.inputs = dict(inputs or {})
+        self.kwargs = kwargs or {}
+        self.name = name
+
+    def sources(self) -> list[str]:
+        sources = []
+        for source in self.inputs.values():
+            for name in make_list(source):
+                if name not in sources:
+                    sources.append(name)
+
+        return sources
+
+    def resolve(self, outputs: dict[str, Any]) -> dict[str, Any]:
+        """
+        Get the keyword arguments for this node from the outputs of its sources.
+        """
+
+        return {
+            param: (
+                [outputs[name] for name in source]
+                if isinstance(source, list)
+                else outputs[source]
+            )
+            for param, source in self.inputs.items()
+        }
+
+
+class NodeTiming:
+    __slots__ = ("start", "end", "cached")
+
+    def __init__(self, start: float, end: float, cached: bool = False):
+        self.start = start
+        self.end = end
+        self.cached = cached
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+class PipelineResult:
+    """
+    Outputs and timings from a pipeline run. The critical path is the chain of dependent nodes that took the longest,
+    which bounds the wall time no matter how many nodes run at once.
+    """
+
+    critical_path: list[str]
+    critical_time: float
+    outputs: dict[str, Any]
+    timings: dict[str, NodeTiming]
+    wall_time: float
+
+    def __init__(
+        self,
+        outputs: dict[str, Any],
+        timings: dict[str, NodeTiming],
+        critical_path: list[str],
+        critical_time: float,
+        wall_time: float,
+    ):
+        self.critical_path = critical_path
+        self.critical_time = critical_time
+        self.outputs = outputs
+        self.timings = timings
+        self.wall_time = wall_time
+
+    def __getitem__(self, name: str) -> Any:
+        return self.outputs[name]
+
+    def report(self) -> dict[str, Any]:
+        return {
+            "critical_path": self.critical_path,
+            "critical_time": self.critical_time,
+            "wall_time": self.wall_time,
+            "nodes": {
+                name: {
+                    "start": timing.start,
+                    "duration": timing.duration,
+                    "cached": timing.cached,
+                }
+                for name, timing in self.timings.items()
+            },
+        }
+
+
+class Pipeline:
+    """
+    Run a graph of loops and groups, passing the output of each node to the nodes that depend on it. Nodes whose
+    inputs are ready run at the same time, up to `max_concurrency` at once.
+
+    If a cache is given, node outputs will be cached by the node name, its other arguments, and the values of its
+    inputs. Nodes whose other arguments cannot be serialized, like agents or groups, are not cached.
+    """
+
+    cache: ResponseCache | None
+    max_concurrency: int
+    nodes: dict[str, PipelineNode]
+
+    def __init__(self, max_concurrency: int = 4, cache: ResponseCache | None = None):
+        self.cache = cache
+        self.max_concurrency = max_concurrency
+        self.nodes = {}
+
+    def add(
+        self,
+        name: str,
+        fn: Callable[..., Any],
+        inputs: NodeInputs | None = None,
+        cache: bool = True,
+        **kwargs,
+    ) -> "Pipeline":
+        """
+        Add a node that calls `fn` with `kwargs` and the outputs of its `inputs`. Returns the pipeline, so calls can be
+        chained.
+        """
+
+        if name in self.nodes:
+            raise ValueError(f"Node {name} already exists")
+
+        self.nodes[name] = PipelineNode(
+            name, fn, inputs=inputs, cache=cache, kwargs=kwargs
+        )
+        return self
+
+    def order(self, input_names: list[str] | None = None) -> list[str]:
+        """
+        Sort the nodes so that each one comes after its sources. Raises a ValueError if a source is missing or the
+        graph has a cycle.
+        """
+
+        shadowed = set(self.nodes) & set(input_names or [])
+        if shadowed:
+            raise ValueError(f"Pipeline inputs have the same name as nodes: {shadowed}")
+
+        known = set(self.nodes) | set(input_names or [])
+        for node in self.nodes.values():
+            for source in node.sources():
+                if source not in known:
+                    raise ValueError(f"Unknown source {source} for node {node.name}")
+
+        order = []
+        remaining = {
+            name: [source for source in node.sources() if source in self.nodes]
+            for name, node in self.nodes.items()
+        }
+        while remaining:
+            ready = [name for name, sources in remaining.items() if len(sources) == 0]
+            if len(ready) == 0:
+                raise ValueError(f"Pipeline has a cycle between {list(remaining)}")
+
+            for name in ready:
+                order.append(name)
+                del remaining[name]
+
+            for sources in remaining.values():
+                sources[:] = [source for source in sources if source not in ready]
+
+        return order
+
+    def run(self, inputs: dict[str, Any] | None = None) -> PipelineResult:
+        inputs = inputs or {}
+        order = self.order(list(inputs))
+
+        with trace("pipeline", SpanKind.LOOP) as (report_args, report_output):
+            report_args(order, inputs)
+
+            outputs = dict(inputs)
+            timings: dict[str, NodeTiming] = {}
+            start = perf_counter()
+
+            waiting = {
+                name: {source for source in node.sources() if source in self.nodes}
+                for name, node in self.nodes.items()
+            }
+            ready = deque(name for name in order if len(waiting[name]) == 0)
+            running: dict[Future, tuple[str, str | None]] = {}
+
+            def finish(name: str, output: Any, timing: NodeTiming) -> None:
+                outputs[name] = output
+                timings[name] = timing
+                for other in order:
+                    if name in waiting[other]:
+                        waiting[other].discard(name)
+                        if len(waiting[other]) == 0:
+                            ready.append(other)
+
+            executor = ThreadPoolExecutor(max_workers=max(1, self.max_concurrency))
+            try:
+                while ready or running:
+                    check_deadline()
+
+                    while ready:
+                        node = self.nodes[ready.popleft()]
+                        kwargs = node.resolve(outputs)
+
+                        key = self.cache_key(node, kwargs)
+                        cached = self.cache.get(key) if key is not None else None  # type: ignore
+                        if cached is not None:
+                            now = perf_counter() - start
+                            finish(node.name, cached, NodeTiming(now, now, cached=True))
+                            continue
+
+                        future = submit_with_context(
+                            executor, self.run_node, node, kwargs, start
+                        )
+                        running[future] = (node.name, key)
+
+                    if not running:
+                        continue
+
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        name, key = running.pop(future)
+                        try:
+                            output, timing = future.result()
+                        except Exception:
+                            logger.exception("error running pipeline node %s", name)
+                            raise
+
+                        if key is not None and output is not None:
+                            self.cache.set(key, output)  # type: ignore
+
+                        finish(name, output, timing)
+            finally:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+            critical_path, critical_time = self.critical_path(order, timings)
+            result = PipelineResult(
+                {name: outputs[name] for name in order},
+                timings,
+                critical_path,
+                critical_time,
+                perf_counter() - start,
+            )
+
+            report_output(result.report())
+            return result
+
+    def run_node(
+        self, node: PipelineNode, kwargs: dict[str, Any], start: float
+    ) -> tuple[Any, NodeTiming]:
+        with trace(node.name, SpanKind.TASK) as (report_args, report_output):
+            report_args(**kwargs)
+
+            node_start = perf_counter() - start
+            output = node.fn(**node.kwargs, **kwargs)
+            timing = NodeTiming(node_start, perf_counter() - start)
+
+            report_output(output)
+            return output, timing
+
+    def cache_key(self, node: PipelineNode, kwargs: dict[str, Any]) -> str | None:
+        if self.cache is None or not node.cache:
+            return None
+
+        try:
+            # the node arguments must serialize to the same value every time, so do not fall back to str
+            node_key = hash_dict(node.kwargs)
+        except (TypeError, ValueError):
+            logger.debug("not caching node %s with unserializable arguments", node.name)
+            return None
+
+        return hash_dict(
+            {"node": node.name, "kwargs": node_key, "inputs": kwargs}, default=str
+        )
+
+    def critical_path(
+        self, order: list[str], timings: dict[str, NodeTiming]
+    ) -> tuple[list[str], float]:
+        """
+        Find the chain of dependent nodes with the longest total duration.
+        """
+
+        if len(order) == 0:
+            return [], 0.0
+
+        finish: dict[str, float] = {}
+        previous: dict[str, str | None] = {}
+        for name in order:
+            sources = [
+                source for source in self.nodes[name].sources() if source in self.nodes
+            ]
+            slowest = max(sources, key=lambda source: finish[source], default=None)
+            finish[name] = timings[name].duration + (
+                finish[slowest] if slowest is not None else 0.0
+            )
+            previous[name] = slowest
+
+        last: str | None = max(order, key=lambda name: finish[name])
+        total = finish[last]  # type: ignore
+
+        path = []
+        while last is not None:
+            path.append(last)
+            last = previous[last]
+
+        return list(reversed(path)), total
@@ -1,10 +1,15 @@
+from collections import Counter
+from functools import partial
 from logging import getLogger
+from typing import Any, Callable
 
 from packit.agent import Agent, AgentContext, invoke_agent
+from packit.checkpoint import loop_checkpoint
 from packit.conditions import condition_or, condition_threshold
 from packit.context import INHERIT, loopum
 from packit.memory import make_limited_memory, memory_order_width
 from packit.results import multi_function_or_str_result
+from packit.results.function import FunctionCallDetector
 from packit.selectors import select_leader
 from packit.toolbox import Toolbox
 from packit.tracing import SpanKind, trace
@@ -23,7 +28,7 @@ from packit.types import (
 )
 from packit.utils import could_be_json, make_list
 
-from .base import loop_reduce
+from .base import aloop_reduce, loop_reduce
 
 logger = getLogger(__name__)
 
@@ -50,6 +55,7 @@ def loop_retry(
     """
 
     agent = select_leader(make_list(agents), 0)
+    checkpoint = loop_checkpoint("retry")
 
     last_error: Exception | None = None
     success: bool = False
@@ -70,6 +76,12 @@ def loop_retry(
         with trace("retry", SpanKind.LOOP) as (report_args, report_output):
             report_args(agent, prompt, context)
 
+            saved = checkpoint.load()
+            if saved is not None and saved["done"]:
+                checkpoint.restore(saved, agents=[agent])
+                report_output(saved["result"])
+                return saved["result"]
+
             def parse_or_error(
                 value: PromptType,
                 **kwargs,
@@ -87,6 +99,8 @@ def loop_retry(
                         parsed = value
 
                     success = True
+                    # saved before the step, so a resumed run never repeats a successful parse
+                    checkpoint.save(0, parsed, done=True, agents=[agent])
                     return parsed
                 except Exception as e:
                     logger.exception("Error parsing result: %s", value)
@@ -99,7 +113,306 @@ def loop_retry(
             )
 
             # loop until the prompt succeeds
-            result = loop_reduce(
+            with checkpoint.scope():
+                result = loop_reduce(
+                    agents=agent,
+                    prompt=prompt,
+                    context=context,
+                    abac_context=loop_context.abac_context,
+                    agent_invoker=loop_context.agent_invoker,
+                    agent_selector=loop_context.agent_selector,
+                    memory_factory=loop_context.memory_factory,
+                    memory_maker=loop_context.memory_maker,
+                    prompt_filter=loop_context.prompt_filter,
+                    prompt_template=loop_context.prompt_template,
+                    result_parser=parse_or_error,
+                    stop_condition=stop_condition_or_success,
+                    toolbox=loop_context.toolbox,
+                    tool_filter=loop_context.tool_filter,
+                    save_context=False,
+                )
+
+            if success:
+                report_output(result)
+                return result
+
+            if last_error:
+                raise last_error
+
+            # this is very difficult to reach, but here for completeness
+            raise ValueError(
+                "No error was raised, but the result could not be parsed."
+            )  # pragma: no cover
+
+
+def loop_tool(
+    agents: Agent | list[Agent],
+    prompt: PromptType,
+    context: AgentContext | None = None,
+    abac_context: ABACAttributes | None = INHERIT,
+    agent_invoker: AgentInvoker = invoke_agent,
+    agent_selector: AgentSelector = select_leader,
+    memory_factory: MemoryFactory | None = make_limited_memory,
+    memory_maker: MemoryMaker | None = memory_order_width,
+    prompt_filter: PromptFilter | None = INHERIT,
+    result_parser: ResultParser = multi_function_or_str_result,
+    stop_condition: StopCondition = condition_threshold,
+    toolbox: Toolbox | None = INHERIT,
+    tool_filter: ToolFilter | None = INHERIT,
+    stream_tool_calls: bool = False,
+) -> PromptType:
+    """
+    Loop using a single agent, parsing the result as a function call until it is no longer JSON.
+
+    If `stream_tool_calls` is set, the response will be streamed and generation stopped as soon as the first complete
+    function call has been received. The `agent_invoker` must accept a `stream_cutoff` argument. Models that return
+    more than one call should put them in a JSON list, since only the first object will be used.
+    """
+
+    agent = agent_selector(make_list(agents), 0)
+    checkpoint = loop_checkpoint("tool")
+
+    if stream_tool_calls:
+        agent_invoker = partial(agent_invoker, stream_cutoff=FunctionCallDetector)
+
+    with trace("tool", SpanKind.LOOP) as (report_args, report_output):
+        report_args(agent, prompt, context)
+
+        outer_result_parser = result_parser
+        outer_toolbox = toolbox
+
+        def result_parser_with_tools(
+            value: str,
+            result_parser=None,
+            toolbox=None,
+            **kwargs,
+        ) -> str:
+            inner_result_parser = result_parser or outer_result_parser
+            inner_toolbox = toolbox or outer_toolbox
+
+            if callable(inner_result_parser):
+                value = inner_result_parser(
+                    value,
+                    result_parser=inner_result_parser,
+                    toolbox=inner_toolbox,
+                    **kwargs,
+                )
+
+            return value
+
+        step = 0
+        result = prompt
+
+        saved = checkpoint.load()
+        if saved is not None:
+            checkpoint.restore(saved, agents=[agent])
+            step = saved["step"]
+            result = saved["result"]
+
+        # always run once, then keep going while the tools return more calls
+        while step == 0 or could_be_json(result):
+            with checkpoint.step(step):
+                result = loop_retry(
+                    agent,
+                    result,
+                    context=context,
+                    abac_context=abac_context,
+                    agent_invoker=agent_invoker,
+                    agent_selector=agent_selector,
+                    memory_factory=memory_factory,
+                    memory_maker=memory_maker,
+                    prompt_filter=prompt_filter,
+                    result_parser=result_parser_with_tools,
+                    stop_condition=stop_condition,
+                    toolbox=toolbox,
+                    tool_filter=tool_filter,
+                )
+
+            step += 1
+            checkpoint.save(step, result, agents=[agent])
+
+        report_output(result)
+        return result
+
+
+class CascadeStats:
+    """
+    Counts which tier of a cascade answered each prompt, so the tiers can be tuned.
+    """
+
+    answered: Counter[str]
+    failed: Counter[str]
+    rejected: Counter[str]
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.answered = Counter()
+        self.failed = Counter()
+        self.rejected = Counter()
+
+    def summary(self) -> dict[str, dict[str, int]]:
+        return {
+            "answered": dict(self.answered),
+            "failed": dict(self.failed),
+            "rejected": dict(self.rejected),
+        }
+
+
+def loop_cascade(
+    tiers: list[Agent],
+    prompt: PromptType,
+    context: AgentContext | None = None,
+    abac_context: ABACAttributes | None = INHERIT,
+    agent_invoker: AgentInvoker = invoke_agent,
+    confidence_check: Callable[[Any], bool] | None = None,
+    max_failures: int = 2,
+    memory_factory: MemoryFactory | None = make_limited_memory,
+    memory_maker: MemoryMaker | None = memory_order_width,
+    prompt_filter: PromptFilter | None = INHERIT,
+    prompt_template: PromptTemplate | None = INHERIT,
+    result_parser: ResultParser | None = INHERIT,
+    stats: CascadeStats | None = None,
+    toolbox: Toolbox | None = INHERIT,
+    tool_filter: ToolFilter | None = INHERIT,
+) -> PromptType:
+    """
+    Retry a prompt with each tier of agents in order, usually from the smallest model to the largest. Each tier gets
+    `max_failures` attempts to produce a result that can be parsed before the cascade moves on to the next tier.
+
+    If a `confidence_check` is given, parsed results that it rejects are also sent to the next tier. The last tier is
+    always trusted.
+
+    Pass a `CascadeStats` to count which tier answered, failed, or was rejected.
+    """
+
+    if len(tiers) == 0:
+        raise ValueError("At least one tier is required.")
+
+    last_error: Exception | None = None
+
+    with trace("cascade", SpanKind.LOOP) as (report_args, report_output):
+        report_args(tiers, prompt, context)
+
+        for tier, agent in enumerate(tiers):
+            try:
+                result = loop_retry(
+                    agent,
+                    prompt,
+                    context=context,
+                    abac_context=abac_context,
+                    agent_invoker=agent_invoker,
+                    memory_factory=memory_factory,
+                    memory_maker=memory_maker,
+                    prompt_filter=prompt_filter,
+                    prompt_template=prompt_template,
+                    result_parser=result_parser,
+                    stop_condition=partial(condition_threshold, max_failures - 1),
+                    toolbox=toolbox,
+                    tool_filter=tool_filter,
+                )
+            except Exception as e:
+                logger.warning("cascade tier %s (%s) failed: %s", tier, agent.name, e)
+                last_error = e
+                if stats is not None:
+                    stats.failed[agent.name] += 1
+
+                continue
+
+            last_tier = tier == len(tiers) - 1
+            if callable(confidence_check) and not last_tier:
+                if not confidence_check(result):
+                    logger.info(
+                        "cascade tier %s (%s) was not confident: %s",
+                        tier,
+                        agent.name,
+                        result,
+                    )
+                    if stats is not None:
+                        stats.rejected[agent.name] += 1
+
+                    continue
+
+            if stats is not None:
+                stats.answered[agent.name] += 1
+
+            report_output(result)
+            return result
+
+        raise last_error  # type: ignore
+
+
+async def aloop_retry(
+    agents: Agent | list[Agent],
+    prompt: PromptType,
+    context: AgentContext | None = None,
+    abac_context: ABACAttributes | None = INHERIT,
+    agent_invoker: AgentInvoker = invoke_agent,
+    agent_selector: AgentSelector = select_leader,
+    memory_factory: MemoryFactory | None = make_limited_memory,
+    memory_maker: MemoryMaker | None = memory_order_width,
+    prompt_filter: PromptFilter | None = INHERIT,
+    prompt_template: PromptTemplate | None = INHERIT,
+    result_parser: ResultParser | None = INHERIT,
+    stop_condition: StopCondition = condition_threshold,
+    toolbox: Toolbox | None = INHERIT,
+    tool_filter: ToolFilter | None = INHERIT,
+) -> PromptType:
+    """
+    Async version of `loop_retry`.
+    """
+
+    agent = select_leader(make_list(agents), 0)
+
+    last_error: Exception | None = None
+    success: bool = False
+
+    with loopum(
+        abac_context=abac_context,
+        agent_invoker=agent_invoker,
+        agent_selector=agent_selector,
+        memory_factory=memory_factory,
+        memory_maker=memory_maker,
+        prompt_filter=prompt_filter,
+        prompt_template=prompt_template,
+        result_parser=result_parser,
+        stop_condition=stop_condition,
+        toolbox=toolbox,
+        tool_filter=tool_filter,
+    ) as loop_context:
+        with trace("retry", SpanKind.LOOP) as (report_args, report_output):
+            report_args(agent, prompt, context)
+
+            def parse_or_error(
+                value: PromptType,
+                **kwargs,
+            ) -> str:
+                nonlocal last_error
+                nonlocal success
+
+                try:
+                    if callable(loop_context.result_parser):
+                        parsed = loop_context.result_parser(
+                            value,
+                            **kwargs,
+                        )
+                    else:
+                        parsed = value
+
+                    success = True
+                    return parsed
+                except Exception as e:
+                    logger.exception("Error parsing result: %s", value)
+                    last_error = e
+                    return f"There was an error with your last response, please try again: {e}"
+
+            stop_condition_or_success = condition_or(
+                loop_context.stop_condition, lambda *args, **kwargs: success
+            )
+
+            # loop until the prompt succeeds
+            result = await aloop_reduce(
                 agents=agent,
                 prompt=prompt,
                 context=context,
@@ -130,7 +443,7 @@ def loop_retry(
             )  # pragma: no cover
 
 
-def loop_tool(
+async def aloop_tool(
     agents: Agent | list[Agent],
     prompt: PromptType,
     context: AgentContext | None = None,
@@ -146,7 +459,7 @@ def loop_tool(
     tool_filter: ToolFilter | None = INHERIT,
 ) -> PromptType:
     """
-    Loop using a single agent, parsing the result as a function call until it is no longer JSON.
+    Async version of `loop_tool`. The tools themselves are still called synchronously by the result parser.
     """
 
     agent = agent_selector(make_list(agents), 0)
@@ -176,7 +489,7 @@ def loop_tool(
 
             return value
 
-        result = loop_retry(
+        result = await aloop_retry(
             agent,
             prompt,
             context=context,
@@ -193,7 +506,7 @@ def loop_tool(
         )
 
         while could_be_json(result):
-            result = loop_retry(
+            result = await aloop_retry(
                 agent,
                 result,
                 context=context,
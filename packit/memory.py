@@ -1,7 +1,10 @@
 from collections import deque
-from typing import MutableSequence
+from logging import getLogger
+from typing import Callable, Iterator, MutableSequence
 
-from packit.types import MemoryType
+from packit.types import MemoryType, TokenEstimator
+
+logger = getLogger(__name__)
 
 
 def make_infinite_memory():
@@ -12,6 +15,149 @@ def make_limited_memory(limit=10):
     return deque(maxlen=limit)
 
 
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens in a string, using the common rule of thumb of four characters per token.
+    """
+    return (len(text) + 3) // 4
+
+
+def message_text(message: MemoryType) -> str:
+    if isinstance(message, str):
+        return message
+
+    return str(message.content)
+
+
+class TokenMemory(MutableSequence[MemoryType]):
+    """
+    Memory limited by an estimated token count rather than a number of messages. When the budget is exceeded, the
+    oldest messages that are not pinned will be removed first. The newest message is always kept, even if it does not
+    fit within the budget on its own. Token counts are estimated once, when each message is added.
+    """
+
+    budget: int
+    counts: list[int]
+    estimator: TokenEstimator
+    messages: list[MemoryType]
+    pins: list[bool]
+    pin_filter: Callable[[MemoryType], bool] | None
+    total: int
+
+    def __init__(
+        self,
+        budget: int,
+        estimator: TokenEstimator = estimate_tokens,
+        pin_filter: Callable[[MemoryType], bool] | None = None,
+    ):
+        self.budget = budget
+        self.counts = []
+        self.estimator = estimator
+        self.messages = []
+        self.pins = []
+        self.pin_filter = pin_filter
+        self.total = 0
+
+    def __getitem__(self, index):
+        return self.messages[index]
+
+    def __setitem__(self, index, message):
+        if isinstance(index, slice):
+            raise TypeError("TokenMemory does not support slice assignment")
+
+        index = range(len(self.messages))[index]
+        count = self.estimator(message_text(message))
+        self.total += count - self.counts[index]
+        self.messages[index] = message
+        self.counts[index] = count
+        self.pins[index] = False
+        self.evict(keep=index)
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            for i in sorted(range(*index.indices(len(self))), reverse=True):
+                del self[i]
+            return
+
+        self.total -= self.counts[index]
+        del self.messages[index]
+        del self.counts[index]
+        del self.pins[index]
+
+    def __iter__(self) -> Iterator[MemoryType]:
+        return iter(self.messages)
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def insert(self, index: int, message: MemoryType) -> None:
+        # find the position list.insert will use, so the new message can be kept during eviction
+        length = len(self.messages)
+        index = max(0, length + index) if index < 0 else min(index, length)
+
+        count = self.estimator(message_text(message))
+        self.messages.insert(index, message)
+        self.counts.insert(index, count)
+        self.pins.insert(index, False)
+        self.total += count
+        self.evict(keep=index)
+
+    def pin(self, message: MemoryType) -> None:
+        """
+        Pin a message that is already in memory so it will not be evicted. The pin is removed with the message.
+        """
+
+        for index, existing in enumerate(self.messages):
+            if existing is message:
+                self.pins[index] = True
+                return
+
+        raise ValueError("message is not in memory")
+
+    def is_pinned(self, index: int) -> bool:
+        if self.pins[index]:
+            return True
+
+        if callable(self.pin_filter):
+            return self.pin_filter(self.messages[index])
+
+        return False
+
+    def evict(self, keep: int | None = None) -> None:
+        """
+        Remove the oldest unpinned messages until the memory fits within the budget, other than the message at the
+        `keep` index.
+        """
+
+        index = 0
+        while self.total > self.budget and index < len(self.messages):
+            if index == keep or self.is_pinned(index):
+                index += 1
+            else:
+                del self[index]
+                if keep is not None and index < keep:
+                    keep -= 1
+
+        if keep is not None and self.counts[keep] > self.budget:
+            logger.warning(
+                "message of %s tokens is larger than the memory budget of %s tokens",
+                self.counts[keep],
+                self.budget,
+            )
+
+
+def make_token_memory(
+    budget: int = 2048,
+    estimator: TokenEstimator = estimate_tokens,
+    pin_filter: Callable[[MemoryType], bool] | None = None,
+) -> TokenMemory:
+    """
+    Make a memory limited by the number of tokens. Use `functools.partial` to set the budget when using this as a
+    memory factory.
+    """
+    return TokenMemory(budget, estimator=estimator, pin_filter=pin_filter)
+
+
 def memory_order_width(memory: MutableSequence[MemoryType], prompt: MemoryType):
     """
     Width-first memory order.
@@ -0,0 +1,2 @@
+from .limits import *  # noqa
+from .hedge import *  # noqa
@@ -0,0 +1,371 @@
+from asyncio import FIRST_COMPLETED as ASYNC_FIRST_COMPLETED
+from asyncio import CancelledError, Task, create_task
+from asyncio import wait as async_wait
+from bisect import bisect_left
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from logging import getLogger
+from math import log10
+from threading import Lock
+from time import monotonic
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator
+
+from packit.clients import accepts_timeout
+
+from .limits import model_args
+
+logger = getLogger(__name__)
+
+
+class LatencyHistogram:
+    """
+    Histogram of request latencies with logarithmic buckets, used to estimate percentiles in constant memory.
+    """
+
+    bounds: list[float]
+    buckets: list[int]
+    count: int
+
+    def __init__(
+        self,
+        min_latency: float = 0.01,
+        max_latency: float = 600.0,
+        buckets_per_decade: int = 20,
+    ):
+        decades = log10(max_latency / min_latency)
+        steps = int(decades * buckets_per_decade) + 1
+
+        self.bounds = [
+            min_latency * 10 ** (i / buckets_per_decade) for i in range(steps)
+        ]
+        self.buckets = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.lock = Lock()
+
+    def record(self, latency: float) -> None:
+        with self.lock:
+            self.buckets[bisect_left(self.bounds, latency)] += 1
+            self.count += 1
+
+    def percentile(self, percentile: float) -> float | None:
+        """
+        Estimate a latency percentile, as the upper bound of the bucket that contains it. Returns None if there
+        are no samples.
+        """
+
+        with self.lock:
+            if self.count == 0:
+                return None
+
+            target = percentile * self.count
+            seen = 0
+            for i, count in enumerate(self.buckets):
+                seen += count
+                if seen >= target and count > 0:
+                    return self.bounds[min(i, len(self.bounds) - 1)]
+
+            return self.bounds[-1]  # pragma: no cover
+
+
+def close_stream(result: tuple[Iterator[Any], Any]) -> None:
+    """
+    Close the stream from a backend that lost the race, if it can be closed.
+    """
+
+    close = getattr(result[0], "close", None)
+    if callable(close):
+        close()
+
+
+async def aclose_stream(result: tuple[AsyncIterator[Any], Any]) -> None:
+    aclose = getattr(result[0], "aclose", None)
+    if callable(aclose):
+        await aclose()
+
+
+class HedgedModel:
+    """
+    Send each request to the first backend and, if it has not replied by the hedge delay, send a duplicate request to
+    the next backend. Whichever backend replies first wins and the others are cancelled. If a backend fails, the next
+    one is tried right away.
+
+    The hedge delay is the chosen latency percentile of the first backend, once it has enough samples. Async
+    requests are cancelled properly, sync requests that lose the race cannot be interrupted and will finish in the
+    background.
+
+    Streams are hedged on the time to their first chunk, which is tracked in a separate set of histograms. Once a
+    backend has sent its first chunk, the rest of the stream comes from that backend.
+    """
+
+    backends: list[Any]
+    histograms: list[LatencyHistogram]
+    stream_histograms: list[LatencyHistogram]
+    hedges: int
+    wins: list[int]
+
+    def __init__(
+        self,
+        backends: list[Any],
+        percentile: float = 0.95,
+        initial_delay: float = 1.0,
+        min_samples: int = 20,
+        max_hedges: int = 1,
+        max_workers: int = 32,
+    ):
+        if len(backends) == 0:
+            raise ValueError("At least one backend is required.")
+
+        self.backends = backends
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.histograms = [LatencyHistogram() for _ in backends]
+        self.stream_histograms = [LatencyHistogram() for _ in backends]
+        self.initial_delay = initial_delay
+        self.max_hedges = max_hedges
+        self.min_samples = min_samples
+        self.percentile = percentile
+
+        # metrics
+        self.hedges = 0
+        self.wins = [0] * len(backends)
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "backends":
+            raise AttributeError(name)
+
+        return getattr(self.backends[0], name)
+
+    @property
+    def accepts_timeout(self) -> bool:
+        return all(accepts_timeout(backend) for backend in self.backends)
+
+    @property
+    def max_backends(self) -> int:
+        return min(len(self.backends), self.max_hedges + 1)
+
+    def hedge_delay(self, histograms: list[LatencyHistogram] | None = None) -> float:
+        """
+        Get the current hedge delay, from the latency histogram of the first backend.
+        """
+
+        histogram = (histograms or self.histograms)[0]
+        if histogram.count < self.min_samples:
+            return self.initial_delay
+
+        return histogram.percentile(self.percentile) or self.initial_delay
+
+    def race(
+        self,
+        call: Callable[[int], Any],
+        delay: float,
+        discard: Callable[[Any], None] | None = None,
+    ) -> Any:
+        """
+        Call each backend in turn on the worker threads, starting the next one when the others have not finished by
+        the delay or have failed, and return the first result. Results from the losers are passed to `discard` as
+        they finish.
+        """
+
+        futures: dict[Future, int] = {}
+        errors: list[Exception] = []
+
+        def discard_loser(future: Future) -> None:
+            if (
+                discard is not None
+                and not future.cancelled()
+                and future.exception() is None
+            ):
+                discard(future.result())
+
+        def launch() -> None:
+            index = len(futures)
+            if index > 0:
+                self.hedges += 1
+                logger.debug("sending hedged request to backend %s", index)
+
+            futures[self.executor.submit(call, index)] = index
+
+        launch()
+        pending = set(futures.keys())
+        while pending:
+            timeout = delay if len(futures) < self.max_backends else None
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                error = future.exception()
+                if error is None:
+                    for loser in futures:
+                        if loser is not future:
+                            loser.cancel()
+                            loser.add_done_callback(discard_loser)
+
+                    self.wins[futures[future]] += 1
+                    return future.result()
+
+                logger.warning("hedged backend %s failed: %s", futures[future], error)
+                errors.append(error)  # type: ignore
+
+            if len(futures) < self.max_backends and (not done or not pending):
+                launch()
+                pending = {future for future in futures if not future.done()}
+
+        raise errors[0]
+
+    async def arace(
+        self,
+        call: Callable[[int], Awaitable[Any]],
+        delay: float,
+        discard: Callable[[Any], Awaitable[None]] | None = None,
+    ) -> Any:
+        """
+        Call each backend in turn as tasks, like `race`. The losers are cancelled, and results from losers that
+        finished at the same time as the winner are passed to `discard`.
+        """
+
+        tasks: dict[Task, int] = {}
+        errors: list[BaseException] = []
+
+        def launch() -> None:
+            index = len(tasks)
+            if index > 0:
+                self.hedges += 1
+                logger.debug("sending hedged request to backend %s", index)
+
+            tasks[create_task(call(index))] = index
+
+        launch()
+        pending = set(tasks.keys())
+        try:
+            while pending:
+                timeout = delay if len(tasks) < self.max_backends else None
+                done, pending = await async_wait(
+                    pending, timeout=timeout, return_when=ASYNC_FIRST_COMPLETED
+                )
+
+                for task in done:
+                    error = task.exception()
+                    if error is None:
+                        # cancel the others before awaiting anything, so none of them can finish unseen
+                        for loser in pending:
+                            loser.cancel()
+
+                        if discard is not None:
+                            for loser in done:
+                                if loser is not task and loser.exception() is None:
+                                    await discard(loser.result())
+
+                        self.wins[tasks[task]] += 1
+                        return task.result()
+
+                    logger.warning("hedged backend %s failed: %s", tasks[task], error)
+                    errors.append(error)
+
+                if len(tasks) < self.max_backends and (not done or not pending):
+                    launch()
+                    pending = {task for task in tasks if not task.done()}
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        raise errors[0]
+
+    def invoke(self, input: Any, config: Any | None = None, **kwargs) -> Any:
+        def call(index: int) -> Any:
+            start = monotonic()
+            result = self.backends[index].invoke(*model_args(input, config), **kwargs)
+            self.histograms[index].record(monotonic() - start)
+            return result
+
+        return self.race(call, self.hedge_delay())
+
+    async def ainvoke(self, input: Any, config: Any | None = None, **kwargs) -> Any:
+        async def call(index: int) -> Any:
+            start = monotonic()
+            try:
+                result = await self.backends[index].ainvoke(
+                    *model_args(input, config), **kwargs
+                )
+            except CancelledError:
+                # the elapsed time is a lower bound on the latency of a request that lost the race, which keeps
+                # slow requests in the histogram like the sync losers that finish in the background
+                self.histograms[index].record(monotonic() - start)
+                raise
+
+            self.histograms[index].record(monotonic() - start)
+            return result
+
+        return await self.arace(call, self.hedge_delay())
+
+    def stream(self, input: Any, config: Any | None = None, **kwargs) -> Iterator[Any]:
+        """
+        Stream the response from whichever backend sends the first chunk first. Only the first chunk is hedged, the
+        other streams are closed once a backend has won, and errors after the first chunk are raised.
+        """
+
+        def call(index: int) -> tuple[Iterator[Any], Any]:
+            start = monotonic()
+            stream = iter(
+                self.backends[index].stream(*model_args(input, config), **kwargs)
+            )
+            first = next(stream, None)
+            self.stream_histograms[index].record(monotonic() - start)
+            return stream, first
+
+        stream, first = self.race(
+            call, self.hedge_delay(self.stream_histograms), discard=close_stream
+        )
+        try:
+            if first is not None:
+                yield first
+
+            yield from stream
+        finally:
+            close_stream((stream, first))
+
+    async def astream(
+        self, input: Any, config: Any | None = None, **kwargs
+    ) -> AsyncIterator[Any]:
+        async def call(index: int) -> tuple[AsyncIterator[Any], Any]:
+            start = monotonic()
+            stream = aiter(
+                self.backends[index].astream(*model_args(input, config), **kwargs)
+            )
+            try:
+                first = await anext(stream, None)
+            except CancelledError:
+                self.stream_histograms[index].record(monotonic() - start)
+                await aclose_stream((stream, None))
+                raise
+
+            self.stream_histograms[index].record(monotonic() - start)
+            return stream, first
+
+        stream, first = await self.arace(
+            call, self.hedge_delay(self.stream_histograms), discard=aclose_stream
+        )
+        try:
+            if first is not None:
+                yield first
+
+            async for chunk in stream:
+                yield chunk
+        finally:
+            await aclose_stream((stream, first))
+
+    def batch(
+        self, inputs: list[Any], config: Any | None = None, **kwargs
+    ) -> list[Any]:
+        """
+        Send each input as a separate hedged request.
+        """
+
+        max_workers = (config or {}).get("max_concurrency") or len(inputs) or 1
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(
+                executor.map(lambda input: self.invoke(input, **kwargs), inputs)
+            )
+
+    def close(self) -> None:
+        """
+        Stop the worker threads without waiting for requests that lost the race.
+        """
+
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,502 @@
+from asyncio import Event as AsyncEvent
+from asyncio import TimeoutError as AsyncTimeoutError
+from asyncio import get_running_loop
+from asyncio import sleep as async_sleep
+from asyncio import wait_for
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger
+from math import floor, inf
+from random import uniform
+from threading import Condition, Lock
+from time import monotonic, sleep
+from typing import Any, AsyncIterator, Iterator
+
+from packit.clients import accepts_timeout
+from packit.memory import estimate_tokens
+from packit.types import TokenEstimator
+
+logger = getLogger(__name__)
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Token bucket that refills continuously at a fixed rate, up to its capacity.
+    """
+
+    capacity: float
+    rate: float
+    tokens: float
+    updated: float
+
+    def __init__(self, per_minute: float, timer=monotonic):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.timer = timer
+        self.tokens = per_minute
+        self.updated = timer()
+
+    def refill(self) -> None:
+        now = self.timer()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, amount: float) -> float:
+        """
+        Return the number of seconds until the amount will be available, or zero if it is available now.
+        """
+
+        self.refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float) -> None:
+        """
+        Take tokens from the bucket. This may leave the bucket in debt, which will delay later requests.
+        """
+
+        self.refill()
+        self.tokens -= amount
+
+
+class ThreadWaiter:
+    """
+    A thread waiting for the rate limiter, which sleeps on a condition that shares the limiter's lock.
+    """
+
+    __slots__ = ("condition",)
+
+    def __init__(self, lock: Lock):
+        self.condition = Condition(lock)
+
+    def wake(self) -> None:
+        self.condition.notify()
+
+
+class AsyncWaiter:
+    """
+    An asyncio task waiting for the rate limiter. It may be woken from any thread.
+    """
+
+    __slots__ = ("event", "loop")
+
+    def __init__(self):
+        self.event = AsyncEvent()
+        self.loop = get_running_loop()
+
+    def wake(self) -> None:
+        self.loop.call_soon_threadsafe(self.event.set)
+
+
+class RateLimiter:
+    """
+    Rate limiter and adaptive concurrency control, shared between any number of models.
+
+    Requests and tokens per minute are limited with token buckets. The number of requests in flight is limited by an
+    AIMD window, which grows by `increase` for each window of successful requests and shrinks by `decrease` when a
+    request is throttled or times out. Retryable errors are retried with exponential backoff and full jitter.
+
+    Requests wait in a single FIFO queue, shared by threads and asyncio tasks. Waiters sleep until a request is
+    released or the buckets have refilled, and only the waiter at the head of the queue may start, so later requests
+    cannot starve earlier ones.
+    """
+
+    active: int
+    lock: Lock
+    queue: deque[ThreadWaiter | AsyncWaiter]
+    request_bucket: TokenBucket | None
+    token_bucket: TokenBucket | None
+    waiting: int
+    window: float
+
+    def __init__(
+        self,
+        requests_per_minute: float | None = None,
+        tokens_per_minute: float | None = None,
+        max_concurrency: int = 16,
+        min_concurrency: int = 1,
+        initial_concurrency: int | None = None,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        max_retries: int = 3,
+        backoff_base: float = 1.0,
+        backoff_max: float = 30.0,
+        estimator: TokenEstimator = estimate_tokens,
+        timer=monotonic,
+    ):
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.decrease = decrease
+        self.estimator = estimator
+        self.increase = increase
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.min_concurrency = min_concurrency
+        self.timer = timer
+
+        self.request_bucket = (
+            TokenBucket(requests_per_minute, timer=timer)
+            if requests_per_minute
+            else None
+        )
+        self.token_bucket = (
+            TokenBucket(tokens_per_minute, timer=timer) if tokens_per_minute else None
+        )
+
+        self.active = 0
+        self.lock = Lock()
+        self.queue = deque()
+        self.waiting = 0
+        self.window = float(initial_concurrency or max_concurrency)
+
+        # metrics
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0
+        self.wait_count = 0
+        self.wait_max = 0.0
+        self.wait_total = 0.0
+
+    def try_acquire(self, tokens: int = 0) -> float:
+        """
+        Try to start a request without waiting in the queue. Returns zero if the request may start, otherwise the
+        number of seconds until the buckets have refilled, or infinity if it must wait for a request to finish.
+        """
+
+        with self.lock:
+            return self.try_start(None, tokens)
+
+    def try_start(
+        self, waiter: ThreadWaiter | AsyncWaiter | None, tokens: int
+    ) -> float:
+        """
+        Start a request if the waiter is at the head of the queue and the window and buckets allow it. The caller
+        must hold the lock.
+        """
+
+        if self.queue and self.queue[0] is not waiter:
+            return inf
+
+        if self.active >= max(self.min_concurrency, floor(self.window)):
+            return inf
+
+        delay = 0.0
+        if self.request_bucket is not None:
+            delay = max(delay, self.request_bucket.delay(1))
+        if self.token_bucket is not None:
+            delay = max(delay, self.token_bucket.delay(tokens))
+
+        if delay > 0:
+            return delay
+
+        if self.request_bucket is not None:
+            self.request_bucket.consume(1)
+        if self.token_bucket is not None:
+            self.token_bucket.consume(tokens)
+
+        self.active += 1
+        self.requests += 1
+        return 0.0
+
+    def acquire(self, tokens: int = 0) -> None:
+        """
+        Wait until a request may start.
+        """
+
+        start = self.timer()
+        with self.lock:
+            waiter = ThreadWaiter(self.lock)
+            self.enqueue(waiter)
+            try:
+                while True:
+                    delay = self.try_start(waiter, tokens)
+                    if delay == 0:
+                        break
+
+                    waiter.condition.wait(None if delay == inf else delay)
+            finally:
+                self.dequeue(waiter, start)
+
+    async def aacquire(self, tokens: int = 0) -> None:
+        """
+        Wait until a request may start, without blocking the event loop.
+        """
+
+        start = self.timer()
+        waiter = AsyncWaiter()
+        with self.lock:
+            self.enqueue(waiter)
+
+        try:
+            while True:
+                with self.lock:
+                    # cleared before checking, so a wake between the check and the wait is not lost
+                    waiter.event.clear()
+                    delay = self.try_start(waiter, tokens)
+
+                if delay == 0:
+                    break
+
+                try:
+                    await wait_for(waiter.event.wait(), None if delay == inf else delay)
+                except AsyncTimeoutError:
+                    pass
+        finally:
+            with self.lock:
+                self.dequeue(waiter, start)
+
+    def release(self, error: Exception | None = None, tokens: int = 0) -> None:
+        """
+        Finish a request, adjusting the concurrency window based on the outcome. Tokens that were used by the
+        response are taken from the token bucket.
+        """
+
+        with self.lock:
+            self.active -= 1
+            self.wake_next()
+
+            if error is None:
+                self.window = min(
+                    float(self.max_concurrency),
+                    self.window + self.increase / max(self.window, 1.0),
+                )
+            elif is_retryable(error):
+                self.throttled += 1
+                self.window = max(
+                    float(self.min_concurrency), self.window * self.decrease
+                )
+
+            if tokens > 0 and self.token_bucket is not None:
+                self.token_bucket.consume(tokens)
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Get the delay before a retry, using exponential backoff with full jitter.
+        """
+
+        self.retries += 1
+        return uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    def enqueue(self, waiter: ThreadWaiter | AsyncWaiter) -> None:
+        """
+        Add a waiter to the back of the queue. The caller must hold the lock.
+        """
+
+        self.queue.append(waiter)
+        self.waiting += 1
+
+    def dequeue(self, waiter: ThreadWaiter | AsyncWaiter, start: float) -> None:
+        """
+        Remove a waiter from the queue once it has started or given up, and wake the next one, which may be able to
+        start as well. The caller must hold the lock.
+        """
+
+        self.queue.remove(waiter)
+        self.wake_next()
+
+        waited = self.timer() - start
+        self.waiting -= 1
+        self.wait_count += 1
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+
+    def wake_next(self) -> None:
+        if self.queue:
+            self.queue[0].wake()
+
+    def metrics(self) -> dict[str, float]:
+        """
+        Get the current queue depth, concurrency window and wait time metrics.
+        """
+
+        with self.lock:
+            return {
+                "active": self.active,
+                "queue_depth": self.waiting,
+                "requests": self.requests,
+                "retries": self.retries,
+                "throttled": self.throttled,
+                "wait_count": self.wait_count,
+                "wait_max": self.wait_max,
+                "wait_mean": self.wait_total / max(self.wait_count, 1),
+                "wait_total": self.wait_total,
+                "window": self.window,
+            }
+
+
+class RateLimitedModel:
+    """
+    Wrap an LLM so that every request goes through a shared rate limiter. Other attributes, like the model name and
+    temperature, are passed through to the wrapped LLM.
+    """
+
+    limiter: RateLimiter
+    llm: Any
+
+    def __init__(self, llm: Any, limiter: RateLimiter):
+        self.limiter = limiter
+        self.llm = llm
+
+    def __getattr__(self, name: str) -> Any:
+        if name in ("limiter", "llm"):
+            raise AttributeError(name)
+
+        return getattr(self.llm, name)
+
+    @property
+    def accepts_timeout(self) -> bool:
+        return accepts_timeout(self.llm)
+
+    def invoke(self, input: Any, config: Any | None = None, **kwargs) -> Any:
+        tokens = estimate_input(input, self.limiter.estimator)
+        attempt = 0
+        while True:
+            self.limiter.acquire(tokens)
+            try:
+                result = self.llm.invoke(*model_args(input, config), **kwargs)
+            except Exception as e:
+                self.limiter.release(error=e)
+                if is_retryable(e) and attempt < self.limiter.max_retries:
+                    delay = self.limiter.backoff(attempt)
+                    logger.warning("retrying after error, waiting %s: %s", delay, e)
+                    attempt += 1
+                    sleep(delay)
+                    continue
+
+                raise
+
+            self.limiter.release(tokens=response_tokens(result))
+            return result
+
+    async def ainvoke(self, input: Any, config: Any | None = None, **kwargs) -> Any:
+        tokens = estimate_input(input, self.limiter.estimator)
+        attempt = 0
+        while True:
+            await self.limiter.aacquire(tokens)
+            try:
+                result = await self.llm.ainvoke(*model_args(input, config), **kwargs)
+            except Exception as e:
+                self.limiter.release(error=e)
+                if is_retryable(e) and attempt < self.limiter.max_retries:
+                    delay = self.limiter.backoff(attempt)
+                    logger.warning("retrying after error, waiting %s: %s", delay, e)
+                    attempt += 1
+                    await async_sleep(delay)
+                    continue
+
+                raise
+
+            self.limiter.release(tokens=response_tokens(result))
+            return result
+
+    def batch(
+        self, inputs: list[Any], config: Any | None = None, **kwargs
+    ) -> list[Any]:
+        """
+        Send each input as a separate rate-limited request, using a thread pool.
+        """
+
+        max_workers = (config or {}).get("max_concurrency") or len(inputs) or 1
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(
+                executor.map(lambda input: self.invoke(input, **kwargs), inputs)
+            )
+
+    def stream(self, input: Any, config: Any | None = None, **kwargs) -> Iterator[Any]:
+        """
+        Stream a response, holding a concurrency slot until the stream has finished. Errors are not retried once
+        the stream has started.
+        """
+
+        self.limiter.acquire(estimate_input(input, self.limiter.estimator))
+        error: Exception | None = None
+        try:
+            yield from self.llm.stream(*model_args(input, config), **kwargs)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.limiter.release(error=error)
+
+    async def astream(
+        self, input: Any, config: Any | None = None, **kwargs
+    ) -> AsyncIterator[Any]:
+        await self.limiter.aacquire(estimate_input(input, self.limiter.estimator))
+        error: Exception | None = None
+        try:
+            async for chunk in self.llm.astream(*model_args(input, config), **kwargs):
+                yield chunk
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.limiter.release(error=error)
+
+
+def model_args(input: Any, config: Any | None) -> tuple:
+    """
+    Only pass the config through to the wrapped model when one was provided, so that simple models that only take
+    an input can be wrapped.
+    """
+
+    if config is None:
+        return (input,)
+
+    return (input, config)
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Check if an error is likely to succeed on retry, like a rate limit or timeout.
+    """
+
+    if isinstance(error, TimeoutError):
+        return True
+
+    status = getattr(error, "status_code", None)
+    if status is None:
+        response = getattr(error, "response", None)
+        status = getattr(response, "status_code", None)
+
+    if status in RETRYABLE_STATUS:
+        return True
+
+    name = type(error).__name__
+    return "RateLimit" in name or "Timeout" in name
+
+
+def estimate_input(input: Any, estimator: TokenEstimator = estimate_tokens) -> int:
+    """
+    Estimate the number of tokens in a model input.
+    """
+
+    if isinstance(input, str):
+        return estimator(input)
+
+    if isinstance(input, (list, tuple)):
+        return sum(estimate_input(item, estimator) for item in input)
+
+    content = getattr(input, "content", None)
+    if isinstance(content, str):
+        return estimator(content)
+
+    return 0
+
+
+def response_tokens(result: Any) -> int:
+    """
+    Get the number of completion tokens from the response metadata, if the provider reports them.
+    """
+
+    metadata = getattr(result, "response_metadata", None) or {}
+    usage = metadata.get("token_usage") or {}
+    if "completion_tokens" in usage:
+        return usage["completion_tokens"]
+
+    # ollama
+    return metadata.get("eval_count", 0)
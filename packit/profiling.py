@@ -0,0 +1,208 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from cProfile import Profile
+from io import StringIO
+from logging import getLogger
+from pstats import Stats
+from threading import Lock
+from time import perf_counter
+from typing import Callable, Tuple
+
+logger = getLogger(__name__)
+
+PHASES = ("context", "format", "llm", "parse", "tool", "trace")
+
+
+class PhaseFrame:
+    __slots__ = ("name", "start", "child_time")
+
+    def __init__(self, name: str, start: float):
+        self.name = name
+        self.start = start
+        self.child_time = 0.0
+
+
+phase_stack: ContextVar[Tuple[PhaseFrame, ...]] = ContextVar(
+    "packit_phase_stack", default=()
+)
+
+
+class Profiler:
+    """
+    Collects the self-time of each phase, excluding the time spent in nested phases. Time that does not belong to any
+    phase is reported as `other`.
+    """
+
+    calls: dict[str, int]
+    lock: Lock
+    totals: dict[str, float]
+    wall_time: float
+
+    def __init__(self, timer: Callable[[], float] = perf_counter):
+        self.calls = {}
+        self.lock = Lock()
+        self.timer = timer
+        self.totals = {}
+        self.wall_time = 0.0
+
+        self.profile_stats: Stats | None = None
+        self.profile_text: str | None = None
+
+    def phase(self, name: str) -> "ProfilePhase":
+        return ProfilePhase(self, name)
+
+    def record(self, name: str, self_time: float) -> None:
+        with self.lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+            self.totals[name] = self.totals.get(name, 0.0) + self_time
+
+    def framework_time(self) -> float:
+        """
+        Get the total time spent outside of the LLM, which includes tools.
+        """
+
+        return sum(total for name, total in self.totals.items() if name != "llm")
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """
+        Summarize the calls and self-time of each phase. Phases that run on worker threads are included, so the total
+        may exceed the wall time.
+        """
+
+        summary = {}
+        for name in [*PHASES, *sorted(set(self.totals) - set(PHASES))]:
+            calls = self.calls.get(name, 0)
+            total = self.totals.get(name, 0.0)
+            summary[name] = {
+                "calls": calls,
+                "total": total,
+                "mean": total / calls if calls > 0 else 0.0,
+            }
+
+        summary["other"] = {
+            "calls": 1,
+            "total": max(0.0, self.wall_time - sum(self.totals.values())),
+            "mean": 0.0,
+        }
+        return summary
+
+    def format_summary(self) -> str:
+        """
+        Format the summary as a plain text table.
+        """
+
+        lines = [f"{'phase':<10} {'calls':>8} {'total (s)':>12} {'mean (ms)':>12}"]
+        for name, row in self.summary().items():
+            lines.append(
+                f"{name:<10} {row['calls']:>8} {row['total']:>12.4f} {row['mean'] * 1000:>12.3f}"
+            )
+
+        lines.append(f"{'wall':<10} {'':>8} {self.wall_time:>12.4f}")
+        return "\n".join(lines)
+
+
+class ProfilePhase:
+    __slots__ = ("profiler", "name", "token")
+
+    def __init__(self, profiler: Profiler, name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        frame = PhaseFrame(self.name, self.profiler.timer())
+        self.token = phase_stack.set(phase_stack.get() + (frame,))
+        return self
+
+    def __exit__(self, *args) -> None:
+        stack = phase_stack.get()
+        frame = stack[-1]
+        phase_stack.reset(self.token)
+
+        elapsed = self.profiler.timer() - frame.start
+        if len(stack) > 1:
+            stack[-2].child_time += elapsed
+
+        self.profiler.record(frame.name, elapsed - frame.child_time)
+
+
+class NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        pass
+
+
+NULL_PHASE = NullPhase()
+
+active_profiler: Profiler | None = None
+
+
+def profile_phase(name: str) -> ProfilePhase | NullPhase:
+    """
+    Measure the self-time of a phase, if profiling is enabled.
+    """
+
+    if active_profiler is None:
+        return NULL_PHASE
+
+    return active_profiler.phase(name)
+
+
+@contextmanager
+def profiling(
+    dump_path: str | None = None,
+    frame_filter: str | None = "packit",
+    log_summary: bool = False,
+    use_cprofile: bool = False,
+):
+    """
+    Enable profiling for the duration of the context and yield the profiler.
+
+    If `use_cprofile` or `dump_path` is set, the calling thread will also be profiled with cProfile, and the stats will
+    be saved to `dump_path` for use with pstats or snakeviz. The `profile_text` on the profiler is limited to
+    frames matching `frame_filter`.
+
+    If `log_summary` is set, the summary table will be logged at info level when the context exits.
+    """
+
+    global active_profiler
+
+    if active_profiler is not None:
+        raise ValueError("Profiling is already enabled")
+
+    profiler = Profiler()
+    active_profiler = profiler
+
+    profile = None
+    if use_cprofile or dump_path is not None:
+        profile = Profile()
+        profile.enable()
+
+    start = profiler.timer()
+    try:
+        yield profiler
+    finally:
+        profiler.wall_time = profiler.timer() - start
+        active_profiler = None
+
+        if profile is not None:
+            profile.disable()
+            stream = StringIO()
+            stats = Stats(profile, stream=stream)
+            stats.sort_stats("cumulative")
+            if frame_filter:
+                stats.print_stats(frame_filter)
+            else:
+                stats.print_stats()
+
+            profiler.profile_stats = stats
+            profiler.profile_text = stream.getvalue()
+
+            if dump_path is not None:
+                stats.dump_stats(dump_path)
+
+        if log_summary:
+            logger.info("profile summary:\n%s", profiler.format_summary())
@@ -1,6 +1,6 @@
 from random import choice
 
-from .base import PromptLibrary
+from .base import PromptLibrary, SkipMatcher
 from .mixtral import (
     prompts as mixtral_prompts,
 )
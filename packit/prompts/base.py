@@ -1,8 +1,59 @@
+from functools import lru_cache
+from re import Pattern
+from re import compile as compile_pattern
+from re import escape
 from typing import List
 
 PromptGroup = List[str]
 
 
+class SkipMatcher:
+    """
+    Incremental matcher for skip tokens in a streamed response. Keeps enough of the previous chunks to find tokens
+    that are split across chunk boundaries.
+    """
+
+    overlap: int
+    pattern: Pattern | None
+    tail: str
+
+    def __init__(self, tokens: PromptGroup):
+        self.overlap = max((len(token) for token in tokens), default=1) - 1
+        self.pattern = compile_tokens(tuple(tokens))
+        self.tail = ""
+
+    def feed(self, chunk: str) -> str | None:
+        """
+        Add a chunk of text and return the first skip token found, if any.
+        """
+
+        if self.pattern is None:
+            return None
+
+        window = self.tail + chunk
+        match = self.pattern.search(window)
+        if match:
+            return match.group(0)
+
+        if self.overlap > 0:
+            self.tail = window[-self.overlap :]
+
+        return None
+
+
+@lru_cache(maxsize=32)
+def compile_tokens(tokens: tuple[str, ...]) -> Pattern | None:
+    """
+    Compile a list of literal tokens into a single pattern, preferring longer tokens when they overlap.
+    """
+
+    if len(tokens) == 0:
+        return None
+
+    ordered = sorted(set(tokens), key=len, reverse=True)
+    return compile_pattern("|".join(escape(token) for token in ordered))
+
+
 class PromptLibrary:
     answers: PromptGroup
     converse: PromptGroup
@@ -35,3 +86,10 @@ class PromptLibrary:
         self.skip = skip or []
 
         self.function_example = function_example or {}
+
+    def skip_matcher(self) -> SkipMatcher:
+        """
+        Create a new incremental matcher for this library's skip tokens.
+        """
+
+        return SkipMatcher(self.skip)
@@ -1,10 +1,16 @@
-from json import dumps
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from json import dumps, loads
 from logging import getLogger
+from threading import BoundedSemaphore
+from time import monotonic
 from typing import Any
 
 from packit.abac import ABACAttributes
 from packit.agent import Agent
+from packit.context import check_deadline, get_deadline, submit_with_context
 from packit.errors import ToolError
+from packit.profiling import profile_phase
 from packit.toolbox import Toolbox
 from packit.tracing import SpanKind, trace
 from packit.types import ResultParser, ToolFilter
@@ -15,6 +21,9 @@ from .primitive import str_result
 
 logger = getLogger(__name__)
 
+# how often to check the loop deadline while waiting on tools
+CANCEL_POLL_INTERVAL = 0.1
+
 FunctionParamsDict = dict[str, Any]
 FunctionDict = dict[str, str | FunctionParamsDict]
 
@@ -27,6 +36,7 @@ def function_result(
     result_parser: ResultParser | None = None,
     toolbox: Toolbox | None = None,
     tool_filter: ToolFilter | None = None,
+    tool_semaphores: dict[str, BoundedSemaphore] | None = None,
     **kwargs,
 ) -> str:
     # agent and toolbox have to be optional to match the other parser signatures
@@ -67,11 +77,18 @@ def function_result(
     logger.debug("Using tool: %s", normalized_data)
     function_params = normalized_data.get("parameters", {})
 
+    check_deadline()
     tool = toolbox.get_tool(function_name, abac_context)
+    semaphore = (tool_semaphores or {}).get(function_name)
     try:
         with trace(function_name, SpanKind.TOOL) as (report_args, report_output):
             report_args(**function_params)
-            tool_result = tool(**function_params)
+            with profile_phase("tool"):
+                if semaphore is None:
+                    tool_result = tool(**function_params)
+                else:
+                    with semaphore:
+                        tool_result = tool(**function_params)
             report_output(tool_result)
     except Exception as e:
         raise ToolError(
@@ -102,8 +119,20 @@ def multi_function_result(
     result_parser: ResultParser | None = None,
     toolbox: Toolbox | None = None,
     tool_filter: ToolFilter | None = None,
+    max_concurrency: int | None = None,
+    tool_limits: dict[str, int] | None = None,
+    tool_timeout: float | None = None,
     **kwargs,
 ) -> list[str]:
+    """
+    Run one or more function calls, split on double line breaks or from a JSON array.
+
+    If `max_concurrency` is set, the calls will run on a thread pool, with at most `tool_limits[name]` calls to each
+    tool at once, and the results returned in the original order. If a call takes longer than `tool_timeout` seconds
+    once it has started, a ToolError is raised; the call cannot be interrupted and will finish in the background.
+    The loop deadline is also checked while waiting.
+    """
+
     if fix_filter:
         value = fix_filter(value, list_result=True)
 
@@ -118,21 +147,30 @@ def multi_function_result(
     else:
         calls = [value]
 
+    def run_call(call: str) -> Any:
+        return function_result(
+            call,
+            abac_context=abac_context,
+            agent=agent,
+            fix_filter=None,
+            result_parser=result_parser,
+            toolbox=toolbox,
+            tool_filter=tool_filter,
+            tool_semaphores=tool_semaphores,
+            **kwargs,
+        )
+
+    tool_semaphores = {
+        name: BoundedSemaphore(limit) for name, limit in (tool_limits or {}).items()
+    }
+
+    if max_concurrency is not None and len(calls) > 1:
+        return run_calls_parallel(calls, run_call, agent, max_concurrency, tool_timeout)
+
     results = []
     for call in calls:
         try:
-            results.append(
-                function_result(
-                    call,
-                    abac_context=abac_context,
-                    agent=agent,
-                    fix_filter=None,
-                    result_parser=result_parser,
-                    toolbox=toolbox,
-                    tool_filter=tool_filter,
-                    **kwargs,
-                )
-            )
+            results.append(run_call(call))
         except Exception as e:
             logger.exception("Error calling tool: %s", call)
             raise e
@@ -140,6 +178,76 @@ def multi_function_result(
     return results
 
 
+def run_calls_parallel(
+    calls: list[str],
+    run_call: Any,
+    agent: Agent | None,
+    max_concurrency: int,
+    tool_timeout: float | None,
+) -> list[Any]:
+    """
+    Run function calls on a thread pool, in a copy of the current context, and return the results in order.
+    """
+
+    deadline = get_deadline()
+    started: dict[int, float] = {}
+
+    def run_indexed(index: int, call: str) -> Any:
+        started[index] = monotonic()
+        return run_call(call)
+
+    def wait_for_call(index: int, future: Future) -> Any:
+        if tool_timeout is None and deadline is None:
+            return future.result()
+
+        while True:
+            timeout = None
+            if tool_timeout is not None:
+                start = started.get(index)
+                if start is None:
+                    # the call is still queued, so the timeout has not started
+                    timeout = tool_timeout
+                else:
+                    timeout = start + tool_timeout - monotonic()
+
+                if timeout <= 0:
+                    raise ToolError(
+                        f"Tool call timed out after {tool_timeout} seconds",
+                        agent,  # type: ignore
+                        calls[index],
+                        get_function_name(calls[index]),
+                    )
+
+            if deadline is not None:
+                # poll, so that cancellation is noticed as well as the time limit
+                deadline.check()
+                timeout = min(timeout or CANCEL_POLL_INTERVAL, CANCEL_POLL_INTERVAL)
+
+            try:
+                return future.result(timeout=timeout)
+            except FutureTimeoutError:
+                continue
+
+    executor = ThreadPoolExecutor(max_workers=max(1, max_concurrency))
+    futures = [
+        submit_with_context(executor, run_indexed, index, call)
+        for index, call in enumerate(calls)
+    ]
+
+    try:
+        results = []
+        for index, future in enumerate(futures):
+            try:
+                results.append(wait_for_call(index, future))
+            except Exception as e:
+                logger.exception("Error calling tool: %s", calls[index])
+                raise e
+
+        return results
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
 def multi_function_or_str_result(
     value: str,
     abac_context: ABACAttributes | None = None,
@@ -166,9 +274,133 @@ def multi_function_or_str_result(
     return str_result(value)
 
 
+# region streaming
+
+
+class FunctionCallDetector:
+    """
+    Incremental matcher for function calls in a streamed response. Returns the first complete JSON object or list
+    once its brackets are balanced, if it is a function call, so generation can be stopped and the tool run right
+    away. Responses that do not start with JSON, optionally inside a code fence, are ignored.
+    """
+
+    buffer: str
+    depth: int
+    disabled: bool
+    escape: bool
+    in_string: bool
+    position: int
+    start: int | None
+
+    def __init__(self):
+        self.buffer = ""
+        self.depth = 0
+        self.disabled = False
+        self.escape = False
+        self.in_string = False
+        self.position = 0
+        self.start = None
+
+    def feed(self, chunk: str) -> str | None:
+        """
+        Add a chunk of text and return the complete function call, if one has been found.
+        """
+
+        if self.disabled:
+            return None
+
+        self.buffer += chunk
+        if self.start is None and not self.find_start():
+            return None
+
+        while self.position < len(self.buffer):
+            char = self.buffer[self.position]
+            self.position += 1
+
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == "\\":
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in "{[":
+                self.depth += 1
+            elif char in "}]":
+                self.depth -= 1
+                if self.depth == 0:
+                    return self.check_candidate(self.buffer[self.start : self.position])
+
+        return None
+
+    def find_start(self) -> bool:
+        """
+        Skip any leading whitespace and code fence, then find the opening bracket. Returns False if more text is
+        needed, and disables the detector if the response does not start with JSON.
+        """
+
+        text = self.buffer.lstrip()
+        offset = len(self.buffer) - len(text)
+
+        if text.startswith("```"):
+            newline = text.find("\n")
+            if newline == -1:
+                return False
+
+            body = text[newline + 1 :]
+            offset += newline + 1 + (len(body) - len(body.lstrip()))
+            text = body.lstrip()
+        elif "```".startswith(text):
+            # empty or a partial fence
+            return False
+
+        if len(text) == 0:
+            return False
+
+        if text[0] not in "{[":
+            self.disabled = True
+            return False
+
+        self.start = offset
+        self.position = offset
+        return True
+
+    def check_candidate(self, candidate: str) -> str | None:
+        self.disabled = True
+
+        try:
+            data = normalize_function_json(loads(candidate))
+        except Exception:
+            return None
+
+        calls = data if isinstance(data, list) else [data]
+        if len(calls) > 0 and all(
+            isinstance(call, dict) and isinstance(call.get("function"), str)
+            for call in calls
+        ):
+            return candidate
+
+        return None
+
+
+# endregion
 # region json utils
 
 
+def get_function_name(call: str) -> str:
+    """
+    Get the function name from a call for error messages, without raising if the call is invalid.
+    """
+
+    try:
+        data = normalize_function_json(json_result(call, fix_filter=None))
+        return str(data.get("function", "unknown"))
+    except Exception:
+        return "unknown"
+
+
 def normalize_function_json(
     data: Any,
 ) -> FunctionDict | list[FunctionDict]:
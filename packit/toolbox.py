@@ -1,4 +1,5 @@
-from typing import Callable
+from json import dumps
+from typing import Callable, Hashable
 
 from langchain_core.utils.function_calling import convert_to_openai_tool
 
@@ -12,6 +13,8 @@ class Toolbox:
 
     callbacks: dict[str, Callable]
     definitions: list[dict]
+    rendered: dict[Hashable, str]
+    rendered_version: Hashable
 
     def __init__(self, tools: list[Callable]):
         """
@@ -20,11 +23,44 @@ class Toolbox:
 
         self.callbacks = {}
         self.definitions = []
+        self.rendered = {}
+        self.rendered_version = None
 
         for tool in tools:
-            name = tool.__name__
-            self.callbacks[name] = tool
-            self.definitions.append(convert_to_openai_tool(tool))
+            self.add_tool(tool)
+
+    def add_tool(self, tool: Callable):
+        """
+        Add a tool to the toolbox, replacing any existing tool with the same name.
+        """
+
+        name = tool.__name__
+        if name in self.callbacks:
+            self.remove_tool(name)
+
+        self.callbacks[name] = tool
+        self.definitions.append(convert_to_openai_tool(tool))
+        self.invalidate()
+
+    def remove_tool(self, name: str):
+        """
+        Remove a tool from the toolbox.
+        """
+
+        del self.callbacks[name]
+        self.definitions = [
+            definition
+            for definition in self.definitions
+            if definition["function"]["name"] != name
+        ]
+        self.invalidate()
+
+    def invalidate(self):
+        """
+        Clear the rendered definitions. This is called automatically when tools are added or removed.
+        """
+
+        self.rendered.clear()
 
     def get_definition(self, name: str, abac: ABACAttributes = {}):
         """
@@ -58,6 +94,37 @@ class Toolbox:
 
         return list(self.callbacks.keys())
 
+    def render_definitions(self, abac: ABACAttributes = {}) -> str:
+        """
+        Return the visible tool definitions as a JSON string. The result is cached for each set of attributes until
+        the tools or the rules change.
+        """
+
+        version = self.cache_version()
+        if version != self.rendered_version:
+            self.rendered.clear()
+            self.rendered_version = version
+
+        try:
+            key = frozenset(abac.items())
+        except TypeError:
+            # attributes that cannot be hashed cannot be cached
+            return dumps(self.list_definitions(abac))
+
+        rendered = self.rendered.get(key)
+        if rendered is None:
+            rendered = dumps(self.list_definitions(abac))
+            self.rendered[key] = rendered
+
+        return rendered
+
+    def cache_version(self) -> Hashable:
+        """
+        Return a value that changes whenever the visible definitions may have changed.
+        """
+
+        return None
+
 
 class RestrictedToolbox(Toolbox):
     """
@@ -105,6 +172,13 @@ class RestrictedToolbox(Toolbox):
 
         return super().get_tool(name, abac=abac)
 
+    def cache_version(self) -> Hashable:
+        """
+        The rules are versioned by the ABAC adapter, if it supports versions.
+        """
+
+        return (id(self.abac), getattr(self.abac, "version", None))
+
     def list_definitions(self, abac: ABACAttributes = {}):
         return [
             definition
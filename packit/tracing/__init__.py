@@ -1,5 +1,8 @@
 from typing import Literal, Callable
 from contextlib import contextmanager
+from sys import exc_info
+
+from packit.profiling import profile_phase
 
 from .console import trace as console_trace
 from .spans import SpanKind
@@ -38,5 +41,17 @@ def set_tracer(fn: Callable | str):
 
 @contextmanager
 def trace(name: str, kind: str | SpanKind = SpanKind.TASK):
-    with tracer(name, kind) as reporters:
+    # enter and exit are profiled separately, so the body of the span is not counted as tracing time
+    with profile_phase("trace"):
+        span = tracer(name, kind)
+        reporters = span.__enter__()
+
+    try:
         yield reporters
+    except BaseException:
+        with profile_phase("trace"):
+            if not span.__exit__(*exc_info()):
+                raise
+    else:
+        with profile_phase("trace"):
+            span.__exit__(None, None, None)
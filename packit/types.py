@@ -60,8 +60,14 @@ class FunctionResultParser(Protocol):
         pass  # pragma: no cover
 
 
+class StreamMatcher(Protocol):
+    def feed(self, chunk: str) -> str | None:
+        pass  # pragma: no cover
+
+
 class StopCondition(Protocol):
-    # TODO: kwargs and prompts and all those other things
+    # conditions that take `results` or `**kwargs` will also be passed the results so far by the map loops
+    # TODO: prompts and all those other things
     def __call__(self, max: int, current: int) -> bool:
         pass  # pragma: no cover
 
@@ -73,4 +79,6 @@ MemoryFactory = Callable[[], list[MemoryType]]
 MemoryMaker = Callable[[list[MemoryType], MemoryType], None]
 PromptTemplate = Callable[[str], PromptType]
 PromptFilter = Callable[[PromptType], PromptType | None]
+StreamCutoff = Callable[[], StreamMatcher]
+TokenEstimator = Callable[[str], int]
 ToolFilter = Callable[[dict], dict | str | None]
@@ -1,8 +1,10 @@
 from base64 import b64encode
 from hashlib import sha256
+from inspect import isawaitable
 from json import dumps
 from os import environ
 from time import monotonic
+from typing import Any, Callable
 
 
 def logger_with_colors(name: str, level="INFO"):
@@ -25,12 +27,14 @@ def logger_with_colors(name: str, level="INFO"):
     return getLogger(name)
 
 
-def hash_dict(data: dict):
+def hash_dict(data: dict, default: Callable[[Any], Any] | None = None):
     """
     Hash a dictionary of data. The result is safe to use as a filename.
+
+    The `default` function is passed to `json.dumps` for values that are not JSON-serializable.
     """
     return b64encode(
-        sha256(dumps(data, sort_keys=True).encode("utf-8")).digest(),
+        sha256(dumps(data, sort_keys=True, default=default).encode("utf-8")).digest(),
         altchars=b"-_",
     ).decode("utf-8")
 
@@ -77,3 +81,48 @@ def flatten(value):
         result.extend(flatten(item))
 
     return result
+
+
+def split_text(
+    value: str, chunk_size: int = 4000, separator: str = "\n\n"
+) -> list[str]:
+    """
+    Split text into chunks of up to `chunk_size` characters, breaking on the separator where possible. Pieces that
+    are longer than the chunk size on their own will be split at the chunk size.
+    """
+
+    chunks: list[str] = []
+    current = ""
+
+    for piece in value.split(separator):
+        while len(piece) > chunk_size:
+            if current:
+                chunks.append(current)
+                current = ""
+
+            chunks.append(piece[:chunk_size])
+            piece = piece[chunk_size:]
+
+        if not current:
+            current = piece
+        elif len(current) + len(separator) + len(piece) <= chunk_size:
+            current = f"{current}{separator}{piece}"
+        else:
+            chunks.append(current)
+            current = piece
+
+    if current:
+        chunks.append(current)
+
+    return chunks
+
+
+async def await_value(value: Any) -> Any:
+    """
+    Await a value if it is awaitable, otherwise return it unchanged. This allows async loops to accept both sync and
+    async callbacks.
+    """
+    if isawaitable(value):
+        return await value
+
+    return value
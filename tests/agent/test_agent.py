@@ -1,8 +1,12 @@
-from unittest import TestCase
+from unittest import IsolatedAsyncioTestCase, TestCase
 
-from packit.agent import Agent
-from packit.errors import PromptError
+from packit.agent import Agent, ainvoke_agent
+from packit.cache import MemoryCache
+from packit.context import Deadline, deadline_scope
+from packit.errors import DeadlineError, PromptError, SkipTokenError
 from packit.prompts import PromptLibrary
+from packit.results import FunctionCallDetector
+from packit.toolbox import Toolbox
 from tests.mocks import MockLLM, MockResponse
 
 
@@ -31,6 +35,180 @@ class TestAgent(TestCase):
         )
         self.assertEqual(result.content, "<skip>")
 
+    def test_invoke_cache(self):
+        llm = MockLLM(["first", "second"])
+        cache = MemoryCache()
+        agent = Agent("name", "backstory", {}, llm, cache=cache, memory_factory=None)
+
+        self.assertEqual(agent.invoke("prompt", {}), "first")
+        self.assertEqual(agent.invoke("prompt", {}), "first")
+        self.assertEqual(agent.invoke("other", {}), "second")
+        self.assertEqual(cache.stats(), {"hits": 1, "misses": 2})
+
+    def test_invoke_cache_skip_response(self):
+        llm = MockLLM(["<skip>", "prompt"])
+        cache = MemoryCache()
+        agent = Agent("name", "backstory", {}, llm, cache=cache)
+        agent.invoke_retry(["prompt"], prompt_library=PromptLibrary(skip=["<skip>"]))
+
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(list(cache.entries.values())[0][1]["content"], "prompt")
+
+    def test_stream(self):
+        llm = MockLLM(["streamed reply"])
+        agent = Agent("name", "backstory", {}, llm)
+        chunks = list(agent.stream(["prompt"]))
+        self.assertEqual("".join(chunk.content for chunk in chunks), "streamed reply")
+
+    def test_stream_skip_token(self):
+        llm = MockLLM(["ab<skip> and a long tail after the token"])
+        agent = Agent("name", "backstory", {}, llm)
+        with self.assertRaises(SkipTokenError):
+            list(agent.stream(["prompt"], PromptLibrary(skip=["<skip>"])))
+
+        # the stream should stop at the chunk containing the end of the token
+        self.assertEqual(llm.chunks_sent, 4)
+
+    def test_invoke_retry_streaming(self):
+        llm = MockLLM(["<skip> and more", "prompt"])
+        agent = Agent("name", "backstory", {}, llm, streaming=True)
+        result = agent.invoke_retry(
+            ["prompt"], prompt_library=PromptLibrary(skip=["<skip>"])
+        )
+        self.assertEqual(result.content, "prompt")
+        self.assertTrue(result.response_metadata["done"])
+        self.assertEqual(llm.chunks_sent, 6)
+
+    def test_invoke_retry_streaming_all_skipped(self):
+        llm = MockLLM(["<skip> and more"])
+        agent = Agent("name", "backstory", {}, llm, streaming=True)
+        with self.assertRaises(SkipTokenError) as context:
+            agent.invoke("prompt", {}, prompt_library=PromptLibrary(skip=["<skip>"]))
+
+        self.assertEqual(context.exception.token, "<skip>")
+        self.assertEqual(
+            len(llm.messages), 6
+        )  # two messages for each of three attempts
+        self.assertEqual(len(agent.memory), 0)
+
+    def test_invoke_stream_cutoff(self):
+        call = '{"function": "test", "parameters": {}}'
+        llm = MockLLM([call + " and some trailing explanation"])
+        cache = MemoryCache()
+        agent = Agent("name", "backstory", {}, llm, cache=cache)
+
+        result = agent.invoke("prompt", {}, stream_cutoff=FunctionCallDetector)
+        self.assertEqual(result, call)
+        self.assertEqual(llm.chunks_sent, len(call) // 2)
+        self.assertEqual(len(cache), 0)
+
+    def test_invoke_stream_cutoff_no_match(self):
+        llm = MockLLM(["plain text reply"])
+        agent = Agent("name", "backstory", {}, llm)
+
+        result = agent.invoke("prompt", {}, stream_cutoff=FunctionCallDetector)
+        self.assertEqual(result, "plain text reply")
+        self.assertEqual(llm.chunks_sent, 8)
+
+    def test_invoke_deadline_timeout(self):
+        timeouts = []
+
+        class TimeoutLLM(MockLLM):
+            accepts_timeout = True
+
+            def invoke(self, messages, timeout=None, **kwargs):
+                timeouts.append(timeout)
+                return super().invoke(messages, **kwargs)
+
+        agent = Agent("name", "backstory", {}, TimeoutLLM(["prompt"]))
+        agent.invoke("prompt", {})
+        with deadline_scope(30):
+            agent.invoke("prompt", {})
+
+        self.assertIsNone(timeouts[0])
+        self.assertGreater(timeouts[1], 0)
+        self.assertLessEqual(timeouts[1], 30)
+
+    def test_invoke_deadline_no_timeout(self):
+        calls = []
+
+        class OptionsLLM(MockLLM):
+            def invoke(self, messages, **kwargs):
+                calls.append(kwargs)
+                return super().invoke(messages)
+
+        # models that do not use a timeout should not be sent one
+        agent = Agent("name", "backstory", {}, OptionsLLM(["prompt"]))
+        with deadline_scope(30):
+            agent.invoke("prompt", {})
+
+        self.assertEqual(calls, [{}])
+
+    def test_invoke_deadline_expired(self):
+        llm = MockLLM(["prompt"])
+        agent = Agent("name", "backstory", {}, llm)
+        with deadline_scope(deadline=Deadline(0)):
+            with self.assertRaises(DeadlineError):
+                agent.invoke("prompt", {})
+
+        self.assertEqual(llm.messages, [])
+
+    def test_stream_deadline_cancelled(self):
+        llm = MockLLM(["a long streamed reply"])
+        agent = Agent("name", "backstory", {}, llm)
+        with deadline_scope() as deadline:
+            chunks = agent.stream(["prompt"])
+            next(chunks)
+            deadline.cancel()
+            with self.assertRaises(DeadlineError):
+                next(chunks)
+
+        self.assertEqual(llm.chunks_sent, 2)
+
+    def test_invoke_retry_continue(self):
+        llm = MockLLM(
+            [
+                MockResponse("first ", {"finish_reason": "length"}),
+                MockResponse("second ", {"finish_reason": "length"}),
+                MockResponse("third", {"finish_reason": "stop"}),
+            ]
+        )
+        agent = Agent("name", "backstory", {}, llm, max_continue=3)
+        result = agent.invoke_retry(["prompt"])
+
+        self.assertEqual(result.content, "first second third")
+        self.assertTrue(agent.response_complete(result))
+        self.assertEqual(llm.messages[-1].content, "first second ")
+
+    def test_invoke_retry_continue_limit(self):
+        llm = MockLLM([MockResponse("more ", {"done": False})])
+        agent = Agent("name", "backstory", {}, llm, max_continue=2)
+        result = agent.invoke_retry(["prompt"])
+
+        self.assertEqual(result.content, "more more more ")
+        self.assertFalse(agent.response_complete(result))
+
+    def test_batch(self):
+        llm = MockLLM(["first", "<skip>", "second", "third"])
+        agent = Agent("name", "backstory {key}", {}, llm)
+        result = agent.batch(
+            ["one", "two"],
+            [{"key": "a"}, {"key": "b"}],
+            prompt_library=PromptLibrary(skip=["<skip>"]),
+        )
+
+        self.assertEqual(result, ["first", "second"])
+        self.assertEqual(llm.batches, [2])
+        self.assertEqual(
+            [message.content for message in agent.memory],
+            ["one", "first", "two", "second"],
+        )
+
+    def test_batch_mismatch(self):
+        agent = Agent("name", "backstory", {}, MockLLM(["test"]))
+        with self.assertRaises(ValueError):
+            agent.batch(["one", "two"], [{}])
+
     def test_format_context(self):
         llm = MockLLM(["prompt"])
         agent = Agent(
@@ -42,6 +220,29 @@ class TestAgent(TestCase):
         self.assertEqual(llm.messages[0].content, "backstory agent_context")
         self.assertEqual(llm.messages[1].content, "prompt prompt_context")
 
+    def test_format_unused_tools(self):
+        calls = 0
+
+        class CountingToolbox(Toolbox):
+            def list_definitions(self, abac={}):
+                nonlocal calls
+                calls += 1
+                return super().list_definitions(abac)
+
+        def test_tool():
+            return "test"
+
+        llm = MockLLM(["prompt"])
+        toolbox = CountingToolbox([test_tool])
+        agent = Agent("name", "backstory", {}, llm, toolbox=toolbox)
+
+        agent.invoke("prompt", {}, prompt_template=lambda key: "no tools")
+        self.assertEqual(calls, 0)
+
+        agent.invoke("prompt", {}, prompt_template=lambda key: "tools: {tools}")
+        self.assertEqual(calls, 1)
+        self.assertIn('"name": "test_tool"', llm.messages[-1].content)
+
     def test_invoke_without_memory(self):
         llm = MockLLM(["prompt"])
         agent = Agent(
@@ -87,3 +288,65 @@ class TestAgent(TestCase):
         agent = Agent("name", "backstory", {}, llm)
         result = agent.response_complete(MockResponse("test", {}))
         self.assertFalse(result)
+
+
+class TestAsyncAgent(IsolatedAsyncioTestCase):
+    async def test_ainvoke(self):
+        llm = MockLLM(["prompt"])
+        agent = Agent("name", "backstory", {"context": "context"}, llm)
+        result = await agent.ainvoke("prompt", {"context": "context"})
+        self.assertEqual(result, "prompt")
+        self.assertEqual(len(agent.memory), 2)
+
+    async def test_ainvoke_retry_skip(self):
+        llm = MockLLM(["<skip>", "prompt"])
+        agent = Agent("name", "backstory", {}, llm)
+        result = await agent.ainvoke_retry(
+            ["prompt"], prompt_library=PromptLibrary(skip=["<skip>"])
+        )
+        self.assertEqual(result.content, "prompt")
+
+    async def test_ainvoke_retry_continue(self):
+        llm = MockLLM(
+            [
+                MockResponse("first ", {"finish_reason": "length"}),
+                MockResponse("second", {"finish_reason": "stop"}),
+            ]
+        )
+        agent = Agent("name", "backstory", {}, llm, max_continue=3)
+        result = await agent.ainvoke_retry(["prompt"])
+
+        self.assertEqual(result.content, "first second")
+        self.assertEqual(llm.messages[-1].content, "first ")
+
+    async def test_ainvoke_agent(self):
+        llm = MockLLM(["prompt"])
+        agent = Agent("name", "backstory {key}", {}, llm)
+        result = await ainvoke_agent(agent, "prompt", {}, key="value")
+        self.assertEqual(result, "prompt")
+        self.assertEqual(llm.messages[0].content, "backstory value")
+
+    async def test_ainvoke_retry_streaming(self):
+        llm = MockLLM(["<skip> and more", "prompt"])
+        agent = Agent("name", "backstory", {}, llm, streaming=True)
+        result = await agent.ainvoke_retry(
+            ["prompt"], prompt_library=PromptLibrary(skip=["<skip>"])
+        )
+        self.assertEqual(result.content, "prompt")
+
+    async def test_ainvoke_retry_streaming_all_skipped(self):
+        llm = MockLLM(["<skip> and more"])
+        agent = Agent("name", "backstory", {}, llm, streaming=True)
+        with self.assertRaises(SkipTokenError):
+            await agent.ainvoke(
+                "prompt", {}, prompt_library=PromptLibrary(skip=["<skip>"])
+            )
+
+    async def test_ainvoke_stream_cutoff(self):
+        call = '[{"function": "test"}]'
+        llm = MockLLM([call + "\n\nmore text"])
+        agent = Agent("name", "backstory", {}, llm)
+
+        result = await agent.ainvoke("prompt", {}, stream_cutoff=FunctionCallDetector)
+        self.assertEqual(result, call)
+        self.assertEqual(llm.chunks_sent, len(call) // 2)
@@ -0,0 +1,97 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from packit.agent import agent_easy_connect
+from packit.clients import ClientRegistry, accepts_timeout, create_client
+from packit.models import HedgedModel, RateLimitedModel, RateLimiter
+from tests.mocks import MockLLM
+
+
+class TestClientRegistry(TestCase):
+    def test_shared_client(self):
+        registry = ClientRegistry()
+        first = registry.get("ollama", "test-model", temperature=0.5, num_ctx=2048)
+        second = registry.get("ollama", "test-model", temperature=0.5, num_ctx=2048)
+        self.assertIs(first, second)
+        self.assertEqual(len(registry), 1)
+
+    def test_different_keys(self):
+        registry = ClientRegistry()
+        first = registry.get("ollama", "test-model", temperature=0.5)
+        second = registry.get("ollama", "test-model", temperature=0.0)
+        self.assertIsNot(first, second)
+        self.assertEqual(len(registry), 2)
+
+    def test_different_num_gpu(self):
+        registry = ClientRegistry()
+        first = registry.get("ollama", "test-model", num_gpu=1)
+        second = registry.get("ollama", "test-model", num_gpu=2)
+        self.assertIsNot(first, second)
+        self.assertEqual(second.num_gpu, 2)
+        self.assertEqual(len(registry), 2)
+
+    @patch.dict("os.environ", {"OPENAI_API_KEY": "test"})
+    def test_shared_http_client(self):
+        registry = ClientRegistry(max_connections=4)
+        first = registry.get("openai", "gpt-4", temperature=0.0)
+        second = registry.get("openai", "gpt-3.5-turbo", temperature=0.5)
+        self.assertIsNot(first, second)
+        self.assertIs(first.http_client, second.http_client)
+        self.assertEqual(len(registry.http_clients), 1)
+
+        registry.close()
+        self.assertEqual(len(registry), 0)
+        self.assertTrue(first.http_client.is_closed)
+
+    def test_unknown_driver(self):
+        registry = ClientRegistry()
+        with self.assertRaises(ValueError):
+            registry.get("unknown", "test-model")
+
+    def test_context_manager(self):
+        with ClientRegistry() as registry:
+            registry.get("ollama", "test-model")
+
+        self.assertEqual(len(registry), 0)
+
+
+class TestAcceptsTimeout(TestCase):
+    @patch.dict("os.environ", {"OPENAI_API_KEY": "test"})
+    def test_clients(self):
+        self.assertTrue(accepts_timeout(create_client("openai", "gpt-4")))
+        self.assertFalse(accepts_timeout(create_client("ollama", "test-model")))
+
+    def test_explicit(self):
+        llm = MockLLM(["test"])
+        self.assertFalse(accepts_timeout(llm))
+
+        llm.accepts_timeout = True
+        self.assertTrue(accepts_timeout(llm))
+
+    def test_wrappers(self):
+        llm = MockLLM(["test"])
+        llm.accepts_timeout = True
+
+        self.assertTrue(accepts_timeout(RateLimitedModel(llm, RateLimiter())))
+        self.assertFalse(
+            accepts_timeout(HedgedModel([llm, create_client("ollama", "test-model")]))
+        )
+
+
+class TestConnectRegistry(TestCase):
+    @patch("os.environ.get")
+    def test_connect_shared(self, mock_get):
+        def side_effect(key, default=None):
+            if key == "PACKIT_DRIVER":
+                return "ollama"
+
+            return default
+
+        mock_get.side_effect = side_effect
+
+        registry = ClientRegistry()
+        first = agent_easy_connect(model="test-model", registry=registry)
+        second = agent_easy_connect(model="test-model", registry=registry)
+        third = agent_easy_connect(model="test-model", registry=None)
+        self.assertIs(first, second)
+        self.assertIsNot(first, third)
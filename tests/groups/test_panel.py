@@ -1,10 +1,37 @@
+from contextlib import contextmanager
+from threading import Event
 from unittest import TestCase
 
 from packit.agent import Agent
+from packit.conditions import condition_threshold_mean, condition_threshold_sum
 from packit.groups import Panel
+from packit.groups.panel import decision_fixed
+from packit.results import int_result
+from packit.tracing import set_tracer
 from tests.mocks import MockLLM
 
 
+class BlockingLLM(MockLLM):
+    """
+    Mock LLM that waits for an event before replying, like a slow model.
+    """
+
+    def __init__(self, replies, release: Event):
+        super().__init__(replies)
+        self.release = release
+
+    def invoke(self, messages, **kwargs):
+        self.release.wait(1)
+        return super().invoke(messages, **kwargs)
+
+
+def make_voters(replies):
+    return [
+        Agent(f"test-{i}", "Test agent", {}, MockLLM([reply]))
+        for i, reply in enumerate(replies)
+    ]
+
+
 class TestPanelBasics(TestCase):
     def test_panel_weights(self):
         llm = MockLLM(["test"])
@@ -34,3 +61,110 @@ class TestPanelBasics(TestCase):
 
         decision, _results = panel("prompt")
         self.assertFalse(decision)
+
+
+class TestPanelEarlyExit(TestCase):
+    def test_decision_fixed(self):
+        fixed = decision_fixed
+        mean = condition_threshold_mean
+        self.assertTrue(fixed(mean, 0.5, (False, True), [True, True, True], 2))
+        self.assertFalse(fixed(mean, 0.5, (False, True), [True, True, False], 2))
+        self.assertTrue(fixed(mean, 0.5, (False, True), [False, False, False], 2))
+
+    def test_panel_early_exit(self):
+        panel = Panel(make_voters(["yes", "yes", "yes", "no", "no"]))
+
+        decision, results = panel.invoke("prompt", {}, vote_range=(False, True))
+        self.assertTrue(decision)
+        self.assertEqual(list(results.keys()), ["test-0-0", "test-1-0", "test-2-0"])
+
+    def test_panel_early_exit_weights(self):
+        panel = Panel(make_voters(["no", "yes", "yes"]), weights=[3, 1, 1])
+
+        decision, results = panel.invoke("prompt", {}, vote_range=(False, True))
+        self.assertFalse(decision)
+        self.assertEqual(list(results.keys()), ["test-0-0", "test-0-1", "test-0-2"])
+
+    def test_panel_no_range(self):
+        panel = Panel(make_voters(["yes", "yes", "yes", "no", "no"]))
+
+        decision, results = panel.invoke("prompt", {}, vote_range=None)
+        self.assertTrue(decision)
+        self.assertEqual(len(results), 5)
+
+    def test_panel_int_default_range(self):
+        replies = ["1", "1", "1", "9", "9"]
+        panel = Panel(make_voters(replies))
+
+        decision, results = panel.invoke(
+            "prompt", {}, result_parser=int_result, min_threshold=2
+        )
+        self.assertEqual(list(results.values()), [1, 1, 1, 9, 9])
+        self.assertEqual(decision, condition_threshold_mean(2, 1, 1, 1, 9, 9))
+        self.assertTrue(decision)
+
+    def test_panel_projected_decision(self):
+        panel = Panel(make_voters(["2", "2", "2", "1", "1"]))
+
+        decision, results = panel.invoke(
+            "prompt",
+            {},
+            result_parser=int_result,
+            decision_condition=condition_threshold_sum,
+            min_threshold=6,
+            vote_range=(1, 2),
+        )
+
+        # the first two votes alone do not pass the threshold, but any three more will
+        self.assertEqual(len(results), 2)
+        self.assertFalse(condition_threshold_sum(6, *results.values()))
+        self.assertTrue(decision)
+
+    def test_panel_parallel_weights(self):
+        llm = MockLLM(["yes"])
+        agent = Agent("test", "Test agent", {}, llm)
+        panel = Panel(agent, weights=4)
+
+        decision, results = panel.invoke("prompt", {}, max_concurrency=4)
+        self.assertTrue(decision)
+        self.assertEqual(len(results), 4)
+
+        # the weighted votes do not share the agent's memory between threads
+        self.assertEqual(len(agent.memory), 0)
+        self.assertEqual(len(llm.messages), 8)
+
+    def test_panel_parallel(self):
+        release = Event()
+        agents = make_voters(["yes"] * 5) + [
+            Agent(f"test-{i}", "Test agent", {}, BlockingLLM(["no"], release))
+            for i in range(5, 8)
+        ]
+        panel = Panel(agents)
+
+        decision, results = panel.invoke(
+            "prompt", {}, max_concurrency=8, vote_range=(False, True)
+        )
+        release.set()
+
+        self.assertTrue(decision)
+        self.assertEqual(list(results.keys()), [f"test-{i}-0" for i in range(5)])
+
+    def test_panel_trace(self):
+        outputs = []
+
+        @contextmanager
+        def capture_trace(name, kind):
+            yield (lambda *args, **kwargs: None), outputs.append
+
+        set_tracer(capture_trace)
+        try:
+            panel = Panel(make_voters(["no", "no", "yes", "yes"]))
+            panel.invoke("prompt", {}, vote_range=(False, True))
+        finally:
+            set_tracer("console")
+
+        panel_output = outputs[-1]
+        self.assertEqual(panel_output["votes"], {"False": 2})
+        self.assertEqual(panel_output["sampled"], 2)
+        self.assertEqual(panel_output["total"], 4)
+        self.assertTrue(panel_output["early_exit"])
@@ -0,0 +1,85 @@
+from unittest import TestCase
+
+from packit.agent import Agent
+from packit.loops import CascadeStats, loop_cascade
+from packit.results import bool_result
+from tests.mocks import MockLLM
+
+
+class TestLoopCascade(TestCase):
+    def test_first_tier(self):
+        small = Agent("small", "Test agent", {}, MockLLM(["yes"]))
+        large = Agent("large", "Test agent", {}, MockLLM(["no"]))
+        stats = CascadeStats()
+
+        result = loop_cascade(
+            [small, large], "test", result_parser=bool_result, stats=stats
+        )
+        self.assertTrue(result)
+        self.assertEqual(stats.answered["small"], 1)
+        self.assertEqual(stats.answered["large"], 0)
+
+    def test_escalate_on_failures(self):
+        small_llm = MockLLM(["maybe", "perhaps", "yes"])
+        small = Agent("small", "Test agent", {}, small_llm)
+        large = Agent("large", "Test agent", {}, MockLLM(["no"]))
+        stats = CascadeStats()
+
+        def result_parser(value, **kwargs):
+            if value not in ["yes", "no"]:
+                raise ValueError("not a boolean")
+
+            return value == "yes"
+
+        result = loop_cascade(
+            [small, large],
+            "test",
+            max_failures=2,
+            result_parser=result_parser,
+            stats=stats,
+        )
+        self.assertFalse(result)
+        self.assertEqual(small_llm.index, 2)
+        self.assertEqual(stats.summary()["failed"], {"small": 1})
+        self.assertEqual(stats.summary()["answered"], {"large": 1})
+
+    def test_escalate_on_confidence(self):
+        small = Agent("small", "Test agent", {}, MockLLM(["unsure"]))
+        large = Agent("large", "Test agent", {}, MockLLM(["sure"]))
+        stats = CascadeStats()
+
+        result = loop_cascade(
+            [small, large],
+            "test",
+            confidence_check=lambda value: value != "unsure",
+            stats=stats,
+        )
+        self.assertEqual(result, "sure")
+        self.assertEqual(stats.rejected["small"], 1)
+
+        stats.reset()
+        self.assertEqual(
+            stats.summary(), {"answered": {}, "failed": {}, "rejected": {}}
+        )
+
+    def test_last_tier_trusted(self):
+        small = Agent("small", "Test agent", {}, MockLLM(["unsure"]))
+
+        result = loop_cascade(
+            [small], "test", confidence_check=lambda value: False, stats=None
+        )
+        self.assertEqual(result, "unsure")
+
+    def test_all_tiers_failed(self):
+        def result_parser(value, **kwargs):
+            raise ValueError("never parses")
+
+        small = Agent("small", "Test agent", {}, MockLLM(["a", "b"]))
+        large = Agent("large", "Test agent", {}, MockLLM(["c", "d"]))
+
+        with self.assertRaises(ValueError):
+            loop_cascade([small, large], "test", result_parser=result_parser)
+
+    def test_no_tiers(self):
+        with self.assertRaises(ValueError):
+            loop_cascade([], "test")
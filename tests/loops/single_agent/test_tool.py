@@ -42,3 +42,20 @@ class TestLoopTool(TestCase):
             agent, "test", result_parser=multi_function_or_str_result, toolbox=toolbox
         )
         self.assertEqual(result, "output")
+
+    def test_stream_tool_calls(self):
+        calls = []
+
+        def test_tool(value: str):
+            calls.append(value)
+            return "done"
+
+        call = '{"function": "test_tool", "parameters": {"value": "test"}}'
+        llm = MockLLM([call + " and a long explanation of the call"])
+        agent = Agent("test", "Test agent", {}, llm)
+
+        toolbox = Toolbox([test_tool])
+        result = loop_tool(agent, "test", toolbox=toolbox, stream_tool_calls=True)
+        self.assertEqual(result, "done")
+        self.assertEqual(calls, ["test"])
+        self.assertEqual(llm.chunks_sent, len(call) // 2)
@@ -0,0 +1,165 @@
+from asyncio import gather, sleep
+from unittest import IsolatedAsyncioTestCase
+
+from packit.agent import Agent
+from packit.conditions import condition_quorum
+from packit.loops import (
+    aloop_converse,
+    aloop_map,
+    aloop_reduce,
+    aloop_retry,
+    aloop_tool,
+)
+from packit.results import multi_function_or_str_result
+from packit.toolbox import Toolbox
+from tests.mocks import MockLLM
+
+
+class TestAsyncMapLoop(IsolatedAsyncioTestCase):
+    async def test_map_loop(self):
+        llms = [MockLLM([f"test-{i}"]) for i in range(100)]
+        agents = [Agent(f"test-{i}", "Test agent", {}, llms[i]) for i in range(100)]
+
+        result = await aloop_map(agents, "test")
+        self.assertEqual(result, [f"test-{i}" for i in range(11)])
+
+    async def test_map_loop_sync_invoker(self):
+        llms = [MockLLM([f"test-{i}"]) for i in range(100)]
+        agents = [Agent(f"test-{i}", "Test agent", {}, llms[i]) for i in range(100)]
+
+        def agent_invoker(agent, prompt, context, **kwargs):
+            return agent.name
+
+        result = await aloop_map(agents, "test", agent_invoker=agent_invoker)
+        self.assertEqual(result, [f"test-{i}" for i in range(11)])
+
+    async def test_concurrent_maps(self):
+        llm = MockLLM(["test"])
+        agents = [Agent(f"test-{i}", "Test agent", {}, llm) for i in range(4)]
+
+        results = await gather(*[aloop_map(agents, "test") for _ in range(8)])
+        self.assertEqual(len(results), 8)
+        for result in results:
+            self.assertEqual(result, ["test"] * 11)
+
+    async def test_map_loop_parallel(self):
+        active = 0
+        peak = 0
+
+        async def slow_invoker(agent, prompt, context=None, **kwargs):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+
+            index = int(agent.name.split("-")[1])
+            await sleep(0.01 * (6 - index))
+            active -= 1
+            return agent.name
+
+        agents = [Agent(f"test-{i}", "Test agent", {}, MockLLM([""])) for i in range(6)]
+        result = await aloop_map(
+            agents,
+            "test",
+            agent_invoker=slow_invoker,
+            max_concurrency=3,
+            stop_condition=lambda current=0, **kwargs: current >= 6,
+        )
+        self.assertEqual(result, [f"test-{i}" for i in range(6)])
+        self.assertEqual(peak, 3)
+
+    async def test_map_loop_parallel_shared_agent(self):
+        agent = Agent("test", "Test agent", {}, MockLLM(["test"]))
+
+        result = await aloop_map(
+            agent,
+            "test",
+            max_concurrency=4,
+            stop_condition=lambda current=0, **kwargs: current >= 8,
+        )
+        self.assertEqual(result, ["test"] * 8)
+        self.assertEqual(len(agent.memory), 0)
+
+    async def test_map_loop_parallel_quorum(self):
+        finished = []
+
+        async def invoker(agent, prompt, context=None, **kwargs):
+            index = int(agent.name.split("-")[1])
+            if index >= 3:
+                await sleep(1)
+
+            finished.append(agent.name)
+            return "yes" if index < 3 else "no"
+
+        agents = [Agent(f"test-{i}", "Test agent", {}, MockLLM([""])) for i in range(8)]
+        result = await aloop_map(
+            agents,
+            "test",
+            agent_invoker=invoker,
+            max_concurrency=8,
+            stop_condition=condition_quorum(3, max=7),
+        )
+        self.assertEqual(result, ["yes", "yes", "yes"])
+        self.assertEqual(finished, ["test-0", "test-1", "test-2"])
+
+
+class TestAsyncReduceLoop(IsolatedAsyncioTestCase):
+    async def test_reduce_loop(self):
+        llms = [MockLLM([f"test-{i}"]) for i in range(100)]
+        agents = [Agent(f"test-{i}", "Test agent", {}, llms[i]) for i in range(100)]
+
+        result = await aloop_reduce(agents, "test")
+        self.assertEqual(result, "test-10")
+
+
+class TestAsyncRetryLoop(IsolatedAsyncioTestCase):
+    async def test_eventual_success(self):
+        counter = 0
+
+        def result_parser(value, **kwargs):
+            nonlocal counter
+
+            if counter > 0:
+                return value
+            else:
+                counter += 1
+                raise ValueError("Test error")
+
+        llm = MockLLM(["test 1", "test 2", "test 3"])
+        agent = Agent("test", "Test agent", {}, llm)
+
+        result = await aloop_retry(agent, "test", result_parser=result_parser)
+        self.assertEqual(result, "test 2")
+
+    async def test_eventual_exhaustion(self):
+        def result_parser(value, **kwargs):
+            raise ValueError("Test error")
+
+        llm = MockLLM(["test 1", "test 2", "test 3"])
+        agent = Agent("test", "Test agent", {}, llm)
+
+        with self.assertRaises(ValueError):
+            await aloop_retry(agent, "test", result_parser=result_parser)
+
+
+class TestAsyncToolLoop(IsolatedAsyncioTestCase):
+    async def test_immediate_success(self):
+        def test_tool():
+            return "done"
+
+        llm = MockLLM(['{"function": "test_tool"}', "done"])
+        agent = Agent("test", "Test agent", {}, llm)
+
+        toolbox = Toolbox([test_tool])
+        result = await aloop_tool(
+            agent, "test", result_parser=multi_function_or_str_result, toolbox=toolbox
+        )
+        self.assertEqual(result, "done")
+
+
+class TestAsyncConverseLoop(IsolatedAsyncioTestCase):
+    async def test_converse(self):
+        llm = MockLLM(["test"])
+        agents = [Agent(f"test-{i}", "Test agent", {}, llm) for i in range(2)]
+
+        result = await aloop_converse(agents, "test")
+        self.assertEqual(result, "test")
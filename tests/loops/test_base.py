@@ -1,8 +1,14 @@
+from threading import Event, Lock
+from time import sleep
 from unittest import TestCase
 
 from packit.agent import Agent
-from packit.loops import loop_map, loop_reduce
+from packit.conditions import condition_quorum
+from packit.context import get_loop_context
+from packit.errors import DeadlineError
+from packit.loops import iter_map, iter_reduce, loop_map, loop_reduce
 from packit.memory import make_limited_memory, memory_order_width
+from packit.toolbox import Toolbox
 from tests.mocks import MockLLM
 
 
@@ -50,6 +56,183 @@ class TestMapLoop(TestCase):
             result, [*(f"test-{i}" for i in range(10)), None]
         )  # TODO: why is there a None at the end?
 
+    def test_map_loop_batch(self):
+        llm = MockLLM([f"test-{i}" for i in range(11)])
+        agents = [Agent(f"test-{i}", "Test agent", {}, llm) for i in range(100)]
+
+        result = loop_map(agents, "test", batch=True)
+        self.assertEqual(result, [f"test-{i}" for i in range(11)])
+        self.assertEqual(llm.batches, [11])
+
+    def test_map_loop_batch_multiple_llms(self):
+        llms = [MockLLM([f"test-{i}"]) for i in range(3)]
+        agents = [Agent(f"test-{i}", "Test agent", {}, llms[i % 3]) for i in range(6)]
+
+        def result_parser(value, agent=None, **kwargs):
+            return f"{agent.name}: {value}"
+
+        result = loop_map(agents, "test", batch=True, result_parser=result_parser)
+        self.assertEqual(result, [f"test-{i % 6}: test-{i % 3}" for i in range(11)])
+        self.assertEqual([llm.batches for llm in llms], [[4], [4], [3]])
+
+    def test_map_loop_parallel(self):
+        active = 0
+        peak = 0
+        lock = Lock()
+
+        def slow_invoker(agent, prompt, context=None, **kwargs):
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+
+            # later agents finish first
+            index = int(agent.name.split("-")[1])
+            sleep(0.01 * (10 - index))
+
+            with lock:
+                active -= 1
+
+            return agent.name
+
+        agents = [
+            Agent(f"test-{i}", "Test agent", {}, MockLLM([""])) for i in range(10)
+        ]
+        result = loop_map(
+            agents,
+            "test",
+            agent_invoker=slow_invoker,
+            max_concurrency=4,
+            stop_condition=lambda current=0, **kwargs: current >= 10,
+        )
+        self.assertEqual(result, [f"test-{i}" for i in range(10)])
+        self.assertLessEqual(peak, 4)
+        self.assertGreater(peak, 1)
+
+    def test_map_loop_parallel_shared_agent(self):
+        class CountingLLM(MockLLM):
+            def __init__(self, replies):
+                super().__init__(replies)
+                self.lengths = []
+
+            def invoke(self, messages, **kwargs):
+                self.lengths.append(len(messages))
+                return super().invoke(messages, **kwargs)
+
+        llm = CountingLLM(["test"])
+        agent = Agent("test", "Test agent", {}, llm)
+
+        result = loop_map(
+            agent,
+            "test",
+            max_concurrency=4,
+            stop_condition=lambda current=0, **kwargs: current >= 8,
+        )
+        self.assertEqual(result, ["test"] * 8)
+
+        # the branches do not share the agent's memory between threads
+        self.assertEqual(llm.lengths, [2] * 8)
+        self.assertEqual(len(agent.memory), 0)
+
+    def test_map_loop_parallel_history(self):
+        histories = []
+
+        def memory_maker(history, result):
+            history.append(result)
+
+        def invoker(agent, prompt, context=None, **kwargs):
+            histories.append(list(context["history"]))
+            return agent.name
+
+        agents = [Agent(f"test-{i}", "Test agent", {}, MockLLM([""])) for i in range(3)]
+        result = loop_map(
+            agents,
+            "test",
+            agent_invoker=invoker,
+            max_concurrency=3,
+            memory_factory=list,
+            memory_maker=memory_maker,
+            result_parser=lambda value, **kwargs: value.upper(),
+            stop_condition=lambda current=0, **kwargs: current >= 3,
+        )
+        self.assertEqual(result, ["TEST-0", "TEST-1", "TEST-2"])
+        self.assertEqual(histories, [[], [], []])
+
+    def test_map_loop_parallel_context(self):
+        toolbox = Toolbox([])
+
+        def invoker(agent, prompt, context=None, **kwargs):
+            return get_loop_context().toolbox
+
+        agents = [Agent(f"test-{i}", "Test agent", {}, MockLLM([""])) for i in range(3)]
+        result = loop_map(
+            agents,
+            "test",
+            agent_invoker=invoker,
+            max_concurrency=2,
+            toolbox=toolbox,
+            stop_condition=lambda current=0, **kwargs: current >= 3,
+        )
+        self.assertEqual(result, [toolbox] * 3)
+
+    def test_map_loop_parallel_error(self):
+        def invoker(agent, prompt, context=None, **kwargs):
+            if agent.name == "test-1":
+                raise ValueError("test error")
+
+            return agent.name
+
+        agents = [Agent(f"test-{i}", "Test agent", {}, MockLLM([""])) for i in range(3)]
+        with self.assertRaises(ValueError):
+            loop_map(agents, "test", agent_invoker=invoker, max_concurrency=2)
+
+    def test_map_loop_quorum(self):
+        replies = ["yes", "no", "yes", "yes", "no"]
+        agents = [
+            Agent(f"test-{i}", "Test agent", {}, MockLLM([reply]))
+            for i, reply in enumerate(replies)
+        ]
+
+        result = loop_map(agents, "test", stop_condition=condition_quorum(3, max=4))
+        self.assertEqual(result, ["yes", "no", "yes", "yes"])
+
+    def test_map_loop_parallel_quorum(self):
+        release = Event()
+        started = []
+        cancelled = []
+
+        def invoker(agent, prompt, context=None, **kwargs):
+            index = int(agent.name.split("-")[1])
+            if index < 3:
+                return "yes"
+
+            # the other agents are still running when the quorum is reached
+            started.append(agent.name)
+            release.wait(1)
+            try:
+                get_loop_context().check_deadline()
+            except DeadlineError:
+                cancelled.append(agent.name)
+                raise
+
+            return "no"
+
+        agents = [Agent(f"test-{i}", "Test agent", {}, MockLLM([""])) for i in range(8)]
+        result = loop_map(
+            agents,
+            "test",
+            agent_invoker=invoker,
+            max_concurrency=4,
+            stop_condition=condition_quorum(3, max=7),
+        )
+        self.assertEqual(result, ["yes", "yes", "yes"])
+
+        release.set()
+        sleep(0.1)
+        self.assertGreater(len(started), 0)
+        self.assertLess(len(started), 5)
+        self.assertEqual(sorted(cancelled), sorted(started))
+
 
 class TestReduceLoop(TestCase):
     def test_reduce_loop(self):
@@ -58,3 +241,110 @@ class TestReduceLoop(TestCase):
 
         result = loop_reduce(agents, "test")
         self.assertEqual(result, "test-10")
+
+
+class TestIterLoops(TestCase):
+    def test_iter_map(self):
+        llms = [MockLLM([f"test-{i}"]) for i in range(5)]
+        agents = [Agent(f"test-{i}", "Test agent", {}, llms[i]) for i in range(5)]
+
+        results = []
+        for result in iter_map(
+            agents, "test", stop_condition=lambda current=0, **kwargs: current >= 5
+        ):
+            self.assertIsNone(get_loop_context())
+            results.append(result)
+
+        self.assertEqual(results, [f"test-{i}" for i in range(5)])
+
+    def test_iter_map_close(self):
+        calls = []
+
+        def invoker(agent, prompt, context=None, **kwargs):
+            calls.append(agent.name)
+            return agent.name
+
+        agents = [Agent(f"test-{i}", "Test agent", {}, MockLLM([""])) for i in range(5)]
+        results = iter_map(agents, "test", agent_invoker=invoker)
+        self.assertEqual(next(results), "test-0")
+        results.close()
+
+        self.assertEqual(calls, ["test-0"])
+
+    def test_iter_map_completion_order(self):
+        def slow_invoker(agent, prompt, context=None, **kwargs):
+            index = int(agent.name.split("-")[1])
+            sleep(0.02 * (3 - index))
+            return agent.name
+
+        agents = [Agent(f"test-{i}", "Test agent", {}, MockLLM([""])) for i in range(3)]
+
+        def stop_condition(current=0, **kwargs):
+            return current >= 3
+
+        ordered = list(
+            iter_map(
+                agents,
+                "test",
+                agent_invoker=slow_invoker,
+                max_concurrency=3,
+                stop_condition=stop_condition,
+            )
+        )
+        self.assertEqual(ordered, ["test-0", "test-1", "test-2"])
+
+        completed = list(
+            iter_map(
+                agents,
+                "test",
+                agent_invoker=slow_invoker,
+                max_concurrency=3,
+                ordered=False,
+                stop_condition=stop_condition,
+            )
+        )
+        self.assertEqual(completed, ["test-2", "test-1", "test-0"])
+
+    def test_iter_map_parallel_close(self):
+        calls = []
+
+        def invoker(agent, prompt, context=None, **kwargs):
+            calls.append(agent.name)
+            sleep(0.01)
+            return agent.name
+
+        agents = [
+            Agent(f"test-{i}", "Test agent", {}, MockLLM([""])) for i in range(10)
+        ]
+        results = iter_map(
+            agents,
+            "test",
+            agent_invoker=invoker,
+            max_concurrency=1,
+            stop_condition=lambda current=0, **kwargs: current >= 10,
+        )
+        self.assertEqual(next(results), "test-0")
+        results.close()
+        sleep(0.05)
+
+        self.assertLess(len(calls), 10)
+
+    def test_iter_map_quorum(self):
+        llm = MockLLM(["yes", "no", "yes"])
+        agent = Agent("test", "Test agent", {}, llm)
+
+        results = list(
+            iter_map(agent, "test", stop_condition=condition_quorum(2, max=9))
+        )
+        self.assertEqual(results, ["yes", "no", "yes"])
+
+    def test_iter_reduce(self):
+        llm = MockLLM(["step-1", "step-2", "step-3"])
+        agent = Agent("test", "Test agent", {}, llm)
+
+        steps = list(
+            iter_reduce(
+                agent, "test", stop_condition=lambda current=0, **kwargs: current >= 3
+            )
+        )
+        self.assertEqual(steps, ["step-1", "step-2", "step-3"])
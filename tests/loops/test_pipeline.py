@@ -0,0 +1,163 @@
+from functools import partial
+from threading import Barrier
+from time import sleep
+from unittest import TestCase
+
+from packit.agent import Agent
+from packit.cache import MemoryCache
+from packit.conditions import condition_threshold
+from packit.loops import Pipeline, loop_map, loop_reduce
+from tests.mocks import MockLLM
+
+
+class TestPipeline(TestCase):
+    def test_loops(self):
+        pros = Agent("pros", "test", {}, MockLLM(["pro"]))
+        cons = Agent("cons", "test", {}, MockLLM(["con"]))
+        judge = Agent("judge", "test", {}, MockLLM(["verdict"]))
+        once = partial(condition_threshold, 0)
+
+        pipeline = (
+            Pipeline()
+            .add(
+                "pros",
+                loop_map,
+                inputs={"prompt": "topic"},
+                agents=[pros],
+                stop_condition=once,
+            )
+            .add(
+                "cons",
+                loop_map,
+                inputs={"prompt": "topic"},
+                agents=[cons],
+                stop_condition=once,
+            )
+            .add(
+                "arguments",
+                lambda parts: "\n".join(part[0] for part in parts),
+                inputs={"parts": ["pros", "cons"]},
+            )
+            .add(
+                "verdict",
+                loop_reduce,
+                inputs={"prompt": "arguments"},
+                agents=[judge],
+                stop_condition=once,
+            )
+        )
+        result = pipeline.run({"topic": "test"})
+
+        self.assertEqual(result["pros"], ["pro"])
+        self.assertEqual(result["arguments"], "pro\ncon")
+        self.assertEqual(result["verdict"], "verdict")
+        self.assertEqual(list(result.outputs), ["pros", "cons", "arguments", "verdict"])
+
+    def test_parallel_branches(self):
+        # both branches must be waiting at the barrier at the same time
+        barrier = Barrier(2, timeout=5)
+
+        def branch(value):
+            barrier.wait()
+            return value
+
+        pipeline = (
+            Pipeline(max_concurrency=2)
+            .add("left", branch, inputs={"value": "input"})
+            .add("right", branch, inputs={"value": "input"})
+        )
+        result = pipeline.run({"input": "test"})
+        self.assertEqual(result.outputs, {"left": "test", "right": "test"})
+
+    def test_cache(self):
+        calls = []
+
+        def node(value):
+            calls.append(value)
+            return value.upper()
+
+        cache = MemoryCache()
+        pipeline = Pipeline(cache=cache).add("upper", node, inputs={"value": "input"})
+
+        self.assertEqual(pipeline.run({"input": "a"})["upper"], "A")
+        result = pipeline.run({"input": "a"})
+        self.assertEqual(result["upper"], "A")
+        self.assertTrue(result.timings["upper"].cached)
+        self.assertEqual(pipeline.run({"input": "b"})["upper"], "B")
+        self.assertEqual(calls, ["a", "b"])
+
+    def test_cache_node_kwargs(self):
+        calls = []
+
+        def node(value, suffix):
+            calls.append(suffix)
+            return value + suffix
+
+        cache = MemoryCache()
+        first = Pipeline(cache=cache).add("join", node, {"value": "input"}, suffix="!")
+        second = Pipeline(cache=cache).add("join", node, {"value": "input"}, suffix="?")
+
+        self.assertEqual(first.run({"input": "a"})["join"], "a!")
+        self.assertEqual(second.run({"input": "a"})["join"], "a?")
+        self.assertTrue(first.run({"input": "a"}).timings["join"].cached)
+        self.assertEqual(calls, ["!", "?"])
+
+    def test_cache_unserializable_kwargs(self):
+        calls = []
+
+        def node(value, agent):
+            calls.append(value)
+            return value
+
+        cache = MemoryCache()
+        pipeline = Pipeline(cache=cache).add(
+            "node", node, {"value": "input"}, agent=object()
+        )
+
+        pipeline.run({"input": "a"})
+        result = pipeline.run({"input": "a"})
+        self.assertFalse(result.timings["node"].cached)
+        self.assertEqual(calls, ["a", "a"])
+
+    def test_critical_path(self):
+        def wait(delay, value=None):
+            sleep(delay)
+            return delay
+
+        pipeline = (
+            Pipeline(max_concurrency=2)
+            .add("fast", wait, delay=0.01)
+            .add("slow", wait, delay=0.1)
+            .add("join", wait, inputs={"value": ["fast", "slow"]}, delay=0.01)
+        )
+        result = pipeline.run()
+
+        self.assertEqual(result.critical_path, ["slow", "join"])
+        self.assertGreaterEqual(result.critical_time, 0.11)
+        self.assertLess(result.wall_time, 0.11 + 0.1)
+        self.assertEqual(set(result.report()["nodes"]), {"fast", "slow", "join"})
+
+    def test_error(self):
+        def fail():
+            raise ValueError("node failed")
+
+        pipeline = (
+            Pipeline().add("fail", fail).add("after", str, inputs={"object": "fail"})
+        )
+        with self.assertRaises(ValueError):
+            pipeline.run()
+
+    def test_invalid_graphs(self):
+        with self.assertRaises(ValueError):
+            Pipeline().add("node", str).add("node", str)
+
+        with self.assertRaises(ValueError):
+            Pipeline().add("node", str, inputs={"object": "missing"}).run()
+
+        with self.assertRaises(ValueError):
+            Pipeline().add("a", str, inputs={"object": "b"}).add(
+                "b", str, inputs={"object": "a"}
+            ).run()
+
+        with self.assertRaises(ValueError):
+            Pipeline().add("node", str).run({"node": "shadowed"})
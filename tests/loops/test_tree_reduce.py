@@ -0,0 +1,106 @@
+from threading import Lock
+from unittest import TestCase
+
+from packit.agent import Agent
+from packit.loops import loop_tree_reduce
+from packit.utils import split_text
+from tests.mocks import MockLLM
+
+
+def make_invoker():
+    calls = []
+    lock = Lock()
+
+    def invoker(agent, prompt, context=None, **kwargs):
+        with lock:
+            calls.append(prompt)
+
+        if "chunk" in context and "parts" not in context:
+            return context["chunk"].upper()
+
+        return "(" + context["parts"].replace("\n\n", "+") + ")"
+
+    return invoker, calls
+
+
+class TestTreeReduceLoop(TestCase):
+    def test_pairwise(self):
+        invoker, calls = make_invoker()
+        agent = Agent("test", "Test agent", {}, MockLLM([""]))
+
+        result = loop_tree_reduce(
+            agent,
+            ["a", "b", "c", "d", "e"],
+            map_prompt="map",
+            combine_prompt="combine",
+            agent_invoker=invoker,
+        )
+        self.assertEqual(result, "(((A+B)+(C+D))+E)")
+        self.assertEqual(calls.count("map"), 5)
+        self.assertEqual(calls.count("combine"), 4)
+
+    def test_fan_in(self):
+        invoker, calls = make_invoker()
+        agent = Agent("test", "Test agent", {}, MockLLM([""]))
+
+        result = loop_tree_reduce(
+            agent,
+            ["a", "b", "c", "d", "e"],
+            agent_invoker=invoker,
+            fan_in=3,
+            max_concurrency=None,
+        )
+        self.assertEqual(result, "((A+B+C)+(D+E))")
+
+    def test_single_chunk(self):
+        invoker, calls = make_invoker()
+        agent = Agent("test", "Test agent", {}, MockLLM([""]))
+
+        result = loop_tree_reduce(agent, "short", agent_invoker=invoker)
+        self.assertEqual(result, "SHORT")
+        self.assertEqual(len(calls), 1)
+
+    def test_agents(self):
+        llm = MockLLM(["summary"])
+        agents = [Agent(f"test-{i}", "Test agent", {}, llm) for i in range(2)]
+
+        result = loop_tree_reduce(
+            agents, ["a", "b", "c"], result_parser=lambda value, **kwargs: value
+        )
+        self.assertEqual(result, "summary")
+
+    def test_invalid_fan_in(self):
+        agent = Agent("test", "Test agent", {}, MockLLM([""]))
+        with self.assertRaises(ValueError):
+            loop_tree_reduce(agent, "test", fan_in=1)
+
+    def test_bounded_context(self):
+        class CountingLLM(MockLLM):
+            def __init__(self, replies):
+                super().__init__(replies)
+                self.lengths = []
+
+            def invoke(self, messages, **kwargs):
+                self.lengths.append(len(messages))
+                return super().invoke(messages, **kwargs)
+
+        llm = CountingLLM(["summary"])
+        agent = Agent("test", "Test agent", {}, llm)
+
+        result = loop_tree_reduce(agent, ["a", "b", "c", "d", "e", "f"])
+        self.assertEqual(result, "summary")
+
+        # every call sees only the backstory and its own prompt
+        self.assertEqual(llm.lengths, [2] * 11)
+        self.assertEqual(len(agent.memory), 0)
+
+
+class TestSplitText(TestCase):
+    def test_split_paragraphs(self):
+        text = "\n\n".join(["aaaa", "bbbb", "cccc"])
+        self.assertEqual(split_text(text, chunk_size=10), ["aaaa\n\nbbbb", "cccc"])
+
+    def test_split_long_piece(self):
+        self.assertEqual(
+            split_text("a" * 25, chunk_size=10), ["a" * 10, "a" * 10, "a" * 5]
+        )
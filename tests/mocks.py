@@ -13,18 +13,48 @@ class MockResponse:
 
 
 class MockLLM:
+    batches: list[int]
+    chunk_size: int
+    chunks_sent: int
     index: int
     messages: list[MemoryType]
-    replies: list[str]
+    replies: list[str | MockResponse]
 
-    def __init__(self, replies: list[str], start_index=0):
+    def __init__(self, replies: list[str | MockResponse], start_index=0, chunk_size=2):
+        self.batches = []
+        self.chunk_size = chunk_size
+        self.chunks_sent = 0
         self.index = 0
         self.messages = []
         self.replies = replies
 
-    def invoke(self, messages: list[MemoryType]) -> str:
+    def invoke(self, messages: list[MemoryType], **kwargs) -> str:
         self.messages.extend(messages)
         reply = self.replies[self.index]
 
         self.index = (self.index + 1) % len(self.replies)
+        if isinstance(reply, MockResponse):
+            return reply
+
         return MockResponse(reply, DEFAULT_STOP)
+
+    async def ainvoke(self, messages: list[MemoryType], **kwargs) -> str:
+        return self.invoke(messages, **kwargs)
+
+    def batch(
+        self, inputs: list[list[MemoryType]], config=None, **kwargs
+    ) -> list[MockResponse]:
+        self.batches.append(len(inputs))
+        return [self.invoke(messages) for messages in inputs]
+
+    def stream(self, messages: list[MemoryType], **kwargs):
+        response = self.invoke(messages, **kwargs)
+        content = response.content
+        for i in range(0, len(content), self.chunk_size):
+            self.chunks_sent += 1
+            metadata = DEFAULT_STOP if i + self.chunk_size >= len(content) else {}
+            yield MockResponse(content[i : i + self.chunk_size], metadata)
+
+    async def astream(self, messages: list[MemoryType], **kwargs):
+        for chunk in self.stream(messages, **kwargs):
+            yield chunk
@@ -0,0 +1,201 @@
+from asyncio import sleep as async_sleep
+from time import monotonic, sleep
+from unittest import IsolatedAsyncioTestCase, TestCase
+
+from packit.agent import Agent
+from packit.models import HedgedModel, LatencyHistogram
+from tests.mocks import MockLLM
+
+
+class SlowLLM(MockLLM):
+    def __init__(self, replies: list[str], delay: float, error: bool = False):
+        super().__init__(replies)
+        self.calls = 0
+        self.cancelled = False
+        self.closed = False
+        self.delay = delay
+        self.error = error
+
+    def invoke(self, messages):
+        self.calls += 1
+        sleep(self.delay)
+        if self.error:
+            raise ValueError("backend failed")
+
+        return super().invoke(messages)
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        try:
+            await async_sleep(self.delay)
+        except BaseException:
+            self.cancelled = True
+            raise
+
+        if self.error:
+            raise ValueError("backend failed")
+
+        return super().invoke(messages)
+
+    def stream(self, messages):
+        try:
+            yield from super().stream(messages)
+        finally:
+            self.closed = True
+
+    async def astream(self, messages):
+        self.calls += 1
+        try:
+            await async_sleep(self.delay)
+        except BaseException:
+            self.cancelled = True
+            raise
+
+        for chunk in super().stream(messages):
+            yield chunk
+
+
+class TestLatencyHistogram(TestCase):
+    def test_empty(self):
+        self.assertIsNone(LatencyHistogram().percentile(0.5))
+
+    def test_percentile(self):
+        histogram = LatencyHistogram()
+        for _ in range(90):
+            histogram.record(0.1)
+        for _ in range(10):
+            histogram.record(5.0)
+
+        self.assertAlmostEqual(histogram.percentile(0.5), 0.1, delta=0.02)
+        self.assertAlmostEqual(histogram.percentile(0.99), 5.0, delta=0.7)
+
+
+class TestHedgedModel(TestCase):
+    def test_fast_primary(self):
+        primary = SlowLLM(["primary"], delay=0.0)
+        secondary = SlowLLM(["secondary"], delay=0.0)
+        model = HedgedModel([primary, secondary], initial_delay=1.0)
+
+        self.assertEqual(model.invoke(["prompt"]).content, "primary")
+        self.assertEqual(secondary.calls, 0)
+        self.assertEqual(model.hedges, 0)
+        model.close()
+
+    def test_slow_primary(self):
+        primary = SlowLLM(["primary"], delay=0.5)
+        secondary = SlowLLM(["secondary"], delay=0.01)
+        model = HedgedModel([primary, secondary], initial_delay=0.05)
+        agent = Agent("test", "backstory", {}, model)
+
+        start = monotonic()
+        self.assertEqual(agent.invoke("prompt", {}), "secondary")
+        self.assertLess(monotonic() - start, 0.4)
+        self.assertEqual(model.hedges, 1)
+        self.assertEqual(model.wins, [0, 1])
+        model.close()
+
+    def test_failed_primary(self):
+        primary = SlowLLM(["primary"], delay=0.0, error=True)
+        secondary = SlowLLM(["secondary"], delay=0.0)
+        model = HedgedModel([primary, secondary], initial_delay=10.0)
+
+        self.assertEqual(model.invoke(["prompt"]).content, "secondary")
+        model.close()
+
+    def test_all_failed(self):
+        primary = SlowLLM(["primary"], delay=0.0, error=True)
+        secondary = SlowLLM(["secondary"], delay=0.0, error=True)
+        model = HedgedModel([primary, secondary], initial_delay=0.01)
+
+        with self.assertRaises(ValueError):
+            model.invoke(["prompt"])
+        model.close()
+
+    def test_adaptive_delay(self):
+        model = HedgedModel([MockLLM(["test"])], initial_delay=2.0, min_samples=5)
+        self.assertEqual(model.hedge_delay(), 2.0)
+
+        for _ in range(5):
+            model.invoke(["prompt"])
+
+        self.assertLess(model.hedge_delay(), 0.1)
+        model.close()
+
+    def test_stream_slow_primary(self):
+        primary = SlowLLM(["primary"], delay=0.3)
+        secondary = SlowLLM(["secondary"], delay=0.01)
+        model = HedgedModel([primary, secondary], initial_delay=0.05)
+
+        chunks = [chunk.content for chunk in model.stream(["prompt"])]
+        self.assertEqual("".join(chunks), "secondary")
+        self.assertEqual(model.hedges, 1)
+        self.assertEqual(model.wins, [0, 1])
+        self.assertEqual(model.stream_histograms[1].count, 1)
+        self.assertEqual(model.histograms[1].count, 0)
+
+        # the primary finishes its first chunk in the background and is then closed
+        model.executor.shutdown(wait=True)
+        self.assertTrue(primary.closed)
+
+    def test_stream_failed_primary(self):
+        primary = SlowLLM(["primary"], delay=0.0, error=True)
+        secondary = SlowLLM(["secondary"], delay=0.0)
+        model = HedgedModel([primary, secondary], initial_delay=10.0)
+
+        chunks = [chunk.content for chunk in model.stream(["prompt"])]
+        self.assertEqual("".join(chunks), "secondary")
+        model.close()
+
+    def test_stream_agent(self):
+        primary = SlowLLM(["primary"], delay=0.3)
+        secondary = SlowLLM(["secondary"], delay=0.01)
+        model = HedgedModel([primary, secondary], initial_delay=0.05)
+        agent = Agent("test", "backstory", {}, model, streaming=True)
+
+        self.assertEqual(agent.invoke("prompt", {}), "secondary")
+        self.assertEqual(model.wins, [0, 1])
+        model.close()
+
+    def test_no_backends(self):
+        with self.assertRaises(ValueError):
+            HedgedModel([])
+
+
+class TestAsyncHedgedModel(IsolatedAsyncioTestCase):
+    async def test_slow_primary(self):
+        primary = SlowLLM(["primary"], delay=0.5)
+        secondary = SlowLLM(["secondary"], delay=0.01)
+        model = HedgedModel([primary, secondary], initial_delay=0.05)
+        agent = Agent("test", "backstory", {}, model)
+
+        self.assertEqual(await agent.ainvoke("prompt", {}), "secondary")
+        await async_sleep(0)
+        self.assertTrue(primary.cancelled)
+        model.close()
+
+    async def test_cancelled_latency(self):
+        primary = SlowLLM(["primary"], delay=0.5)
+        secondary = SlowLLM(["secondary"], delay=0.01)
+        model = HedgedModel([primary, secondary], initial_delay=0.05)
+
+        self.assertEqual((await model.ainvoke("prompt")).content, "secondary")
+        await async_sleep(0)
+
+        # the cancelled primary is recorded with the time it had been running
+        self.assertEqual(model.histograms[0].count, 1)
+        self.assertGreaterEqual(model.histograms[0].percentile(1.0), 0.05)
+        model.close()
+
+    async def test_astream_slow_primary(self):
+        primary = SlowLLM(["primary"], delay=0.5)
+        secondary = SlowLLM(["secondary"], delay=0.01)
+        model = HedgedModel([primary, secondary], initial_delay=0.05)
+
+        chunks = [chunk.content async for chunk in model.astream(["prompt"])]
+        self.assertEqual("".join(chunks), "secondary")
+        self.assertEqual(model.wins, [0, 1])
+
+        await async_sleep(0)
+        self.assertTrue(primary.cancelled)
+        self.assertEqual(model.stream_histograms[0].count, 1)
+        model.close()
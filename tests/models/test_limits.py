@@ -0,0 +1,199 @@
+from asyncio import create_task
+from asyncio import sleep as async_sleep
+from threading import Lock, Thread
+from time import sleep
+from unittest import IsolatedAsyncioTestCase, TestCase
+
+from packit.agent import Agent
+from packit.models import RateLimitedModel, RateLimiter, TokenBucket, is_retryable
+from tests.mocks import MockLLM
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+class FlakyLLM(MockLLM):
+    def __init__(self, replies: list[str], failures: int):
+        super().__init__(replies)
+        self.failures = failures
+
+    def invoke(self, messages):
+        if self.failures > 0:
+            self.failures -= 1
+            raise RateLimitError("slow down")
+
+        return super().invoke(messages)
+
+
+class TestTokenBucket(TestCase):
+    def test_refill(self):
+        now = 0.0
+        bucket = TokenBucket(60, timer=lambda: now)
+        self.assertEqual(bucket.delay(60), 0.0)
+        bucket.consume(60)
+        self.assertEqual(bucket.delay(1), 1.0)
+
+        now = 1.0
+        self.assertEqual(bucket.delay(1), 0.0)
+
+    def test_large_request(self):
+        bucket = TokenBucket(10, timer=lambda: 0.0)
+        self.assertEqual(bucket.delay(100), 0.0)
+
+
+class TestRateLimiter(TestCase):
+    def test_aimd_window(self):
+        limiter = RateLimiter(max_concurrency=8, initial_concurrency=4)
+        limiter.try_acquire()
+        limiter.release(error=RateLimitError())
+        self.assertEqual(limiter.window, 2.0)
+
+        limiter.try_acquire()
+        limiter.release()
+        self.assertEqual(limiter.window, 2.5)
+
+        for _ in range(100):
+            limiter.try_acquire()
+            limiter.release()
+        self.assertEqual(limiter.window, 8.0)
+
+    def test_window_limits_concurrency(self):
+        limiter = RateLimiter(max_concurrency=2)
+        self.assertEqual(limiter.try_acquire(), 0.0)
+        self.assertEqual(limiter.try_acquire(), 0.0)
+        self.assertGreater(limiter.try_acquire(), 0.0)
+
+        limiter.release()
+        self.assertEqual(limiter.try_acquire(), 0.0)
+
+    def test_request_bucket(self):
+        limiter = RateLimiter(requests_per_minute=2, timer=lambda: 0.0)
+        self.assertEqual(limiter.try_acquire(), 0.0)
+        self.assertEqual(limiter.try_acquire(), 0.0)
+        self.assertEqual(limiter.try_acquire(), 30.0)
+
+    def test_token_bucket(self):
+        limiter = RateLimiter(tokens_per_minute=600, timer=lambda: 0.0)
+        self.assertEqual(limiter.try_acquire(500), 0.0)
+        self.assertEqual(limiter.try_acquire(200), 10.0)
+
+    def test_threads(self):
+        limiter = RateLimiter(max_concurrency=3)
+        lock = Lock()
+        active = 0
+        peak = 0
+
+        def work():
+            nonlocal active, peak
+            limiter.acquire()
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            sleep(0.01)
+            with lock:
+                active -= 1
+            limiter.release()
+
+        threads = [Thread(target=work) for _ in range(12)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertLessEqual(peak, 3)
+        metrics = limiter.metrics()
+        self.assertEqual(metrics["requests"], 12)
+        self.assertEqual(metrics["queue_depth"], 0)
+        self.assertEqual(metrics["wait_count"], 12)
+
+    def test_fifo(self):
+        limiter = RateLimiter(max_concurrency=1)
+        limiter.acquire()
+
+        order = []
+
+        def work(index: int):
+            limiter.acquire()
+            order.append(index)
+            limiter.release()
+
+        threads = []
+        for i in range(5):
+            thread = Thread(target=work, args=(i,))
+            thread.start()
+            threads.append(thread)
+            # wait for each thread to join the queue before starting the next
+            while limiter.metrics()["queue_depth"] < i + 1:
+                sleep(0.001)
+
+        self.assertEqual(limiter.try_acquire(), float("inf"))
+        limiter.release()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(order, [0, 1, 2, 3, 4])
+
+
+class TestRateLimitedModel(TestCase):
+    def test_retry(self):
+        llm = FlakyLLM(["test"], failures=2)
+        limiter = RateLimiter(backoff_base=0.001)
+        agent = Agent("test", "backstory", {}, RateLimitedModel(llm, limiter))
+
+        self.assertEqual(agent.invoke("prompt", {}), "test")
+        self.assertEqual(limiter.retries, 2)
+        self.assertEqual(limiter.throttled, 2)
+
+    def test_retry_exhausted(self):
+        llm = FlakyLLM(["test"], failures=5)
+        model = RateLimitedModel(llm, RateLimiter(max_retries=1, backoff_base=0.001))
+
+        with self.assertRaises(RateLimitError):
+            model.invoke(["prompt"])
+
+    def test_passthrough(self):
+        llm = MockLLM(["test"])
+        llm.temperature = 0.5
+        model = RateLimitedModel(llm, RateLimiter())
+        self.assertEqual(model.temperature, 0.5)
+
+    def test_stream(self):
+        llm = MockLLM(["test reply"])
+        limiter = RateLimiter()
+        model = RateLimitedModel(llm, limiter)
+        chunks = list(model.stream(["prompt"]))
+        self.assertEqual("".join(chunk.content for chunk in chunks), "test reply")
+        self.assertEqual(limiter.active, 0)
+
+    def test_is_retryable(self):
+        self.assertTrue(is_retryable(RateLimitError()))
+        self.assertTrue(is_retryable(TimeoutError()))
+        self.assertFalse(is_retryable(ValueError()))
+
+
+class TestAsyncRateLimitedModel(IsolatedAsyncioTestCase):
+    async def test_retry(self):
+        llm = FlakyLLM(["test"], failures=1)
+        limiter = RateLimiter(backoff_base=0.001)
+        agent = Agent("test", "backstory", {}, RateLimitedModel(llm, limiter))
+
+        self.assertEqual(await agent.ainvoke("prompt", {}), "test")
+        self.assertEqual(limiter.retries, 1)
+
+    async def test_release_wakes_waiter(self):
+        limiter = RateLimiter(max_concurrency=1)
+        await limiter.aacquire()
+
+        task = create_task(limiter.aacquire())
+        await async_sleep(0.01)
+        self.assertFalse(task.done())
+
+        # released from another thread, like a request that finished on a worker
+        thread = Thread(target=limiter.release)
+        thread.start()
+        thread.join()
+
+        await task
+        self.assertEqual(limiter.metrics()["active"], 1)
+        self.assertEqual(limiter.metrics()["queue_depth"], 0)
@@ -1,9 +1,17 @@
 from json import dumps
+from time import monotonic, sleep
 from unittest import TestCase
 
 from packit.agent import Agent
-from packit.errors import ToolError
-from packit.results import function_result, normalize_function_json
+from packit.conditions import condition_threshold
+from packit.context import deadline_scope, get_loop_context, loopum
+from packit.errors import DeadlineError, ToolError
+from packit.results import (
+    FunctionCallDetector,
+    function_result,
+    multi_function_result,
+    normalize_function_json,
+)
 from packit.toolbox import Toolbox
 from tests.mocks import MockLLM
 
@@ -92,3 +100,164 @@ class TestNormalizeFunctionJson(TestCase):
     def test_normalize_nested_function_missing_parameters(self):
         result = normalize_function_json({"function": {"name": "test"}})
         self.assertEqual(result, {"function": "test", "parameters": {}})
+
+
+def sleep_tool(seconds: float) -> str:
+    """
+    Sleep for a while.
+
+    Args:
+        seconds: how long to sleep
+    """
+
+    sleep(seconds)
+    return f"slept {seconds}"
+
+
+class TestMultiFunctionResultParallel(TestCase):
+    def setUp(self):
+        self.agent = Agent("test", "test", {}, MockLLM([]))
+        self.toolbox = Toolbox([sleep_tool])
+
+    def make_calls(self, *seconds: float) -> str:
+        return dumps(
+            [
+                {"function": "sleep_tool", "parameters": {"seconds": value}}
+                for value in seconds
+            ]
+        )
+
+    def test_parallel_order(self):
+        start = monotonic()
+        results = multi_function_result(
+            self.make_calls(0.1, 0.05, 0.1),
+            agent=self.agent,
+            toolbox=self.toolbox,
+            max_concurrency=3,
+        )
+        elapsed = monotonic() - start
+
+        self.assertEqual(results, ["slept 0.1", "slept 0.05", "slept 0.1"])
+        self.assertLess(elapsed, 0.2)
+
+    def test_tool_limits(self):
+        start = monotonic()
+        results = multi_function_result(
+            self.make_calls(0.05, 0.05, 0.05),
+            agent=self.agent,
+            toolbox=self.toolbox,
+            max_concurrency=3,
+            tool_limits={"sleep_tool": 1},
+        )
+        elapsed = monotonic() - start
+
+        self.assertEqual(len(results), 3)
+        self.assertGreaterEqual(elapsed, 0.15)
+
+    def test_tool_timeout(self):
+        with self.assertRaises(ToolError) as context:
+            multi_function_result(
+                self.make_calls(0.01, 0.5),
+                agent=self.agent,
+                toolbox=self.toolbox,
+                max_concurrency=2,
+                tool_timeout=0.1,
+            )
+
+        self.assertEqual(context.exception.tool, "sleep_tool")
+
+    def test_loop_context(self):
+        toolbox = Toolbox([])
+
+        def context_tool() -> str:
+            """
+            Get the current toolbox.
+            """
+
+            return str(get_loop_context().toolbox is toolbox)
+
+        tools = Toolbox([context_tool])
+        with loopum(toolbox=toolbox, stop_condition=condition_threshold):
+            results = multi_function_result(
+                dumps([{"function": "context_tool"}, {"function": "context_tool"}]),
+                agent=self.agent,
+                toolbox=tools,
+                max_concurrency=2,
+            )
+
+        self.assertEqual(results, ["True", "True"])
+
+    def test_parallel_error(self):
+        with self.assertRaises(ToolError):
+            multi_function_result(
+                dumps([{"function": "missing_tool"}, {"function": "missing_tool"}]),
+                agent=self.agent,
+                toolbox=self.toolbox,
+                max_concurrency=2,
+            )
+
+
+def feed_chunks(detector: FunctionCallDetector, text: str, size: int = 3):
+    for i in range(0, len(text), size):
+        match = detector.feed(text[i : i + size])
+        if match is not None:
+            return match, i + size
+
+    return None, len(text)
+
+
+class TestFunctionResultDeadline(TestCase):
+    def test_cancelled(self):
+        calls = []
+
+        def test_tool():
+            calls.append(True)
+
+        agent = Agent("test", "test", {}, MockLLM([]))
+        with deadline_scope() as deadline:
+            deadline.cancel()
+            with self.assertRaises(DeadlineError):
+                function_result(
+                    '{"function": "test_tool"}',
+                    agent=agent,
+                    toolbox=Toolbox([test_tool]),
+                )
+
+        self.assertEqual(calls, [])
+
+
+class TestFunctionCallDetector(TestCase):
+    def test_single_call(self):
+        call = '{"function": "test", "parameters": {"value": 1}}'
+        match, consumed = feed_chunks(FunctionCallDetector(), call + " trailing text")
+        self.assertEqual(match, call)
+        self.assertLess(consumed, len(call) + 3)
+
+    def test_call_list(self):
+        call = '[{"function": "a"}, {"function": {"name": "b", "parameters": {}}}]'
+        match, _ = feed_chunks(FunctionCallDetector(), call + "\n\n[]")
+        self.assertEqual(match, call)
+
+    def test_code_fence(self):
+        call = '{"function": "test"}'
+        match, _ = feed_chunks(
+            FunctionCallDetector(), "  ```json\n" + call + "\n```\n", size=1
+        )
+        self.assertEqual(match, call)
+
+    def test_brackets_in_strings(self):
+        call = '{"function": "test", "parameters": {"value": "}]\\" {"}}'
+        match, _ = feed_chunks(FunctionCallDetector(), call + "{}")
+        self.assertEqual(match, call)
+
+    def test_not_a_call(self):
+        detector = FunctionCallDetector()
+        match, _ = feed_chunks(detector, '{"key": "value"} {"function": "test"}')
+        self.assertIsNone(match)
+        self.assertTrue(detector.disabled)
+
+    def test_prose(self):
+        detector = FunctionCallDetector()
+        match, _ = feed_chunks(detector, 'I will call {"function": "test"}')
+        self.assertIsNone(match)
+        self.assertTrue(detector.disabled)
@@ -0,0 +1,90 @@
+from os import path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from packit.cache import MemoryCache, SQLiteCache, cache_key
+
+
+class TestCacheKey(TestCase):
+    def test_same_messages(self):
+        messages = [SystemMessage(content="system"), HumanMessage(content="human")]
+        self.assertEqual(cache_key(messages), cache_key(list(messages)))
+
+    def test_different_temperature(self):
+        messages = [SystemMessage(content="system"), HumanMessage(content="human")]
+        self.assertNotEqual(
+            cache_key(messages, temperature=0.0), cache_key(messages, temperature=0.5)
+        )
+
+    def test_different_type(self):
+        self.assertNotEqual(
+            cache_key([SystemMessage(content="test")]),
+            cache_key([HumanMessage(content="test")]),
+        )
+
+
+class TestMemoryCache(TestCase):
+    def test_hit_and_miss(self):
+        cache = MemoryCache()
+        self.assertIsNone(cache.get("key"))
+        cache.set("key", "value")
+        self.assertEqual(cache.get("key"), "value")
+        self.assertEqual(cache.stats(), {"hits": 1, "misses": 1})
+
+    def test_lru_eviction(self):
+        cache = MemoryCache(max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+
+    def test_ttl(self):
+        now = 0
+
+        def timer():
+            return now
+
+        cache = MemoryCache(ttl=10, timer=timer)
+        cache.set("key", "value")
+        now = 5
+        self.assertEqual(cache.get("key"), "value")
+        now = 20
+        self.assertIsNone(cache.get("key"))
+
+    def test_skip_sampled(self):
+        self.assertTrue(MemoryCache().accepts(0.0))
+        self.assertTrue(MemoryCache().accepts(None))
+        self.assertFalse(MemoryCache().accepts(0.5))
+        self.assertTrue(MemoryCache(skip_sampled=False).accepts(0.5))
+
+
+class TestSQLiteCache(TestCase):
+    def test_shared_file(self):
+        with TemporaryDirectory() as temp:
+            db = path.join(temp, "cache.db")
+            first = SQLiteCache(db)
+            second = SQLiteCache(db)
+
+            first.set("key", {"content": "value"})
+            self.assertEqual(second.get("key"), {"content": "value"})
+
+            first.close()
+            second.close()
+
+    def test_ttl(self):
+        now = 0
+
+        def timer():
+            return now
+
+        cache = SQLiteCache(":memory:", ttl=10, timer=timer)
+        cache.set("key", "value")
+        now = 20
+        self.assertIsNone(cache.get("key"))
+        self.assertEqual(cache.misses, 1)
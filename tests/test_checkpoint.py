@@ -0,0 +1,225 @@
+from collections import deque
+from functools import partial
+from os import path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from packit.agent import Agent
+from packit.checkpoint import (
+    FileCheckpointStore,
+    MemoryCheckpointStore,
+    SQLiteCheckpointStore,
+    checkpointing,
+    dump_memory,
+    loop_checkpoint,
+    restore_memory,
+)
+from packit.conditions import condition_threshold
+from packit.loops import loop_reduce, loop_retry, loop_team, loop_tool
+from packit.results import int_result
+from packit.toolbox import Toolbox
+from tests.mocks import MockLLM
+
+
+class CrashError(Exception):
+    pass
+
+
+class CrashingLLM(MockLLM):
+    """
+    Mock LLM that crashes after a number of calls, like a process being killed.
+    """
+
+    def __init__(self, replies, limit: int):
+        super().__init__(replies)
+        self.calls = 0
+        self.limit = limit
+
+    def invoke(self, messages, **kwargs):
+        self.calls += 1
+        if self.calls > self.limit:
+            raise CrashError("crashed")
+
+        return super().invoke(messages, **kwargs)
+
+
+class TestCheckpointStores(TestCase):
+    def check_store(self, store):
+        self.assertIsNone(store.load("run", "key"))
+        store.save("run", "key", {"step": 1, "result": "test"})
+        store.save("other", "key", {"step": 2, "result": "other"})
+        self.assertEqual(store.load("run", "key"), {"step": 1, "result": "test"})
+
+        store.clear("run")
+        self.assertIsNone(store.load("run", "key"))
+        self.assertEqual(store.load("other", "key")["step"], 2)
+
+    def test_memory_store(self):
+        self.check_store(MemoryCheckpointStore())
+
+    def test_file_store(self):
+        with TemporaryDirectory() as directory:
+            self.check_store(FileCheckpointStore(directory))
+
+            store = FileCheckpointStore(directory)
+            store.save("run", "key", {"step": 3})
+            self.assertTrue(path.exists(path.join(directory, "run.json")))
+            self.assertEqual(
+                FileCheckpointStore(directory).load("run", "key"), {"step": 3}
+            )
+
+    def test_file_store_invalid_run(self):
+        with TemporaryDirectory() as directory:
+            store = FileCheckpointStore(directory)
+            with self.assertRaises(ValueError):
+                store.load("../run", "key")
+
+    def test_sqlite_store(self):
+        with TemporaryDirectory() as directory:
+            store = SQLiteCheckpointStore(path.join(directory, "checkpoints.db"))
+            self.check_store(store)
+            store.close()
+
+
+class TestCheckpointMemory(TestCase):
+    def test_round_trip(self):
+        memory = deque(
+            [HumanMessage(content="human"), AIMessage(content="ai"), "text"], maxlen=3
+        )
+        items = dump_memory(memory)
+
+        restored = deque(["old"], maxlen=3)
+        restore_memory(restored, items)
+        self.assertEqual(list(restored), list(memory))
+        self.assertIsInstance(restored[0], HumanMessage)
+        self.assertEqual(restored.maxlen, 3)
+
+    def test_none(self):
+        self.assertIsNone(dump_memory(None))
+        restore_memory(None, [{"value": "test"}])
+
+
+class TestCheckpointLoops(TestCase):
+    def test_disabled(self):
+        checkpoint = loop_checkpoint("test")
+        self.assertIsNone(checkpoint.load())
+
+    def test_keys(self):
+        store = MemoryCheckpointStore()
+        with checkpointing(store, "run"):
+            first = loop_checkpoint("reduce")
+            second = loop_checkpoint("retry")
+            with first.step(2):
+                nested = loop_checkpoint("retry")
+
+        self.assertEqual(first.key, "reduce.0")
+        self.assertEqual(second.key, "retry.1")
+        self.assertEqual(nested.key, "reduce.0/2/retry.0")
+
+    def test_reduce_resume(self):
+        store = MemoryCheckpointStore()
+        stop = partial(condition_threshold, 3)
+
+        agent = Agent("test", "test", {}, CrashingLLM(["1", "2", "3", "4"], 2))
+        with checkpointing(store, "run"):
+            with self.assertRaises(CrashError):
+                loop_reduce(agent, "0", stop_condition=stop)
+
+        resumed_llm = MockLLM(["3", "4"])
+        resumed = Agent("test", "test", {}, resumed_llm)
+        with checkpointing(store, "run"):
+            result = loop_reduce(resumed, "0", stop_condition=stop)
+
+        self.assertEqual(result, "4")
+        self.assertEqual(resumed_llm.index, 0)  # both replies were used
+        self.assertEqual(
+            [message.content for message in resumed.memory],
+            ["0", "1", "1", "2", "2", "3", "3", "4"],
+        )
+
+        # a finished loop returns the saved result without invoking the agent
+        finished_llm = MockLLM(["unused"])
+        with checkpointing(store, "run"):
+            result = loop_reduce(
+                Agent("test", "test", {}, finished_llm), "0", stop_condition=stop
+            )
+
+        self.assertEqual(result, "4")
+        self.assertEqual(finished_llm.messages, [])
+
+    def test_retry_resume(self):
+        store = MemoryCheckpointStore()
+        llm = MockLLM(["not a number", "5"])
+        with checkpointing(store, "run"):
+            result = loop_retry(
+                Agent("test", "test", {}, llm), "test", result_parser=int_result
+            )
+
+        self.assertEqual(result, 5)
+
+        resumed_llm = MockLLM(["6"])
+        with checkpointing(store, "run"):
+            result = loop_retry(
+                Agent("test", "test", {}, resumed_llm), "test", result_parser=int_result
+            )
+
+        self.assertEqual(result, 5)
+        self.assertEqual(resumed_llm.messages, [])
+
+    def test_tool_resume(self):
+        calls = []
+
+        def test_tool(value: str):
+            calls.append(value)
+            return "done"
+
+        toolbox = Toolbox([test_tool])
+        store = MemoryCheckpointStore()
+        call = '{"function": "test_tool", "parameters": {"value": "test"}}'
+
+        with checkpointing(store, "run"):
+            result = loop_tool(
+                Agent("test", "test", {}, MockLLM([call])), "test", toolbox=toolbox
+            )
+
+        self.assertEqual(result, "done")
+
+        with checkpointing(store, "run"):
+            result = loop_tool(
+                Agent("test", "test", {}, MockLLM([call])), "test", toolbox=toolbox
+            )
+
+        self.assertEqual(result, "done")
+        self.assertEqual(calls, ["test"])
+
+    def test_team_resume(self):
+        store = MemoryCheckpointStore()
+        stop = partial(condition_threshold, 2)
+
+        def run_team(llm):
+            manager = Agent("manager", "test", {}, llm)
+            worker = Agent("worker", "test", {}, llm)
+            with checkpointing(store, "run"):
+                result = loop_team(
+                    manager,
+                    [worker],
+                    "test",
+                    "continue",
+                    stop_condition=stop,
+                )
+
+            return result, llm
+
+        with self.assertRaises(CrashError):
+            run_team(CrashingLLM(["first", "second", "third"], 2))
+
+        # the first retry and the first step of the reduce finished before the crash
+        result, llm = run_team(CrashingLLM(["third"], 10))
+        self.assertEqual(result, "third")
+        self.assertEqual(llm.calls, 2)
+
+        result, llm = run_team(MockLLM(["unused"]))
+        self.assertEqual(result, "third")
+        self.assertEqual(llm.messages, [])
@@ -1,12 +1,19 @@
+from inspect import signature
 from unittest import TestCase
+from unittest.mock import patch
 
 from packit.conditions import (
+    accepts_results,
+    check_condition,
     condition_and,
+    condition_first_k,
     condition_keyword,
     condition_length,
     condition_list_once,
     condition_not,
     condition_or,
+    condition_quorum,
+    condition_score,
     condition_threshold,
     condition_threshold_mean,
     condition_threshold_sum,
@@ -122,3 +129,89 @@ class TestConditionTimeout(TestCase):
 
     def test_condition_timeout_false(self):
         self.assertFalse(condition_timeout(5, 5, timer=lambda: 1))
+
+
+class TestCheckCondition(TestCase):
+    def test_accepts_results(self):
+        self.assertTrue(accepts_results(lambda current=0, results=(): True))
+        self.assertTrue(accepts_results(lambda current=0, **kwargs: True))
+        self.assertFalse(accepts_results(condition_threshold))
+
+    def test_accepts_results_cached(self):
+        def condition(current=0, results=()):
+            return current > 5
+
+        with patch("packit.conditions.signature", wraps=signature) as mock_signature:
+            for current in range(10):
+                check_condition(condition, current=current, results=[])
+
+        self.assertEqual(mock_signature.call_count, 1)
+
+    def test_accepts_results_unhashable(self):
+        class UnhashableCondition:
+            __hash__ = None
+
+            def __call__(self, current=0, results=()):
+                return len(results) > 1
+
+        self.assertTrue(accepts_results(UnhashableCondition()))
+        self.assertTrue(check_condition(UnhashableCondition(), results=["a", "b"]))
+
+    def test_check_condition_results(self):
+        self.assertTrue(
+            check_condition(
+                lambda current=0, results=(): len(results) == 2,
+                current=0,
+                results=[1, 2],
+            )
+        )
+
+    def test_check_condition_without_results(self):
+        self.assertTrue(check_condition(condition_threshold, current=11, results=[]))
+
+    def test_check_condition_combined(self):
+        combined = condition_or(condition_threshold, condition_quorum(2))
+        self.assertTrue(check_condition(combined, current=1, results=["a", "a"]))
+        self.assertFalse(check_condition(combined, current=1, results=["a", "b"]))
+        self.assertTrue(check_condition(combined, current=11, results=[]))
+
+
+class TestConditionFirstK(TestCase):
+    def test_condition_first_k_default(self):
+        condition = condition_first_k(2)
+        self.assertFalse(condition(current=2, results=[None, 1]))
+        self.assertTrue(condition(current=3, results=[None, 1, 2]))
+
+    def test_condition_first_k_predicate(self):
+        condition = condition_first_k(1, predicate=lambda result: result > 5)
+        self.assertFalse(condition(current=1, results=[3]))
+        self.assertTrue(condition(current=2, results=[3, 7]))
+
+    def test_condition_first_k_max(self):
+        self.assertTrue(condition_first_k(2, max=3)(current=4, results=[]))
+
+
+class TestConditionQuorum(TestCase):
+    def test_condition_quorum(self):
+        condition = condition_quorum(3)
+        self.assertFalse(condition(current=4, results=["yes", "no", "yes", None]))
+        self.assertTrue(condition(current=5, results=["yes", "no", "yes", "yes"]))
+
+    def test_condition_quorum_key(self):
+        condition = condition_quorum(2, key=lambda result: result.strip().lower())
+        self.assertTrue(condition(current=2, results=["Yes", " yes"]))
+
+    def test_condition_quorum_max(self):
+        self.assertTrue(condition_quorum(3, max=7)(current=8, results=[]))
+
+
+class TestConditionScore(TestCase):
+    def test_condition_score(self):
+        condition = condition_score(0.8)
+        self.assertFalse(condition(current=2, results=[0.5, 0.8]))
+        self.assertTrue(condition(current=3, results=[0.5, 0.8, 0.9]))
+
+    def test_condition_score_scorer(self):
+        condition = condition_score(5, scorer=len)
+        self.assertFalse(condition(current=1, results=["short"]))
+        self.assertTrue(condition(current=2, results=["short", "longer"]))
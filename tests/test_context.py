@@ -1,11 +1,30 @@
+from asyncio import create_task, run
+from concurrent.futures import ThreadPoolExecutor
 from unittest import TestCase
 
+from packit.agent import Agent, invoke_agent
+from packit.conditions import condition_threshold
 from packit.context import (
+    CLEAR,
+    Deadline,
+    LoopContext,
+    check_deadline,
     count_loop_contexts,
+    deadline_scope,
+    get_deadline,
+    get_loop_context,
     inherit_loop_context,
+    loopum,
+    map_with_context,
     pop_loop_context,
     push_loop_context,
+    submit_with_context,
+    use_loop_context,
 )
+from packit.errors import DeadlineError
+from packit.loops import loop_reduce
+from packit.toolbox import Toolbox
+from tests.mocks import MockLLM
 
 
 class TestCountLoopContexts(TestCase):
@@ -48,3 +67,185 @@ class TestCountLoopContexts(TestCase):
     def test_inherit_missing_stop_condition(self):
         with self.assertRaises(ValueError):
             inherit_loop_context(agent_invoker=lambda x: x, agent_selector=lambda x: x)
+
+
+class TestLoopContextInheritance(TestCase):
+    def test_resolve_parent_chain(self):
+        toolbox = Toolbox([])
+        with loopum(
+            toolbox=toolbox, prompt_template="outer", stop_condition=condition_threshold
+        ) as outer:
+            with loopum(prompt_template="inner") as inner:
+                self.assertIs(inner.parent, outer)
+                self.assertIs(inner.toolbox, toolbox)
+                self.assertEqual(inner.prompt_template, "inner")
+                self.assertEqual(inner.depth, 1)
+
+            self.assertEqual(outer.prompt_template, "outer")
+
+    def test_clear_value(self):
+        with loopum(prompt_template="outer", stop_condition=condition_threshold):
+            with loopum(prompt_template=CLEAR) as inner:
+                self.assertIsNone(inner.prompt_template)
+
+    def test_defaults(self):
+        context = LoopContext()
+        self.assertIsNone(context.toolbox)
+        self.assertIsNotNone(context.agent_invoker)
+
+    def test_immutable(self):
+        context = LoopContext()
+        with self.assertRaises(AttributeError):
+            context.toolbox = None
+
+        with self.assertRaises(AttributeError):
+            del context.toolbox
+
+
+class TestLoopContextPropagation(TestCase):
+    def test_thread_pool(self):
+        with loopum(
+            prompt_template="outer", stop_condition=condition_threshold
+        ) as outer:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                plain = executor.submit(get_loop_context).result()
+                copied = submit_with_context(executor, get_loop_context).result()
+                mapped = list(
+                    map_with_context(executor, lambda _: get_loop_context(), range(3))
+                )
+
+        self.assertIsNone(plain)
+        self.assertIs(copied, outer)
+        self.assertEqual(mapped, [outer] * 3)
+        self.assertEqual(count_loop_contexts(), 0)
+
+    def test_use_loop_context(self):
+        with loopum(
+            prompt_template="outer", stop_condition=condition_threshold
+        ) as outer:
+            pass
+
+        def worker():
+            with use_loop_context(outer):
+                return get_loop_context()
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            self.assertIs(executor.submit(worker).result(), outer)
+
+        with use_loop_context(None) as context:
+            self.assertIsNone(context)
+
+    def test_async_task(self):
+        async def child():
+            with loopum(prompt_template="child"):
+                return get_loop_context()
+
+        async def parent():
+            with loopum(
+                prompt_template="parent", stop_condition=condition_threshold
+            ) as outer:
+                inner = await create_task(child())
+                self.assertIs(get_loop_context(), outer)
+                return outer, inner
+
+        outer, inner = run(parent())
+        self.assertIs(inner.parent, outer)
+        self.assertEqual(count_loop_contexts(), 0)
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestDeadline(TestCase):
+    def test_remaining(self):
+        timer = FakeTimer()
+        deadline = Deadline(10, timer=timer)
+        self.assertEqual(deadline.remaining(), 10)
+
+        timer.now = 4
+        self.assertEqual(deadline.remaining(), 6)
+        deadline.check()
+
+        timer.now = 11
+        self.assertEqual(deadline.remaining(), 0)
+        self.assertTrue(deadline.expired())
+        with self.assertRaises(DeadlineError):
+            deadline.check()
+
+    def test_cancel(self):
+        deadline = Deadline()
+        self.assertIsNone(deadline.remaining())
+        self.assertFalse(deadline.expired())
+
+        deadline.cancel()
+        self.assertTrue(deadline.expired())
+        with self.assertRaises(DeadlineError):
+            deadline.check()
+
+    def test_link_tightens(self):
+        timer = FakeTimer()
+        parent = Deadline(5, timer=timer)
+        self.assertEqual(Deadline(10, timer=timer).link(parent).remaining(), 5)
+        self.assertEqual(Deadline(1, timer=timer).link(parent).remaining(), 1)
+        self.assertEqual(Deadline(timer=timer).link(parent).remaining(), 5)
+
+    def test_link_cancel(self):
+        parent = Deadline()
+        child = Deadline().link(parent)
+
+        child.cancel()
+        self.assertTrue(child.cancelled())
+        self.assertFalse(parent.cancelled())
+
+        other = Deadline().link(parent)
+        parent.cancel()
+        self.assertTrue(other.cancelled())
+
+
+class TestLoopContextDeadline(TestCase):
+    def test_inherit_deadline(self):
+        timer = FakeTimer()
+        outer = Deadline(5, timer=timer)
+
+        with loopum(deadline=outer, stop_condition=condition_threshold):
+            with loopum(deadline=Deadline(10, timer=timer)):
+                self.assertEqual(get_deadline().remaining(), 5)
+
+            with loopum(deadline=CLEAR):
+                self.assertIs(get_deadline(), outer)
+
+            with loopum():
+                self.assertIs(get_deadline(), outer)
+
+        self.assertIsNone(get_deadline())
+        check_deadline()
+
+    def test_deadline_scope(self):
+        with deadline_scope() as deadline:
+            check_deadline()
+            deadline.cancel()
+            with self.assertRaises(DeadlineError):
+                check_deadline()
+
+        self.assertEqual(count_loop_contexts(), 0)
+
+    def test_loop_cancelled(self):
+        llm = MockLLM(["1", "2", "3"])
+        agent = Agent("test", "test", {}, llm)
+
+        with deadline_scope() as deadline:
+
+            def cancel_after_first(*args, **kwargs):
+                result = invoke_agent(*args, **kwargs)
+                deadline.cancel()
+                return result
+
+            with self.assertRaises(DeadlineError):
+                loop_reduce(agent, "0", agent_invoker=cancel_after_first)
+
+        self.assertEqual(llm.index, 1)
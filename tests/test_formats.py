@@ -1,6 +1,8 @@
 from unittest import TestCase
 
 from packit.formats import (
+    CompiledTemplate,
+    compile_template,
     format_bullet_list,
     format_number_list,
     format_str_or_json,
@@ -53,3 +55,42 @@ class TestJoinSentences(TestCase):
         self.assertEqual(
             join_sentences(["sentence1", "sentence2"]), "sentence1. sentence2."
         )
+
+
+class TestCompiledTemplate(TestCase):
+    def test_fields(self):
+        template = CompiledTemplate("{a} and {b} but not {{c}}")
+        self.assertEqual(template.fields, frozenset(["a", "b"]))
+        self.assertEqual(
+            template.format({"a": "1", "b": "2", "c": "3"}), "1 and 2 but not {c}"
+        )
+
+    def test_only_used_fields_serialized(self):
+        template = CompiledTemplate("{a}")
+        values = {}
+        template.format({"a": ["x"], "b": {"y": 1}}, values)
+        self.assertEqual(values, {"a": '["x"]'})
+
+    def test_shared_values(self):
+        values = {}
+        first = CompiledTemplate("{a}").format({"a": {"x": 1}}, values)
+        second = CompiledTemplate("[{a}]").format({"a": "ignored"}, values)
+        self.assertEqual(first, '{"x": 1}')
+        self.assertEqual(second, '[{"x": 1}]')
+
+    def test_complex_fields(self):
+        template = CompiledTemplate("{a!r} {b:>3} {c[0]}")
+        self.assertEqual(template.fields, frozenset(["a", "b", "c"]))
+        self.assertEqual(template.format({"a": "x", "b": "y", "c": "z"}), "'x'   y z")
+
+    def test_missing_field(self):
+        with self.assertRaises(KeyError):
+            CompiledTemplate("{a}").format({})
+
+    def test_non_string_values(self):
+        self.assertEqual(
+            CompiledTemplate("{a} {b}").format({"a": 1, "b": None}), "1 None"
+        )
+
+    def test_compile_cache(self):
+        self.assertIs(compile_template("{a}"), compile_template("{a}"))
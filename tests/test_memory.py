@@ -1,11 +1,18 @@
+from functools import partial
 from unittest import TestCase
 
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from packit.agent import Agent
 from packit.memory import (
+    estimate_tokens,
     make_infinite_memory,
     make_limited_memory,
+    make_token_memory,
     memory_order_depth,
     memory_order_width,
 )
+from tests.mocks import MockLLM
 
 
 class TestInfiniteMemory(TestCase):
@@ -40,3 +47,129 @@ class TestMemoryOrderWidth(TestCase):
         memory_order_width(memory, "2")
         memory_order_width(memory, "3")
         self.assertEqual(memory, ["1", "2", "3"])
+
+
+class TestTokenMemory(TestCase):
+    def test_estimate_tokens(self):
+        self.assertEqual(estimate_tokens(""), 0)
+        self.assertEqual(estimate_tokens("abcd"), 1)
+        self.assertEqual(estimate_tokens("abcde"), 2)
+
+    def test_evict_oldest(self):
+        memory = make_token_memory(10, estimator=len)
+        memory_order_width(memory, "aaaa")
+        memory_order_width(memory, "bbbb")
+        memory_order_width(memory, "cccc")
+
+        self.assertEqual(list(memory), ["bbbb", "cccc"])
+        self.assertEqual(memory.total, 8)
+
+    def test_pin_filter(self):
+        memory = make_token_memory(
+            10,
+            estimator=len,
+            pin_filter=lambda message: isinstance(message, SystemMessage),
+        )
+        memory.append(SystemMessage(content="ssss"))
+        memory.append(HumanMessage(content="hhhh"))
+        memory.append(AIMessage(content="aaaa"))
+
+        self.assertEqual([m.content for m in memory], ["ssss", "aaaa"])
+
+    def test_pin_message(self):
+        memory = make_token_memory(8, estimator=len)
+        memory.append("aaaa")
+        memory.pin(memory[0])
+        memory.append("bbbb")
+        memory.append("cccc")
+
+        self.assertEqual(list(memory), ["aaaa", "cccc"])
+
+    def test_pin_equal_message(self):
+        memory = make_token_memory(8, estimator=len)
+        memory.append("aaaa")
+        memory.pin(memory[0])
+        memory.append("bbbb")
+        memory.append("aaaa")
+
+        self.assertEqual(memory.pins, [True, False])
+        self.assertEqual(list(memory), ["aaaa", "aaaa"])
+
+    def test_pin_removed_with_message(self):
+        memory = make_token_memory(8, estimator=len)
+        memory.append(HumanMessage(content="aaaa"))
+        memory.pin(memory[0])
+        del memory[0]
+
+        memory.append(HumanMessage(content="bbbb"))
+        memory.append(HumanMessage(content="cccc"))
+        memory.append(HumanMessage(content="dddd"))
+
+        self.assertEqual([m.content for m in memory], ["cccc", "dddd"])
+
+    def test_pin_missing(self):
+        memory = make_token_memory(8, estimator=len)
+        with self.assertRaises(ValueError):
+            memory.pin("aaaa")
+
+    def test_keep_oversized(self):
+        memory = make_token_memory(8, estimator=len)
+        memory.append("aaaa")
+
+        with self.assertLogs("packit.memory", level="WARNING"):
+            memory.append("b" * 12)
+
+        self.assertEqual(list(memory), ["b" * 12])
+        self.assertEqual(memory.total, 12)
+
+        memory.append("cccc")
+        self.assertEqual(list(memory), ["cccc"])
+
+    def test_keep_oversized_depth(self):
+        memory = make_token_memory(8, estimator=len)
+        memory_order_depth(memory, "aaaa")
+
+        with self.assertLogs("packit.memory", level="WARNING"):
+            memory_order_depth(memory, "b" * 12)
+
+        self.assertEqual(list(memory), ["b" * 12])
+
+    def test_counts_cached(self):
+        calls = 0
+
+        def estimator(text):
+            nonlocal calls
+            calls += 1
+            return len(text)
+
+        memory = make_token_memory(100, estimator=estimator)
+        memory.append("test")
+        memory.append("test")
+        list(memory)
+        self.assertEqual(calls, 2)
+
+    def test_set_and_delete(self):
+        memory = make_token_memory(100, estimator=len)
+        memory.extend(["a", "bb", "ccc"])
+        memory[0] = "dddd"
+        self.assertEqual(memory.total, 9)
+
+        del memory[1:]
+        self.assertEqual(list(memory), ["dddd"])
+        self.assertEqual(memory.total, 4)
+
+    def test_agent_memory_factory(self):
+        llm = MockLLM(["a" * 40])
+        agent = Agent(
+            "test",
+            "backstory",
+            {},
+            llm,
+            memory_factory=partial(make_token_memory, 25),
+        )
+
+        for _ in range(3):
+            agent.invoke("prompt", {})
+
+        self.assertLessEqual(agent.memory.total, 25)
+        self.assertEqual(agent.memory[-1].content, "a" * 40)
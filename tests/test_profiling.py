@@ -0,0 +1,82 @@
+from os import path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from packit.agent import Agent
+from packit.loops import loop_retry
+from packit.profiling import NULL_PHASE, Profiler, profile_phase, profiling
+from tests.mocks import MockLLM
+
+
+class TestProfiler(TestCase):
+    def test_self_time(self):
+        now = 0.0
+
+        def timer():
+            return now
+
+        profiler = Profiler(timer=timer)
+        with profiler.phase("parse"):
+            now += 1.0
+            with profiler.phase("tool"):
+                now += 3.0
+            now += 1.0
+
+        self.assertEqual(profiler.totals["parse"], 2.0)
+        self.assertEqual(profiler.totals["tool"], 3.0)
+        self.assertEqual(profiler.framework_time(), 5.0)
+
+    def test_summary(self):
+        profiler = Profiler()
+        profiler.record("llm", 2.0)
+        profiler.record("llm", 4.0)
+        profiler.wall_time = 10.0
+
+        summary = profiler.summary()
+        self.assertEqual(summary["llm"]["calls"], 2)
+        self.assertEqual(summary["llm"]["mean"], 3.0)
+        self.assertEqual(summary["format"]["calls"], 0)
+        self.assertEqual(summary["other"]["total"], 4.0)
+        self.assertIn("llm", profiler.format_summary())
+
+
+class TestProfiling(TestCase):
+    def test_disabled(self):
+        self.assertIs(profile_phase("llm"), NULL_PHASE)
+
+    def test_agent_phases(self):
+        llm = MockLLM(["test 1"])
+        agent = Agent("test", "Test agent", {}, llm)
+
+        with profiling() as profiler:
+            loop_retry(agent, "test")
+
+        for phase in ["context", "format", "llm", "trace"]:
+            self.assertGreater(profiler.calls.get(phase, 0), 0, phase)
+
+        self.assertIs(profile_phase("llm"), NULL_PHASE)
+
+    def test_nested_profiling(self):
+        with profiling():
+            with self.assertRaises(ValueError):
+                with profiling():
+                    pass
+
+    def test_log_summary(self):
+        with self.assertLogs("packit.profiling", level="INFO") as logs:
+            with profiling(log_summary=True) as profiler:
+                profiler.record("llm", 1.0)
+
+        self.assertIn("llm", logs.output[0])
+
+    def test_dump_stats(self):
+        llm = MockLLM(["test 1"])
+        agent = Agent("test", "Test agent", {}, llm)
+
+        with TemporaryDirectory() as temp:
+            dump_path = path.join(temp, "packit.pstats")
+            with profiling(dump_path=dump_path) as profiler:
+                agent("test")
+
+            self.assertTrue(path.exists(dump_path))
+            self.assertIn("packit", profiler.profile_text)
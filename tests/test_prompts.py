@@ -2,6 +2,7 @@ from unittest import TestCase
 
 from packit.prompts import (
     PromptLibrary,
+    SkipMatcher,
     get_function_example,
     get_prompts,
     get_random_prompt,
@@ -38,3 +39,18 @@ class TestPromptLibraryUtils(TestCase):
     def test_missing_random_prompt(self):
         with self.assertRaises(KeyError):
             get_random_prompt("non_existent_prompt")
+
+
+class TestSkipMatcher(TestCase):
+    def test_split_token(self):
+        matcher = SkipMatcher(["<|assistant|>", "</s>"])
+        self.assertIsNone(matcher.feed("hello <|assi"))
+        self.assertEqual(matcher.feed("stant|> world"), "<|assistant|>")
+
+    def test_no_tokens(self):
+        matcher = SkipMatcher([])
+        self.assertIsNone(matcher.feed("</s>"))
+
+    def test_prefers_longer_token(self):
+        matcher = SkipMatcher(["</s", "</s>"])
+        self.assertEqual(matcher.feed("end</s>"), "</s>")
@@ -1,7 +1,8 @@
+from json import dumps, loads
 from unittest import TestCase
 
 from packit.toolbox import Toolbox
-from packit.tools import multiply_tool
+from packit.tools import multiply_tool, sum_tool
 
 
 class TestBasicToolboxGetDefinition(TestCase):
@@ -54,3 +55,27 @@ class TestBasicToolboxListTools(TestCase):
     def test_tool_does_not_exist(self):
         toolbox = Toolbox([])
         self.assertEqual(toolbox.list_tools(), [])
+
+
+class TestBasicToolboxRenderDefinitions(TestCase):
+    def test_render_cached(self):
+        toolbox = Toolbox([multiply_tool])
+        rendered = toolbox.render_definitions({"subject": "test"})
+        self.assertEqual(rendered, dumps(toolbox.definitions))
+        self.assertIs(toolbox.render_definitions({"subject": "test"}), rendered)
+
+    def test_render_invalidated(self):
+        toolbox = Toolbox([multiply_tool])
+        self.assertEqual(len(loads(toolbox.render_definitions())), 1)
+
+        toolbox.add_tool(sum_tool)
+        self.assertEqual(len(loads(toolbox.render_definitions())), 2)
+
+        toolbox.remove_tool(multiply_tool.__name__)
+        self.assertEqual(len(loads(toolbox.render_definitions())), 1)
+        self.assertEqual(toolbox.list_tools(), [sum_tool.__name__])
+
+    def test_add_replaces(self):
+        toolbox = Toolbox([multiply_tool])
+        toolbox.add_tool(multiply_tool)
+        self.assertEqual(len(toolbox.definitions), 1)
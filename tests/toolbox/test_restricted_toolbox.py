@@ -1,3 +1,4 @@
+from json import dumps
 from unittest import TestCase
 
 from packit.abac import SubsetABAC
@@ -299,3 +300,29 @@ class TestRestrictedToolboxListTools(TestCase):
         abac = SubsetABAC([], default_state=RuleState.DENY)
         toolbox = RestrictedToolbox([multiply_tool], abac)
         self.assertEqual(toolbox.list_tools(abac=TEST_ATTRIBUTES), [])
+
+
+class TestRestrictedToolboxRenderDefinitions(TestCase):
+    def test_render_per_subject(self):
+        abac = SubsetABAC([({"subject": "allowed"}, RuleState.ALLOW)])
+        toolbox = RestrictedToolbox([multiply_tool], abac)
+
+        self.assertEqual(
+            toolbox.render_definitions({"subject": "allowed"}),
+            dumps(toolbox.definitions),
+        )
+        self.assertEqual(toolbox.render_definitions({"subject": "denied"}), "[]")
+
+    def test_render_rule_change(self):
+        abac = SubsetABAC([])
+        toolbox = RestrictedToolbox([multiply_tool], abac)
+        self.assertEqual(toolbox.render_definitions({"subject": "test"}), "[]")
+
+        rule = ({"subject": "test"}, RuleState.ALLOW)
+        abac.add_rule(rule)
+        self.assertEqual(
+            toolbox.render_definitions({"subject": "test"}), dumps(toolbox.definitions)
+        )
+
+        abac.remove_rule(rule)
+        self.assertEqual(toolbox.render_definitions({"subject": "test"}), "[]")